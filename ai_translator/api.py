@@ -1,16 +1,20 @@
-from flask import Flask, request, send_file, send_from_directory,jsonify
+from flask import Blueprint, Flask, Response, current_app, request, send_file, send_from_directory,jsonify
 from werkzeug.utils import secure_filename
+import json
 import os
+import queue
+import shutil
 import tempfile
+import threading
 import logging
 import traceback
+from typing import Optional
 
-from model import GLMModel, OpenAIModel
-from translator import PDFTranslator
-from utils import ArgumentParser, ConfigLoader, LOG
-
-# 初始化 Flask 应用
-app = Flask(__name__)
+from model import Model, create_model, resolve_model_type
+from jobs import JobManager, JobStore, SUCCEEDED
+from translator import PDFTranslator, TranslationCache, TranslationCancelled, load_parse_cache, load_translation_cache, load_translation_memory
+from utils import ConfigLoader, LOG
+from utils.metrics import METRICS
 
 # 定义支持的语言列表
 supported_languages = {
@@ -28,27 +32,102 @@ supported_languages = {
     # ...继续添加其他支持的语言...
 }
 
-#实例化PDFTranslator
-argument_parser = ArgumentParser()
-args = argument_parser.parse_arguments()
-config_loader = ConfigLoader(args.config)
-config = config_loader.load_config()
-
-#采用openai的模型
-model_name = args.openai_model if args.openai_model else config['OpenAIModel']['model']
-api_key = args.openai_api_key if args.openai_api_key else config['OpenAIModel']['api_key']
-model = OpenAIModel(model=model_name, api_key=api_key)
-translator = PDFTranslator(model)   
-#采用其他模型（省略）
+# 配置文件路径：优先使用环境变量 AI_TRANSLATOR_CONFIG，其次是当前目录和项目根目录下的 config.yaml
+CONFIG_ENV_VAR = 'AI_TRANSLATOR_CONFIG'
+DEFAULT_CONFIG_PATHS = ['config.yaml', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')]
 
 # 应用配置
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 ALLOWED_EXTENSIONS = {'pdf', 'md'}  # 允许的文件扩展名集合
 
-# 检查 UPLOAD_FOLDER 是否存在，如果不存在，则创建它
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+SERVICE_KEY = 'translation_service'
+_UNSET = object()
+
+api_bp = Blueprint('api', __name__)
+
+
+class TranslationService:
+    """API 进程内共享的模型、缓存和任务管理器，由 create_app 创建并保存在 app.extensions 中。"""
+
+    def __init__(self, config: dict, model: Model, cache: Optional[TranslationCache] = None):
+        self.config = config
+        self.model = model
+        self.cache = cache
+        # 解析缓存按配置文件创建，同一文档的不同语言或格式的任务只解析一次
+        self.parse_cache = load_parse_cache(None, config)
+        # 翻译记忆同样按配置文件创建，所有任务共用
+        self.memory = load_translation_memory(None, config)
+        common_config = config.get('common') or {}
+        api_config = config.get('api') or {}
+        self.default_file_format = common_config.get('file_format', 'PDF')
+        self.translator_options = dict(
+            max_workers=common_config.get('max_workers', 1),
+            token_budget=common_config.get('token_budget'),
+            parse_workers=common_config.get('parse_workers', 1),
+            image_resolution=common_config.get('image_resolution'),
+            detect_headers_footers=common_config.get('detect_headers_footers', False),
+        )
+
+        # 异步翻译任务：任务状态保存在 SQLite 中，上传文件和输出保存在每个任务独立的目录中
+        jobs_dir = api_config.get('jobs_dir', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'job_data'))
+        self.job_store = JobStore(api_config.get('job_store', os.path.join(jobs_dir, 'jobs.sqlite3')))
+        self.job_manager = JobManager(self.create_translator, self.job_store, jobs_dir, max_concurrent_jobs=api_config.get('max_concurrent_jobs', 2), model_name=model.get_model_name())
+
+    def create_translator(self, **kwargs) -> PDFTranslator:
+        """每个请求/任务使用独立的 PDFTranslator，避免并发请求互相覆盖 translator.book。"""
+        return PDFTranslator(self.model, cache=self.cache, parse_cache=self.parse_cache, memory=self.memory, **self.translator_options, **kwargs)
+
+    def shutdown(self, wait: bool = True):
+        """取消排队中的任务（下次启动时重新调度），并等待运行中的任务结束。"""
+        self.job_manager.shutdown(wait=wait, cancel_queued=True)
+        if wait and self.cache is not None:
+            self.cache.close()
+        if wait and self.parse_cache is not None:
+            self.parse_cache.close()
+        if wait and self.memory is not None:
+            self.memory.close()
+
+
+def resolve_config_path(config_path: Optional[str] = None) -> str:
+    if config_path:
+        return config_path
+    if os.environ.get(CONFIG_ENV_VAR):
+        return os.environ[CONFIG_ENV_VAR]
+    return next((path for path in DEFAULT_CONFIG_PATHS if os.path.exists(path)), DEFAULT_CONFIG_PATHS[0])
+
+
+def create_app(config: Optional[dict] = None, model: Optional[Model] = None, cache=_UNSET, config_path: Optional[str] = None) -> Flask:
+    """API 应用工厂。
+
+    不读取命令行参数：未传入 config 时从 YAML 配置文件（见 resolve_config_path）加载，
+    并应用环境变量覆盖。model 和 cache 默认按配置创建。
+    """
+    if config is None:
+        config = ConfigLoader(resolve_config_path(config_path)).load_config()
+    if model is None:
+        model = create_model(resolve_model_type(config, section='api'), config)
+    if cache is _UNSET:
+        cache = load_translation_cache(None, config)
+
+    app = Flask(__name__)
+    # 检查 UPLOAD_FOLDER 是否存在，如果不存在，则创建它
+    if not os.path.exists(UPLOAD_FOLDER):
+        os.makedirs(UPLOAD_FOLDER)
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+
+    service = TranslationService(config, model, cache)
+    app.extensions[SERVICE_KEY] = service
+    app.register_blueprint(api_bp)
+
+    # 重新调度已退出进程遗留的未完成任务；多个 worker 同时启动时每个任务只会被一个 worker 认领
+    if (config.get('api') or {}).get('resume_unfinished', True):
+        service.job_manager.resume_unfinished()
+    return app
+
+
+def get_service() -> TranslationService:
+    return current_app.extensions[SERVICE_KEY]
+
 
 # 定义一个函数，用于验证文件扩展名是否在允许的文件扩展名集合中
 ALLOWED_EXTENSIONS = {'pdf', 'txt', 'doc', 'docx'}
@@ -58,7 +137,7 @@ def allowed_file(filename):
 
 
 # 当API接收到一个POST 请求，我们从请求的 JSON 数据中提取 target_language 字段，并验证该语言是否受支持
-@app.route('/translate', methods=['POST'])
+@api_bp.route('/translate', methods=['POST'])
 def translate():
     # 从请求中获取目标语言代码
     data = request.json
@@ -77,7 +156,7 @@ def translate():
         return jsonify(error="输入的语言代码不受支持。"), 400
 
 
-@app.route('/translate_pdf', methods=['POST'])
+@api_bp.route('/translate_pdf', methods=['POST'])
 def translate_pdf_route():
     """处理 PDF 翻译请求的路由."""
     file = request.files.get('file')
@@ -87,6 +166,11 @@ def translate_pdf_route():
     if target_language_code not in supported_languages:
         return jsonify(error="输入的语言代码不受支持。"), 400
     target_language = supported_languages[target_language_code]
+    # 与 /jobs 相同，未指定时使用配置文件中的 common.file_format
+    service = get_service()
+    file_format = request.form.get('file_format', service.default_file_format)
+    if file_format.lower() not in ('pdf', 'markdown'):
+        return jsonify(error="输出格式只支持 PDF 和 Markdown。"), 400
 
     # 验证文件是否存在
     if file is None or file.filename == '':
@@ -100,18 +184,13 @@ def translate_pdf_route():
     try:
         # 确保文件名安全，避免不安全的路径
         filename = secure_filename(file.filename)
-        # 将文件保存到 uploads 文件夹
-        pdf_file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(pdf_file_path)
-
-        # 调用翻译函数
-        # translate_pdf 只返回翻译后文件的路径
-        output_file_path = translator.translate_pdf(
-            pdf_file_path=pdf_file_path,
-            target_language=target_language,  # 用户选择的目标语言,
-            output_file_path=None,
-            pages=None
-        )
+        # 上传文件按内容哈希保存；相同文件、语言、格式和模型已有结果时直接返回，正在翻译时合并到同一个任务
+        job_manager = service.job_manager
+        job_id, reused = job_manager.submit(file.stream, filename, target_language, file_format)
+        job = job_manager.wait(job_id)
+        if job['status'] != SUCCEEDED:
+            raise RuntimeError(f"翻译任务 {job_id} 失败: {job['error']}")
+        output_file_path = job['output_file_path']
 
         # 确定正确的文件类型和内容类型
         # 假定 output_file_path 是一个包含文件路径和扩展名的字符串
@@ -134,6 +213,180 @@ def translate_pdf_route():
         return jsonify(message=f"发生内部错误: {error_trace}"), 500
        # 生产环境应返回更通用的错误消息
        # return jsonify(message="内部服务器错误，请联系支持。"), 500
+
+
+def format_stream_event(event: str, data: dict, stream_format: str) -> str:
+    if stream_format == 'ndjson':
+        return json.dumps({'event': event, **data}, ensure_ascii=False) + '\n'
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@api_bp.route('/translate_pdf/stream', methods=['POST'])
+def translate_pdf_stream_route():
+    """边翻译边推送结果：每个文本/表格内容块的请求一返回就发送一个 content 事件。
+
+    默认使用 SSE（text/event-stream），表单字段 stream_format=ndjson 时改为逐行 JSON。
+    事件依次为 content（page、content、type、translation、status，页面之间可能交错）、
+    page（该页所有内容块已完成）、done，出错时发送 error。
+    """
+    file = request.files.get('file')
+    target_language_code = request.form.get('target_language')
+    stream_format = request.form.get('stream_format', 'sse').lower()
+
+    # 验证目标语言是否受支持
+    if target_language_code not in supported_languages:
+        return jsonify(error="输入的语言代码不受支持。"), 400
+    target_language = supported_languages[target_language_code]
+    if stream_format not in ('sse', 'ndjson'):
+        return jsonify(error="stream_format 只支持 sse 和 ndjson。"), 400
+
+    # 验证文件是否存在
+    if file is None or file.filename == '':
+        return jsonify(message="未提供文件或文件为空"), 400
+
+    # 验证文件类型是否允许
+    if not allowed_file(file.filename):
+        return jsonify(message="不允许的文件类型"), 400
+
+    # 每个请求使用独立的临时目录，响应结束后删除
+    work_dir = tempfile.mkdtemp(dir=current_app.config['UPLOAD_FOLDER'])
+    pdf_file_path = os.path.join(work_dir, secure_filename(file.filename))
+    file.save(pdf_file_path)
+
+    events = queue.Queue()
+
+    def on_content(page_idx, content_idx, content, translation, status):
+        events.put(('content', {
+            'page': page_idx,
+            'content': content_idx,
+            'type': content.content_type.name.lower(),
+            'translation': translation,
+            'status': status,
+        }))
+
+    translator = get_service().create_translator(content_callback=on_content)
+
+    def translate():
+        try:
+            page_count = 0
+            for page_idx, _ in enumerate(translator.iter_translated_pages(pdf_file_path, target_language)):
+                events.put(('page', {'page': page_idx}))
+                page_count += 1
+            events.put(('done', {'pages': page_count}))
+        except TranslationCancelled:
+            LOG.info(f"Client disconnected, stopped translating {pdf_file_path}")
+        except Exception as e:
+            logging.error(f"发生错误: {traceback.format_exc()}")
+            events.put(('error', {'error': str(e)}))
+        finally:
+            events.put(None)
+
+    def generate():
+        worker = threading.Thread(target=translate, name='translate-stream', daemon=True)
+        worker.start()
+        try:
+            while True:
+                item = events.get()
+                if item is None:
+                    return
+                yield format_stream_event(*item, stream_format)
+        finally:
+            # 客户端提前断开时取消翻译，不再发送新的请求
+            translator.cancel()
+            worker.join()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    mimetype = 'application/x-ndjson' if stream_format == 'ndjson' else 'text/event-stream'
+    # 关闭反向代理缓冲，让事件立即到达浏览器
+    return Response(generate(), mimetype=mimetype, headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@api_bp.route('/jobs', methods=['POST'])
+def submit_job_route():
+    """提交异步翻译任务，立即返回任务 id，翻译在后台线程池中执行。
+
+    target_languages（逗号分隔或重复的表单字段）指定多种语言时，每种语言一个任务，PDF 只解析一次。
+    """
+    file = request.files.get('file')
+    target_language_code = request.form.get('target_language')
+    target_language_codes = [code.strip() for value in request.form.getlist('target_languages') for code in value.split(',') if code.strip()]
+    service = get_service()
+    file_format = request.form.get('file_format', service.default_file_format)
+
+    # 验证目标语言是否受支持
+    if target_language_codes:
+        if any(code not in supported_languages for code in target_language_codes):
+            return jsonify(error="输入的语言代码不受支持。"), 400
+    elif target_language_code not in supported_languages:
+        return jsonify(error="输入的语言代码不受支持。"), 400
+    if file_format.lower() not in ('pdf', 'markdown'):
+        return jsonify(error="输出格式只支持 PDF 和 Markdown。"), 400
+
+    # 验证文件是否存在
+    if file is None or file.filename == '':
+        return jsonify(message="未提供文件或文件为空"), 400
+
+    # 验证文件类型是否允许
+    if not allowed_file(file.filename):
+        return jsonify(message="不允许的文件类型"), 400
+
+    if target_language_codes:
+        submitted = service.job_manager.submit_languages(
+            upload_stream=file.stream,
+            filename=secure_filename(file.filename),
+            target_languages=[supported_languages[code] for code in target_language_codes],
+            file_format=file_format,
+        )
+        language_codes = {supported_languages[code]: code for code in target_language_codes}
+        return jsonify(jobs=[
+            dict(target_language=language_codes[target_language], job_id=job_id, reused=reused, status_url=f"/jobs/{job_id}", result_url=f"/jobs/{job_id}/result")
+            for target_language, job_id, reused in submitted
+        ]), 202
+
+    job_id, reused = service.job_manager.submit(
+        upload_stream=file.stream,
+        filename=secure_filename(file.filename),
+        target_language=supported_languages[target_language_code],
+        file_format=file_format,
+    )
+    # reused 为 True 表示复用了相同输入的已完成或进行中的任务
+    return jsonify(job_id=job_id, reused=reused, status_url=f"/jobs/{job_id}", result_url=f"/jobs/{job_id}/result"), 202
+
+
+@api_bp.route('/jobs/<job_id>', methods=['GET'])
+def job_status_route(job_id):
+    """查询任务状态和进度。"""
+    job = get_service().job_store.get(job_id)
+    if job is None:
+        return jsonify(error="任务不存在。"), 404
+    return jsonify(
+        job_id=job_id,
+        status=job['status'],
+        filename=job['filename'],
+        target_language=job['target_language'],
+        file_format=job['file_format'],
+        progress={'done': job['progress_done'], 'total': job['progress_total']},
+        error=job['error'],
+        result_url=f"/jobs/{job_id}/result" if job['status'] == SUCCEEDED else None,
+    ), 200
+
+
+@api_bp.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result_route(job_id):
+    """下载已完成任务的翻译结果。"""
+    job = get_service().job_store.get(job_id)
+    if job is None:
+        return jsonify(error="任务不存在。"), 404
+    if job['status'] != SUCCEEDED:
+        return jsonify(error="任务尚未完成。", status=job['status']), 409
+    output_file_path = job['output_file_path']
+    return send_from_directory(os.path.dirname(output_file_path), os.path.basename(output_file_path), as_attachment=True)
+
+
+@api_bp.route('/metrics', methods=['GET'])
+def metrics_route():
+    """Prometheus 文本格式的指标：请求耗时、token 用量、重试、限流等待、缓存命中、解析和写入耗时。"""
+    return Response(METRICS.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
     
   
 
@@ -1,8 +1,8 @@
-import pandas as pd
 from enum import Enum, auto
-from PIL import Image as PILImage
 from utils import LOG
 
+# pandas 和 PIL 只在处理表格、图像内容时才导入，缩短各入口的启动时间
+
 class ContentType(Enum):
     TEXT = auto()
     TABLE = auto()
@@ -26,7 +26,8 @@ class Content:
             return True
         elif self.content_type == ContentType.TABLE and isinstance(translation, list):
             return True
-        elif self.content_type == ContentType.IMAGE and isinstance(translation, PILImage.Image):
+        elif self.content_type == ContentType.IMAGE and (isinstance(translation, str) or _is_pil_image(translation)):
+           # 图像内容的"译文"通常就是图像文件路径，像素数据只在写入时由 writer 读取
            return True
         return False
     
@@ -44,8 +45,14 @@ class Content:
             return str(self.translation)  # 通用的转换为字符串的处理
         
 
+def _is_pil_image(value) -> bool:
+    from PIL import Image as PILImage
+    return isinstance(value, PILImage.Image)
+
+
 class TableContent(Content):
     def __init__(self, data, translation=None):
+        import pandas as pd
         df = pd.DataFrame(data)
 
         # Verify if the number of rows and columns in the data and DataFrame object match
@@ -75,6 +82,7 @@ class TableContent(Content):
             LOG.debug(table_data)
 
             # Create a DataFrame from the table_data
+            import pandas as pd
             translated_df = pd.DataFrame(table_data[1:], columns=table_data[0])           
             LOG.debug(translated_df)
             self.translation = translated_df
@@ -1,8 +1,9 @@
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-from utils import ArgumentParser, ConfigLoader
-from model import OpenAIModel
-from translator import PDFTranslator
+from utils import LOG
+from translator import PDFTranslator, TranslationCancelled
 
 # 假设你已经定义了 supported_languages 字典
 supported_languages = {
@@ -20,17 +21,28 @@ supported_languages = {
     # ...继续添加其他支持的语言...
 }
 
+# 后台翻译线程结果的轮询间隔（毫秒），以及每次轮询最多处理的消息数，避免一次插入过多文本卡住界面
+POLL_INTERVAL_MS = 100
+MAX_MESSAGES_PER_POLL = 200
+
 class GuiApp(tk.Tk):
-    def __init__(self, model, config):
+    def __init__(self, model, config, cache=None, parse_cache=None, memory=None):
         super().__init__()
         self.model = model
         self.config = config
-        self.translator = PDFTranslator(model)  # 用于翻译 PDF 文件
+        self.cache = cache
+        self.parse_cache = parse_cache
+        self.memory = memory
+        self.translator = None  # 当前正在运行的 PDFTranslator，每次翻译新建一个
+        self.worker = None
+        # 翻译线程通过该队列把进度和译文交给 Tk 主线程，Tk 组件只在主线程中更新
+        self.messages = queue.Queue()
         self.title('PDF Translator GUI')
-        self.geometry('800x600')
+        self.geometry('800x650')
 
         # 创建 GUI 组件
         self.create_widgets()
+        self.protocol('WM_DELETE_WINDOW', self.on_close)
 
     def create_widgets(self):
         # 文件选择按钮
@@ -48,9 +60,19 @@ class GuiApp(tk.Tk):
         self.language_dropdown = ttk.Combobox(self, textvariable=self.language_var, values=list(supported_languages.values()))
         self.language_dropdown.pack(pady=5)
 
-        # 翻译按钮
-        self.translate_button = tk.Button(self, text='Translate', command=self.translate, state=tk.DISABLED)
-        self.translate_button.pack(pady=10)
+        # 翻译和取消按钮
+        self.button_frame = tk.Frame(self)
+        self.button_frame.pack(pady=10)
+        self.translate_button = tk.Button(self.button_frame, text='Translate', command=self.translate, state=tk.DISABLED)
+        self.translate_button.pack(side=tk.LEFT, padx=5)
+        self.cancel_button = tk.Button(self.button_frame, text='Cancel', command=self.cancel, state=tk.DISABLED)
+        self.cancel_button.pack(side=tk.LEFT, padx=5)
+
+        # 进度条和状态
+        self.progress_bar = ttk.Progressbar(self, length=600, mode='determinate')
+        self.progress_bar.pack(pady=5)
+        self.status_label = tk.Label(self, text='')
+        self.status_label.pack(pady=5)
 
         # 结果显示框
         self.result_text = tk.Text(self, height=25, width=100)
@@ -74,13 +96,105 @@ class GuiApp(tk.Tk):
             messagebox.showerror('Error', 'Please select a valid target language.')
             return
         
+        self.result_text.delete(1.0, tk.END)  # 清空文本框
+        self.set_running(True)
+        self.status_label.config(text='Parsing PDF...')
+        # 解析期间还不知道内容块总数，先显示不确定进度
+        self.progress_bar.config(mode='indeterminate')
+        self.progress_bar.start()
+
+        common = self.config['common']
+        self.translator = PDFTranslator(
+            self.model,
+            max_workers=common.get('max_workers', 1),
+            cache=self.cache,
+            parse_cache=self.parse_cache,
+            memory=self.memory,
+            token_budget=common.get('token_budget'),
+            parse_workers=common.get('parse_workers', 1),
+            image_resolution=common.get('image_resolution'),
+            detect_headers_footers=common.get('detect_headers_footers', False),
+            progress_callback=lambda done, total: self.messages.put(('progress', done, total)),
+            content_callback=lambda page_idx, content_idx, content, translation, status: self.messages.put(('content', translation)),
+        )
+        self.worker = threading.Thread(target=self.run_translation, args=(self.translator, self.file_path, language_code), name='gui-translator', daemon=True)
+        self.worker.start()
+        self.after(POLL_INTERVAL_MS, self.poll_messages)
+
+    def run_translation(self, translator, file_path, language_code):
+        """在后台线程中翻译，结果通过 self.messages 交给主线程。"""
         try:
-            self.result_text.delete(1.0, tk.END)  # 清空文本框
-            # 使用 translate_pdf_text 方法获取翻译后的文本
-            translated_text = self.translator.translate_pdf_text(self.file_path, language_code)
-            self.result_text.insert(tk.END, translated_text)
+            # 使用 translate_pdf_text 方法翻译，各内容块的译文由 content_callback 逐个送出
+            translator.translate_pdf_text(file_path, language_code)
+            self.messages.put(('done',))
+        except TranslationCancelled:
+            self.messages.put(('cancelled',))
         except Exception as e:
-            messagebox.showerror('Error', str(e))
+            LOG.error(f"GUI translation failed: {e}")
+            self.messages.put(('error', str(e)))
+
+    def poll_messages(self):
+        """在 Tk 主线程中处理翻译线程发来的消息，翻译结束前每隔 POLL_INTERVAL_MS 轮询一次。"""
+        finished = False
+        for _ in range(MAX_MESSAGES_PER_POLL):
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            kind = message[0]
+            if kind == 'progress':
+                self.update_progress(*message[1:])
+            elif kind == 'content':
+                self.result_text.insert(tk.END, message[1] + '\n')
+                self.result_text.see(tk.END)
+            elif kind == 'done':
+                self.status_label.config(text='Translation finished.')
+                finished = True
+            elif kind == 'cancelled':
+                self.status_label.config(text='Translation cancelled.')
+                finished = True
+            elif kind == 'error':
+                self.status_label.config(text='Translation failed.')
+                messagebox.showerror('Error', message[1])
+                finished = True
+
+        if finished:
+            self.set_running(False)
+        else:
+            self.after(POLL_INTERVAL_MS, self.poll_messages)
+
+    def update_progress(self, done, total):
+        if total is None:
+            return
+        if str(self.progress_bar['mode']) != 'determinate':
+            self.progress_bar.stop()
+            self.progress_bar.config(mode='determinate')
+        self.progress_bar.config(maximum=max(total, 1), value=done)
+        self.status_label.config(text=f'Translated {done}/{total} blocks')
+
+    def set_running(self, running):
+        """翻译进行中禁用打开/翻译按钮，启用取消按钮。"""
+        self.open_button['state'] = tk.DISABLED if running else tk.NORMAL
+        self.translate_button['state'] = tk.DISABLED if running else tk.NORMAL
+        self.cancel_button['state'] = tk.NORMAL if running else tk.DISABLED
+        if not running:
+            self.progress_bar.stop()
+            self.progress_bar.config(mode='determinate')
+            self.worker = None
+            self.translator = None
+
+    def cancel(self):
+        if self.translator is not None:
+            # 已在途的请求返回后才会结束，期间禁用取消按钮
+            self.translator.cancel()
+            self.cancel_button['state'] = tk.DISABLED
+            self.status_label.config(text='Cancelling...')
+
+    def on_close(self):
+        # 关闭窗口时取消后台翻译，翻译线程为守护线程，不会阻止进程退出
+        if self.translator is not None:
+            self.translator.cancel()
+        self.destroy()
 
 
 # 以下代码，实现了翻译为中文的功能。
@@ -0,0 +1,29 @@
+# gunicorn 配置：gunicorn -c gunicorn.conf.py wsgi:app
+#
+# 每个 worker 是独立进程，拥有自己的模型客户端、限流器和任务线程池：
+#   - 同时运行的翻译任务数 = workers × api.max_concurrent_jobs
+#   - 每个任务最多 common.max_workers 个在途模型请求
+#   - OpenAIModel 的 requests_per_minute / tokens_per_minute 按进程计算，应设为账户配额 / workers
+import multiprocessing
+import os
+
+bind = os.environ.get("AI_TRANSLATOR_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("AI_TRANSLATOR_WORKERS", multiprocessing.cpu_count()))
+
+# 同步的 /translate_pdf 和流式接口在请求线程中等待整本书翻译完成，使用线程 worker 避免阻塞其他请求
+worker_class = "gthread"
+threads = int(os.environ.get("AI_TRANSLATOR_THREADS", 8))
+
+# 不预加载应用：任务线程池、SQLite 连接和模型客户端都在各个 worker 进程中创建
+preload_app = False
+
+# 收到 SIGTERM 后等待运行中的请求和翻译任务结束的秒数，超时的任务由之后启动的 worker 从检查点继续
+graceful_timeout = int(os.environ.get("AI_TRANSLATOR_GRACEFUL_TIMEOUT", 120))
+
+
+def worker_exit(server, worker):
+    """worker 退出前取消排队中的任务并等待运行中的任务结束。"""
+    app = getattr(worker, "wsgi", None)
+    service = getattr(app, "extensions", {}).get("translation_service")
+    if service is not None:
+        service.shutdown()
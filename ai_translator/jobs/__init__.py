@@ -0,0 +1,3 @@
+from .job_store import JobStore, QUEUED, RUNNING, SUCCEEDED, FAILED
+from .job_manager import JobManager
+from .upload_store import UploadStore
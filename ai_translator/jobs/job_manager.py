@@ -0,0 +1,232 @@
+import os
+import shutil
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from jobs.job_store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+from jobs.upload_store import UploadStore
+from utils import LOG
+
+
+class JobManager:
+    """在本地线程池中异步执行翻译任务。
+
+    每个任务使用 translator_factory 创建独立的 PDFTranslator，并在独立目录中保存上传文件和输出，
+    同时运行的任务数量由 max_concurrent_jobs 限制，其余任务排队等待。
+    上传文件按内容哈希保存，相同（文件哈希、目标语言、格式、模型）的提交复用已完成或进行中的任务。
+    """
+
+    def __init__(self, translator_factory: Callable, store: JobStore, jobs_dir: str, max_concurrent_jobs: int = 2, model_name: str = ""):
+        self.translator_factory = translator_factory
+        self.store = store
+        self.jobs_dir = os.path.abspath(jobs_dir)
+        self.model_name = model_name
+        self.executor = ThreadPoolExecutor(max_workers=max(1, max_concurrent_jobs), thread_name_prefix='translation-job')
+        if not os.path.isdir(self.jobs_dir):
+            os.makedirs(self.jobs_dir)
+        self.uploads = UploadStore(os.path.join(self.jobs_dir, 'uploads'))
+        # “查找可复用任务”和“创建新任务”由 JobStore.find_or_create 保证跨进程原子；
+        # 该锁让本进程内新建的任务先完成调度，复用它的并发请求可以直接等待其 future
+        self._submit_lock = threading.Lock()
+        self._futures: Dict[str, Future] = {}
+        # 任务归属的进程，多个 worker 进程共用同一个任务表时用来判断任务是否已无人执行
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+
+    def job_dir(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, job_id)
+
+    def make_result_key(self, file_hash: str, target_language: str, file_format: str) -> str:
+        return f"{file_hash}:{target_language}:{file_format.lower()}:{self.model_name}"
+
+    def submit(self, upload_stream: BinaryIO, filename: str, target_language: str, file_format: str) -> Tuple[str, bool]:
+        """保存上传文件并排队翻译，立即返回 (任务 id, 是否复用了已有任务)。"""
+        file_hash, upload_path = self.uploads.save(upload_stream, os.path.splitext(filename)[1])
+        result_key = self.make_result_key(file_hash, target_language, file_format)
+        with self._submit_lock:
+            job, reused = self._find_or_create_job(upload_path, filename, target_language, file_format, result_key)
+            if reused:
+                LOG.info(f"Reusing job {job['id']} for {filename} ({job['status']})")
+                return job["id"], True
+
+            job_id = job["id"]
+            self._schedule(job_id)
+        LOG.info(f"Job {job_id} queued: {filename} -> {target_language}")
+        return job_id, False
+
+    def submit_languages(self, upload_stream: BinaryIO, filename: str, target_languages: List[str], file_format: str) -> List[Tuple[str, str, bool]]:
+        """把同一个文件翻译为多种语言，每种语言一个任务，返回 [(目标语言, 任务 id, 是否复用了已有任务)]。
+
+        新建的任务作为一组执行：PDF 只解析一次，各语言的请求共用同一个线程池（见 PDFTranslator.translate_pdf_languages）。
+        """
+        file_hash, upload_path = self.uploads.save(upload_stream, os.path.splitext(filename)[1])
+        submitted, new_job_ids = [], []
+        with self._submit_lock:
+            for target_language in dict.fromkeys(target_languages):
+                result_key = self.make_result_key(file_hash, target_language, file_format)
+                job, reused = self._find_or_create_job(upload_path, filename, target_language, file_format, result_key)
+                if reused:
+                    LOG.info(f"Reusing job {job['id']} for {filename} -> {target_language} ({job['status']})")
+                    submitted.append((target_language, job["id"], True))
+                    continue
+                job_id = job["id"]
+                submitted.append((target_language, job_id, False))
+                new_job_ids.append(job_id)
+            if len(new_job_ids) == 1:
+                self._schedule(new_job_ids[0])
+            elif new_job_ids:
+                self._schedule_group(new_job_ids)
+        if new_job_ids:
+            LOG.info(f"Jobs {', '.join(new_job_ids)} queued: {filename} -> {', '.join(language for language, _, reused in submitted if not reused)}")
+        return submitted
+
+    def _find_or_create_job(self, upload_path: str, filename: str, target_language: str, file_format: str, result_key: str) -> Tuple[dict, bool]:
+        """返回 (任务记录, 是否复用了已有任务)；新建的任务在返回前准备好自己的目录，由调用方调度。"""
+        job, reused = self.store.find_or_create(result_key, self._is_reusable, filename, "", target_language, file_format, owner=self.owner)
+        if reused:
+            return job, True
+        # 每个任务在自己的目录中引用上传文件，检查点和输出文件互不干扰
+        job_dir = self.job_dir(job["id"])
+        os.makedirs(job_dir)
+        pdf_file_path = os.path.join(job_dir, filename)
+        _link_or_copy(upload_path, pdf_file_path)
+        self.store.update(job["id"], pdf_file_path=pdf_file_path)
+        return job, False
+
+    def wait(self, job_id: str, timeout: Optional[float] = None, poll_interval: float = 0.5) -> Optional[dict]:
+        """等待任务结束（或超时），返回任务记录。"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout)
+            return self.store.get(job_id)
+        # 任务不在本进程中执行（例如由其他 worker 进程调度），轮询任务表
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.store.get(job_id)
+            if job is None or job["status"] in (SUCCEEDED, FAILED):
+                return job
+            if deadline is not None and time.monotonic() >= deadline:
+                return job
+            time.sleep(poll_interval)
+
+    def resume_unfinished(self):
+        """重新调度所属进程已退出的未完成任务，已完成的内容块从检查点恢复。"""
+        for job in self.store.list_unfinished():
+            if job["id"] in self._futures or _owner_alive(job["owner"]):
+                continue
+            if self.store.claim(job["id"], job["owner"], self.owner):
+                LOG.info(f"Rescheduling unfinished job {job['id']}")
+                self._schedule(job["id"], True)
+
+    @staticmethod
+    def _is_reusable(job: dict) -> bool:
+        if job["status"] in (QUEUED, RUNNING):
+            return True
+        return job["status"] == SUCCEEDED and bool(job["output_file_path"]) and os.path.exists(job["output_file_path"])
+
+    def _schedule(self, job_id: str, resume: bool = False):
+        future = self.executor.submit(self._run, job_id, resume)
+        self._futures[job_id] = future
+        future.add_done_callback(lambda _: self._futures.pop(job_id, None))
+
+    def _schedule_group(self, job_ids: List[str]):
+        future = self.executor.submit(self._run_group, job_ids)
+        for job_id in job_ids:
+            self._futures[job_id] = future
+            future.add_done_callback(lambda _, job_id=job_id: self._futures.pop(job_id, None))
+
+    def _run_group(self, job_ids: List[str]):
+        """执行同一文件、同一格式、不同目标语言的一组任务。PDF 从第一个任务的目录解析，各任务的输出仍写在自己的目录中。"""
+        # 翻译相关模块较重，只在执行任务时导入
+        from translator import MultiLanguageTranslationError
+        jobs = {job["target_language"]: job for job in map(self.store.get, job_ids)}
+        for job_id in job_ids:
+            self.store.update(job_id, status=RUNNING)
+
+        def report_progress(target_language, done, total):
+            self.store.update(jobs[target_language]["id"], progress_done=done, progress_total=total)
+
+        first_job = self.store.get(job_ids[0])
+        extension = '.pdf' if first_job["file_format"].lower() == 'pdf' else '.md'
+        output_file_paths = {
+            target_language: os.path.join(self.job_dir(job["id"]), f"{os.path.splitext(job['filename'])[0]}_translated{extension}")
+            for target_language, job in jobs.items()
+        }
+        errors = {}
+        try:
+            translator = self.translator_factory()
+            outputs = translator.translate_pdf_languages(
+                pdf_file_path=first_job["pdf_file_path"],
+                target_languages=list(jobs),
+                file_format=first_job["file_format"],
+                output_file_paths=output_file_paths,
+                language_progress_callback=report_progress,
+            )
+        except MultiLanguageTranslationError as e:
+            outputs, errors = e.outputs, e.errors
+        except Exception as e:
+            LOG.error(f"Jobs {', '.join(job_ids)} failed: {traceback.format_exc()}")
+            outputs, errors = {}, {target_language: e for target_language in jobs}
+
+        for target_language, job in jobs.items():
+            if target_language in outputs:
+                self.store.update(job["id"], status=SUCCEEDED, output_file_path=outputs[target_language])
+                LOG.info(f"Job {job['id']} finished: {outputs[target_language]}")
+            else:
+                error = errors.get(target_language)
+                LOG.error(f"Job {job['id']} failed: {error}")
+                self.store.update(job["id"], status=FAILED, error=str(error))
+
+    def _run(self, job_id: str, resume: bool = False):
+        job = self.store.get(job_id)
+        self.store.update(job_id, status=RUNNING)
+
+        def report_progress(done, total):
+            self.store.update(job_id, progress_done=done, progress_total=total)
+
+        try:
+            translator = self.translator_factory(progress_callback=report_progress)
+            output_file_path = translator.translate_pdf(
+                pdf_file_path=job["pdf_file_path"],
+                target_language=job["target_language"],
+                file_format=job["file_format"],
+                resume=resume,
+            )
+            self.store.update(job_id, status=SUCCEEDED, output_file_path=output_file_path)
+            LOG.info(f"Job {job_id} finished: {output_file_path}")
+        except Exception as e:
+            LOG.error(f"Job {job_id} failed: {traceback.format_exc()}")
+            self.store.update(job_id, status=FAILED, error=str(e))
+
+    def shutdown(self, wait: bool = True, cancel_queued: bool = False):
+        """停止任务线程池。cancel_queued 为 True 时取消尚未开始的任务，它们保持 queued 状态，由之后启动的进程重新调度。"""
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_queued)
+
+
+def _owner_alive(owner: Optional[str]) -> bool:
+    """判断任务所属的进程是否仍在运行；无法判断（例如其他主机上的进程）时视为仍在运行。"""
+    if not owner:
+        return False
+    hostname, _, pid = owner.rpartition(":")
+    if hostname != socket.gethostname() or not pid.isdigit():
+        return True
+    if int(pid) == os.getpid():
+        # 本进程调度的任务已在 _futures 中，剩下的是此前使用相同 pid 的进程（例如容器重启）遗留的任务
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _link_or_copy(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
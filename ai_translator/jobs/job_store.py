@@ -0,0 +1,130 @@
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_COLUMNS = (
+    "id", "status", "filename", "pdf_file_path", "target_language", "file_format",
+    "output_file_path", "error", "progress_done", "progress_total", "created_at", "updated_at", "result_key", "owner",
+)
+
+
+class JobStore:
+    """基于 SQLite 的翻译任务存储，进程重启后仍可查询任务状态和结果。"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.isdir(db_dir):
+            os.makedirs(db_dir)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, filename TEXT, pdf_file_path TEXT NOT NULL, "
+            "target_language TEXT NOT NULL, file_format TEXT NOT NULL, output_file_path TEXT, error TEXT, "
+            "progress_done INTEGER NOT NULL DEFAULT 0, progress_total INTEGER, "
+            "created_at REAL NOT NULL, updated_at REAL NOT NULL, result_key TEXT, owner TEXT)"
+        )
+        # 兼容旧版本创建的任务表
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column in ("result_key", "owner"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_result_key ON jobs (result_key)")
+        self._conn.commit()
+
+    def create(self, filename: str, pdf_file_path: str, target_language: str, file_format: str, job_id: Optional[str] = None,
+               result_key: Optional[str] = None, owner: Optional[str] = None) -> str:
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, filename, pdf_file_path, target_language, file_format, created_at, updated_at, result_key, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, filename, pdf_file_path, target_language, file_format, now, now, result_key, owner)
+            )
+            self._conn.commit()
+        return job_id
+
+    def find_or_create(self, result_key: str, reusable: Callable[[dict], bool], filename: str, pdf_file_path: str, target_language: str,
+                       file_format: str, owner: Optional[str] = None) -> Tuple[dict, bool]:
+        """在同一个写事务中查找相同 result_key 的可复用任务（由 reusable 判断，最新的优先），没有时创建新任务。
+
+        BEGIN IMMEDIATE 在查找前就取得数据库的写锁，多个 worker 进程共用同一个任务表时，
+        并发的相同提交也只会创建一个任务。返回 (任务记录, 是否复用了已有任务)。
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT * FROM jobs WHERE result_key = ? AND status != ? ORDER BY created_at DESC", (result_key, FAILED)
+                ).fetchall()
+                existing = next((dict(row) for row in rows if reusable(dict(row))), None)
+                if existing is None:
+                    job_id = uuid.uuid4().hex
+                    now = time.time()
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, status, filename, pdf_file_path, target_language, file_format, created_at, updated_at, result_key, owner) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (job_id, QUEUED, filename, pdf_file_path, target_language, file_format, now, now, result_key, owner)
+                    )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+            if existing is not None:
+                return existing, True
+            return dict(self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()), False
+
+    def update(self, job_id: str, **fields):
+        unknown = set(fields) - set(_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown job fields: {unknown}")
+        fields["updated_at"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            self._conn.commit()
+
+    def claim(self, job_id: str, previous_owner: Optional[str], owner: str) -> bool:
+        """把未完成的任务从 previous_owner 转给 owner 并重新排队；多个进程同时认领时只有一个成功。"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET owner = ?, status = ?, updated_at = ? WHERE id = ? AND owner IS ? AND status IN (?, ?)",
+                (owner, QUEUED, time.time(), job_id, previous_owner, QUEUED, RUNNING)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def find_by_result_key(self, result_key: str) -> List[dict]:
+        """返回相同输入（文件哈希、目标语言、格式、模型）的未失败任务，最新的在前。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE result_key = ? AND status != ? ORDER BY created_at DESC", (result_key, FAILED)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_unfinished(self) -> List[dict]:
+        """返回排队中或运行中的任务，用于进程重启后重新调度。"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [dict(row) for row in rows]
@@ -0,0 +1,40 @@
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Tuple
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class UploadStore:
+    """按内容哈希保存上传文件，相同内容只保存一份。
+
+    上传流边读取边计算 sha256 并写入临时文件，完成后原子地重命名为 <sha256><扩展名>，
+    并发保存同一文件也不会互相覆盖出不完整的内容。
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root)
+
+    def save(self, stream: BinaryIO, extension: str = "") -> Tuple[str, str]:
+        """保存上传流，返回 (sha256, 文件路径)。"""
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    f.write(chunk)
+            file_hash = digest.hexdigest()
+            path = os.path.join(self.root, file_hash + extension.lower())
+            if os.path.exists(path):
+                os.remove(temp_path)
+            else:
+                os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return file_hash, path
@@ -1,10 +1,7 @@
 # main.py
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from gui import GuiApp
-from flask import Flask
-from api import app as api_app
-
+# 各运行模式只导入自己需要的模块：tkinter 只在 --gui、flask 只在 --api、pdfplumber 等只在真正翻译时导入。
+# 导入耗时可用 benchmarks/import_time.py 测量
+import json
 import sys
 import os
 
@@ -12,8 +9,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from utils import ArgumentParser, ConfigLoader, LOG
-from model import GLMModel, OpenAIModel
-from translator import PDFTranslator
+from translator import load_translation_cache
 
 # 定义支持的语言列表
 supported_languages = {
@@ -37,24 +33,42 @@ if __name__ == "__main__":
     config_loader = ConfigLoader(args.config)
     config = config_loader.load_config()
 
-    model_name = args.openai_model if args.openai_model else config['OpenAIModel']['model']
-    api_key = args.openai_api_key if args.openai_api_key else config['OpenAIModel']['api_key']
-    model = OpenAIModel(model=model_name, api_key=api_key)
+    # 模型后端按 --model_type 或配置文件中的 model_type 从注册表中选择，见 model/registry.py
+    from model import create_model, resolve_model_type
+    model_type = resolve_model_type(config, args)
+    model = create_model(model_type, config, args)
+    cache = load_translation_cache(args, config)
 
     # 根据命令行参数或配置文件来选择启动 GUI 或命令行版本或 API 服务
     if args.gui:
         # 启动 GUI
-        app = GuiApp(model, config)
+        from gui import GuiApp
+        from translator import load_parse_cache, load_translation_memory
+        app = GuiApp(model, config, cache=cache, parse_cache=load_parse_cache(args, config), memory=load_translation_memory(args, config))
         app.mainloop()
     elif args.api:
-        # 启动 Flask API 服务
-        api_app.run(debug=True)       
+        # 启动 Flask API 服务（单进程开发服务器）；生产环境使用 gunicorn 加载 wsgi:app，见 README
+        from api import create_app
+        api_app = create_app(config, model=model, cache=cache)
+        api_config = config.get('api') or {}
+        api_app.run(host=api_config.get('host', '127.0.0.1'), port=api_config.get('port', 5000), threaded=True)
     else:
-        # 让用户选择目标语言
-        print("请选择目标语言的代码：")
-        for code, language in supported_languages.items():
-            print(f"{code}: {language}")
-        selected_language_code = input("输入语言代码：").strip().lower()
+        # 让用户选择目标语言；指定 --target_language 时跳过交互，便于批量和定时任务
+        if args.target_languages:
+            # 多语言模式：解析一次，同时翻译为多种语言
+            unsupported = [code for code in args.target_languages if code.strip().lower() not in supported_languages]
+            if unsupported:
+                print(f"错误：输入的语言代码不受支持：{', '.join(unsupported)}")
+                sys.exit(1)
+            target_language_codes = {supported_languages[code.strip().lower()]: code.strip().lower() for code in args.target_languages}
+            selected_language_code = next(iter(target_language_codes.values()))
+        elif args.target_language:
+            selected_language_code = args.target_language.strip().lower()
+        else:
+            print("请选择目标语言的代码：")
+            for code, language in supported_languages.items():
+                print(f"{code}: {language}")
+            selected_language_code = input("输入语言代码：").strip().lower()
 
         # 检查用户输入是否在支持的语言列表中
         if selected_language_code in supported_languages:
@@ -66,5 +80,52 @@ if __name__ == "__main__":
         # 命令行版本的逻辑
         pdf_file_path = args.book if args.book else config['common']['book']
         file_format = args.file_format if args.file_format else config['common']['file_format']
-        translator = PDFTranslator(model)
-        translator.translate_pdf(pdf_file_path, target_language,file_format) #传入目标语言
+        max_workers = args.max_workers if args.max_workers else config['common'].get('max_workers', 1)
+        token_budget = args.token_budget if args.token_budget else config['common'].get('token_budget')
+        parse_workers = args.parse_workers if args.parse_workers else config['common'].get('parse_workers', 1)
+        image_resolution = config['common'].get('image_resolution')
+        detect_headers_footers = args.detect_headers_footers or config['common'].get('detect_headers_footers', False)
+        try:
+            from translator import PDFTranslator, load_parse_cache, load_translation_memory
+            parse_cache = load_parse_cache(args, config)
+            memory = load_translation_memory(args, config)
+            if args.batch:
+                # 批量模式：多个文件共用一个请求线程池和同一个限流器
+                from translator import BatchTranslator, collect_pdf_files
+                batch_config = config.get('batch') or {}
+                output_dir = args.output_dir or batch_config.get('output_dir')
+                report_path = args.report or os.path.join(output_dir or '.', 'batch_report.json')
+                batch_translator = BatchTranslator(model, max_workers=max_workers, max_files=args.batch_files or batch_config.get('max_files', 2), cache=cache, token_budget=token_budget, parse_workers=parse_workers, image_resolution=image_resolution, parse_cache=parse_cache, memory=memory, incremental=args.incremental, detect_headers_footers=detect_headers_footers)
+                report = batch_translator.translate_files(collect_pdf_files(args.batch), target_language, file_format, output_dir=output_dir, force=args.force, report_path=report_path)
+                # 有文件失败时以非零状态退出，便于定时任务发现
+                sys.exit(1 if report['summary']['failed'] else 0)
+            elif args.target_languages:
+                from translator import MultiLanguageTranslationError
+                translator = PDFTranslator(model, max_workers=max_workers, cache=cache, token_budget=token_budget, parse_workers=parse_workers, image_resolution=image_resolution, parse_cache=parse_cache, memory=memory, incremental=args.incremental, detect_headers_footers=detect_headers_footers)
+                output_file_paths = {language: PDFTranslator.default_output_path(pdf_file_path, file_format, code) for language, code in target_language_codes.items()}
+                try:
+                    outputs = translator.translate_pdf_languages(pdf_file_path, list(target_language_codes), file_format, output_file_paths, resume=args.resume)
+                except MultiLanguageTranslationError as e:
+                    for language, output_file_path in e.outputs.items():
+                        LOG.info(f"{language}: {output_file_path}")
+                    LOG.error(str(e))
+                    sys.exit(1)
+                for language, output_file_path in outputs.items():
+                    LOG.info(f"{language}: {output_file_path}")
+            elif args.use_async:
+                # 异步模式：单个事件循环维持全部在途请求
+                import asyncio
+                translator = PDFTranslator(create_model(model_type, config, args, use_async=True), max_workers=max_workers, cache=cache, token_budget=token_budget, parse_workers=parse_workers, image_resolution=image_resolution, parse_cache=parse_cache, memory=memory, incremental=args.incremental, detect_headers_footers=detect_headers_footers)
+                asyncio.run(translator.translate_pdf_async(pdf_file_path, target_language, file_format, resume=args.resume, previous_record=args.previous_record))
+            elif args.streaming:
+                # 流式模式：边解析边翻译边写入
+                translator = PDFTranslator(model, max_workers=max_workers, cache=cache, token_budget=token_budget, parse_workers=parse_workers, image_resolution=image_resolution, parse_cache=parse_cache, memory=memory)
+                translator.translate_pdf_streaming(pdf_file_path, target_language, file_format)
+            else:
+                translator = PDFTranslator(model, max_workers=max_workers, cache=cache, token_budget=token_budget, parse_workers=parse_workers, image_resolution=image_resolution, parse_cache=parse_cache, memory=memory, incremental=args.incremental, detect_headers_footers=detect_headers_footers)
+                translator.translate_pdf(pdf_file_path, target_language,file_format, resume=args.resume, previous_record=args.previous_record) #传入目标语言
+        finally:
+            # 运行结束（包括失败和批量模式退出）时输出指标摘要
+            from utils.metrics import METRICS
+            summary = METRICS.write_summary(args.metrics)
+            LOG.info(f"Metrics summary: {json.dumps(summary, ensure_ascii=False)}")
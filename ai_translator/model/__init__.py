@@ -1,3 +1,23 @@
 from .model import Model
-from .glm_model import GLMModel
-from .openai_model import OpenAIModel
\ No newline at end of file
+from .async_model import AsyncModel
+from .registry import available_models, create_model, register_model, resolve_model_type
+
+# 具体模型按需导入：只有用到 OpenAI 模型时才加载 openai SDK，用到 GLM 模型时才加载 requests/httpx
+_LAZY_MODELS = {
+    'GLMModel': '.glm_model',
+    'OpenAIModel': '.openai_model',
+    'AsyncGLMModel': '.async_glm_model',
+    'AsyncOpenAIModel': '.async_openai_model',
+    'MockModel': '.mock_model',
+}
+
+__all__ = ['Model', 'AsyncModel', 'available_models', 'create_model', 'register_model', 'resolve_model_type', *_LAZY_MODELS]
+
+
+def __getattr__(name):
+    if name not in _LAZY_MODELS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_LAZY_MODELS[name], __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+
+from model.async_model import AsyncModel
+from model.openai_model import RETRYABLE_STATUS_CODES
+from model.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+from utils import LOG
+from utils.metrics import RETRIES
+
+class AsyncGLMModel(AsyncModel):
+    def __init__(self, model_url: str, timeout: int, requests_per_minute: int = None, max_retries: int = 5):
+        self.model_url = model_url
+        self.timeout = timeout
+        # httpx.AsyncClient 绑定在事件循环上，延迟到第一次请求时创建，并在多个请求间复用连接
+        self.client = None
+        # 与同步的 GLMModel 共享同一个进程级限流器
+        self.rate_limiter = RateLimiter.shared(f"glm:{model_url}", requests_per_minute)
+        self.retry_policy = RetryPolicy(max_attempts=max_retries)
+
+    def get_model_name(self) -> str:
+        return f"GLMModel:{self.model_url}"
+
+    def _get_client(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(timeout=self.timeout)
+        return self.client
+
+    async def make_request(self, prompt):
+        payload = {
+            "prompt": prompt,
+            "history": []
+        }
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async()
+            try:
+                response = await self._get_client().post(self.model_url, json=payload)
+            except httpx.TransportError as e:
+                delay = self.retry_policy.get_delay(attempt)
+                if delay is None:
+                    LOG.error(f"The server could not be reached: {e!r}")
+                    return "", False
+                LOG.warning(f"The server could not be reached: {e!r}. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='connection')
+            except httpx.HTTPError as e:
+                raise Exception(f"请求异常：{e}")
+            else:
+                if response.is_success:
+                    try:
+                        return response.json()["response"], True
+                    except ValueError:
+                        raise Exception("Error: response is not valid JSON format.")
+                    except KeyError:
+                        raise Exception("发生了未知错误：响应中缺少 response 字段")
+                if response.status_code == 429:
+                    delay = self.retry_policy.get_delay(attempt, parse_retry_after(response.headers))
+                    if delay is None:
+                        raise Exception("Rate limit reached. Maximum attempts exceeded.")
+                    # 配额耗尽时所有共享限流器的 worker 一起暂停
+                    self.rate_limiter.pause(delay)
+                    LOG.warning(f"Rate limit reached. Retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts}).")
+                    RETRIES.inc(model=self.get_model_name(), reason='rate_limit')
+                else:
+                    delay = None
+                    if response.status_code in RETRYABLE_STATUS_CODES:
+                        delay = self.retry_policy.get_delay(attempt, parse_retry_after(response.headers))
+                    if delay is None:
+                        LOG.error(f"Another non-200-range status code was received: {response.status_code} {response.text}")
+                        return "", False
+                    LOG.warning(f"Status code {response.status_code} received. Retrying in {delay:.1f} seconds.")
+                    RETRIES.inc(model=self.get_model_name(), reason='status')
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
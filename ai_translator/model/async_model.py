@@ -0,0 +1,11 @@
+from model import Model
+
+class AsyncModel(Model):
+    """异步模型接口：make_request 为协程，prompt 的构造方式与 Model 相同。"""
+
+    async def make_request(self, prompt):
+        raise NotImplementedError("子类必须实现 make_request 协程")
+
+    async def aclose(self):
+        """释放底层的异步 HTTP 客户端，子类按需重写。"""
+        pass
@@ -0,0 +1,97 @@
+import asyncio
+import os
+
+from model.async_model import AsyncModel
+from model.openai_model import RETRYABLE_STATUS_CODES
+from model.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+from utils import LOG, estimate_tokens
+from utils.metrics import RETRIES, TOKENS
+
+class AsyncOpenAIModel(AsyncModel):
+    def __init__(self, model: str, api_key: str, max_tokens: int = 2048,
+                 requests_per_minute: int = None, tokens_per_minute: int = None, max_retries: int = 5):
+        self.model = model
+        self.api_key = api_key
+        # completions 接口的输出上限，过小会截断批量请求或长页面的译文
+        self.max_tokens = max_tokens
+        # AsyncOpenAI 的连接池绑定在创建它的事件循环上，因此延迟到第一次请求时创建
+        self.client = None
+        # 与同步的 OpenAIModel 共享同一个进程级限流器
+        self.rate_limiter = RateLimiter.shared(model, requests_per_minute, tokens_per_minute)
+        self.retry_policy = RetryPolicy(max_attempts=max_retries)
+
+    def _get_client(self):
+        if self.client is None:
+            # 与 OpenAIModel 一样，openai SDK 在第一次请求时才导入
+            from openai import AsyncOpenAI
+            # 重试由 retry_policy 统一调度，关闭 SDK 内置的重试
+            self.client = AsyncOpenAI(api_key=self.api_key or os.getenv("OPENAI_API_KEY"), max_retries=0)
+        return self.client
+
+    async def make_request(self, prompt):
+        import openai
+        # 预估本次请求消耗的 token（输入 + 大致等长的输出），完成后按 usage 修正
+        estimated_tokens = estimate_tokens(prompt) * 2
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire_async(estimated_tokens)
+            try:
+                translation, usage = await self._create(prompt)
+                if usage is not None:
+                    self.rate_limiter.adjust(usage.total_tokens - estimated_tokens)
+                    TOKENS.inc(usage.prompt_tokens, model=self.get_model_name(), direction='prompt')
+                    TOKENS.inc(usage.completion_tokens, model=self.get_model_name(), direction='completion')
+                return translation, True
+            except openai.RateLimitError as e:
+                delay = self.retry_policy.get_delay(attempt, parse_retry_after(e.response.headers))
+                if delay is None:
+                    raise Exception("Rate limit reached. Maximum attempts exceeded.")
+                # 配额耗尽时所有共享限流器的 worker 一起暂停
+                self.rate_limiter.pause(delay)
+                LOG.warning(f"Rate limit reached. Retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts}).")
+                RETRIES.inc(model=self.get_model_name(), reason='rate_limit')
+            except openai.APIConnectionError as e:
+                delay = self.retry_policy.get_delay(attempt)
+                if delay is None:
+                    LOG.error(f"The server could not be reached: {e.__cause__}")
+                    return "", False
+                LOG.warning(f"The server could not be reached: {e.__cause__}. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='connection')
+            except openai.APIStatusError as e:
+                delay = None
+                if e.status_code in RETRYABLE_STATUS_CODES:
+                    delay = self.retry_policy.get_delay(attempt, parse_retry_after(e.response.headers))
+                if delay is None:
+                    LOG.error(f"Another non-200-range status code was received: {e.status_code} {e.response}")
+                    return "", False
+                LOG.warning(f"Status code {e.status_code} received. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='status')
+            except Exception as e:
+                raise Exception(f"发生了未知错误：{e}")
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _create(self, prompt):
+        client = self._get_client()
+        if self.model == "gpt-3.5-turbo":
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            translation = response.choices[0].message.content.strip()
+        else:
+            response = await client.completions.create(
+                model=self.model,
+                prompt=prompt,
+                max_tokens=self.max_tokens,
+                temperature=0
+            )
+            translation = response.choices[0].text.strip()
+        return translation, response.usage
+
+    async def aclose(self):
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
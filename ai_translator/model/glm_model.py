@@ -1,30 +1,68 @@
+import time
+
 import requests
 import simplejson
 
 from model import Model
+from model.openai_model import RETRYABLE_STATUS_CODES
+from model.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+from utils import LOG
+from utils.metrics import RETRIES
 
 class GLMModel(Model):
-    def __init__(self, model_url: str, timeout: int):
+    def __init__(self, model_url: str, timeout: int, requests_per_minute: int = None, max_retries: int = 5):
         self.model_url = model_url
         self.timeout = timeout
+        # 同一进程内访问同一地址的所有 worker 共享限流器，429 时一起暂停
+        self.rate_limiter = RateLimiter.shared(f"glm:{model_url}", requests_per_minute)
+        self.retry_policy = RetryPolicy(max_attempts=max_retries)
+
+    def get_model_name(self) -> str:
+        return f"GLMModel:{self.model_url}"
 
     def make_request(self, prompt):
-        try:
-            payload = {
-                "prompt": prompt,
-                "history": []
-            }
-            response = requests.post(self.model_url, json=payload, timeout=self.timeout)
-            response.raise_for_status()
-            response_dict = response.json()
-            translation = response_dict["response"]
-            return translation, True
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"请求异常：{e}")
-        except requests.exceptions.Timeout as e:
-            raise Exception(f"请求超时：{e}")
-        except simplejson.errors.JSONDecodeError as e:
-            raise Exception("Error: response is not valid JSON format.")
-        except Exception as e:
-            raise Exception(f"发生了未知错误：{e}")
-        return "", False
+        payload = {
+            "prompt": prompt,
+            "history": []
+        }
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire()
+            try:
+                response = requests.post(self.model_url, json=payload, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                delay = self.retry_policy.get_delay(attempt)
+                if delay is None:
+                    LOG.error(f"The server could not be reached: {e}")
+                    return "", False
+                LOG.warning(f"The server could not be reached: {e}. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='connection')
+            except requests.exceptions.RequestException as e:
+                raise Exception(f"请求异常：{e}")
+            else:
+                if response.ok:
+                    try:
+                        return response.json()["response"], True
+                    except (ValueError, simplejson.errors.JSONDecodeError):
+                        raise Exception("Error: response is not valid JSON format.")
+                    except KeyError:
+                        raise Exception("发生了未知错误：响应中缺少 response 字段")
+                if response.status_code == 429:
+                    delay = self.retry_policy.get_delay(attempt, parse_retry_after(response.headers))
+                    if delay is None:
+                        raise Exception("Rate limit reached. Maximum attempts exceeded.")
+                    # 配额耗尽时所有共享限流器的 worker 一起暂停
+                    self.rate_limiter.pause(delay)
+                    LOG.warning(f"Rate limit reached. Retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts}).")
+                    RETRIES.inc(model=self.get_model_name(), reason='rate_limit')
+                else:
+                    delay = None
+                    if response.status_code in RETRYABLE_STATUS_CODES:
+                        delay = self.retry_policy.get_delay(attempt, parse_retry_after(response.headers))
+                    if delay is None:
+                        LOG.error(f"Another non-200-range status code was received: {response.status_code} {response.text}")
+                        return "", False
+                    LOG.warning(f"Status code {response.status_code} received. Retrying in {delay:.1f} seconds.")
+                    RETRIES.inc(model=self.get_model_name(), reason='status')
+            attempt += 1
+            time.sleep(delay)
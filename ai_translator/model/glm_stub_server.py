@@ -0,0 +1,95 @@
+"""ChatGLM 接口的本地替身，用于在没有 GPU 和网络的环境中测试 GLMModel / AsyncGLMModel。
+
+接口与 ChatGLM 的 api.py 相同：POST JSON {"prompt": ..., "history": [...]}，返回 {"response": ..., "history": [...], "status": 200}。
+请求由 MockModel.simulate 处理，延迟、错误率和限流的含义与 MockModel 相同，限流时返回 429 和 Retry-After。
+在 ai_translator 目录下运行：
+
+    python -m model.glm_stub_server --port 8000 --latency 0.5 --error_rate 0.01
+    python main.py --model_type GLMModel --glm_model_url http://127.0.0.1:8000 --book ../tests/test.pdf
+"""
+import argparse
+import json
+import math
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from model.mock_model import OK, RATE_LIMITED, MockModel
+from utils import ConfigLoader, LOG
+
+
+class GLMStubHandler(BaseHTTPRequestHandler):
+    # 由 make_server 设置
+    mock_model: MockModel = None
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            prompt = payload["prompt"]
+        except (ValueError, KeyError):
+            self._send_json(400, {"error": "Expected a JSON body with a \"prompt\" field."})
+            return
+
+        status, result = self.mock_model.simulate(prompt)
+        if status == OK:
+            history = list(payload.get("history") or []) + [[prompt, result]]
+            self._send_json(200, {"response": result, "history": history, "status": 200, "time": time.strftime("%Y-%m-%d %H:%M:%S")})
+        elif status == RATE_LIMITED:
+            self._send_json(429, {"error": "Rate limit reached."}, {"Retry-After": str(math.ceil(result))})
+        else:
+            self._send_json(status, {"error": "Simulated server error."})
+
+    def _send_json(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        LOG.debug(f"{self.address_string()} {format % args}")
+
+
+def make_server(host: str, port: int, mock_model: MockModel) -> ThreadingHTTPServer:
+    """创建（但不启动）替身服务，每个连接一个线程，可以测试真实的并发度。port 为 0 时随机分配端口。"""
+    handler = type("BoundGLMStubHandler", (GLMStubHandler,), {"mock_model": mock_model})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the ChatGLM HTTP endpoint.')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--config', type=str, help='Read defaults from the MockModel section of this configuration file.')
+    parser.add_argument('--latency', type=float, help='Mean seconds per request.')
+    parser.add_argument('--latency_jitter', type=float, help='Latency varies uniformly by up to this many seconds.')
+    parser.add_argument('--error_rate', type=float, help='Probability of answering with HTTP 503.')
+    parser.add_argument('--rate_limit_rpm', type=int, help='Answer with HTTP 429 above this many requests per minute.')
+    parser.add_argument('--seed', type=int, help='Seed of the simulated latency and errors.')
+    args = parser.parse_args()
+
+    options = {}
+    if args.config:
+        options.update(ConfigLoader(args.config).load_config().get('MockModel') or {})
+    for key in ('latency', 'latency_jitter', 'error_rate', 'rate_limit_rpm', 'seed'):
+        if getattr(args, key) is not None:
+            options[key] = getattr(args, key)
+    mock_options = {key: options[key] for key in ('latency', 'latency_jitter', 'error_rate', 'rate_limit_rpm', 'seed', 'prefix') if options.get(key) is not None}
+
+    server = make_server(args.host, args.port, MockModel(model="glm-stub", **mock_options))
+    LOG.info(f"GLM stub server listening on http://{args.host}:{server.server_port} with {mock_options}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
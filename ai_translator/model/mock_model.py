@@ -0,0 +1,121 @@
+import collections
+import hashlib
+import random
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
+from model import Model
+from model.model import SEGMENT_MARKER_PATTERN
+from model.rate_limiter import RateLimiter, RetryPolicy
+from utils import LOG, estimate_tokens
+from utils.metrics import RETRIES, TOKENS
+
+# simulate 返回的状态码，与真实服务的含义一致
+OK = 200
+RATE_LIMITED = 429
+SERVER_ERROR = 503
+
+
+class MockModel(Model):
+    """本地模拟模型，不访问网络、不消耗 token，用于离线压测整个 解析→翻译→写入 流程。
+
+    译文为原文的回显（批量请求保留分段标记，表格转换为 | 分隔的格式），可加上 prefix。
+    每次请求按 latency ± latency_jitter 秒休眠，以 error_rate 的概率返回 503，
+    超过 rate_limit_rpm（模拟服务端的每分钟请求上限）时返回 429 和 Retry-After。
+    客户端的限流和重试与 OpenAIModel 相同（requests_per_minute、tokens_per_minute、max_retries）。
+
+    结果是确定的：延迟和错误只取决于 seed、prompt 以及该 prompt 是第几次请求，与并发调度的顺序无关。
+    """
+
+    def __init__(self, model: str = "mock", latency: float = 0.5, latency_jitter: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rpm: Optional[int] = None, seed: int = 0, prefix: str = "",
+                 requests_per_minute: int = None, tokens_per_minute: int = None, max_retries: int = 5, retry_delay: float = 1.0):
+        self.model = model
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.rate_limit_rpm = rate_limit_rpm
+        self.seed = seed
+        self.prefix = prefix
+        self.rate_limiter = RateLimiter.shared(f"mock:{model}", requests_per_minute, tokens_per_minute)
+        self.retry_policy = RetryPolicy(max_attempts=max_retries, base_delay=retry_delay)
+        self._attempts = collections.Counter()
+        # 模拟服务端限流：最近 60 秒内收到的请求时间
+        self._recent_requests = collections.deque()
+        self._lock = threading.Lock()
+
+    def get_model_name(self) -> str:
+        return f"MockModel:{self.model}"
+
+    def make_request(self, prompt):
+        estimated_tokens = estimate_tokens(prompt) * 2
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(estimated_tokens)
+            status, result = self.simulate(prompt)
+            if status == OK:
+                # 模拟 OpenAI 的 usage 字段，token 数为估算值
+                TOKENS.inc(estimate_tokens(prompt), model=self.get_model_name(), direction='prompt')
+                TOKENS.inc(estimate_tokens(result), model=self.get_model_name(), direction='completion')
+                return result, True
+            if status == RATE_LIMITED:
+                delay = self.retry_policy.get_delay(attempt, result)
+                if delay is None:
+                    raise Exception("Rate limit reached. Maximum attempts exceeded.")
+                self.rate_limiter.pause(delay)
+                LOG.warning(f"Rate limit reached. Retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts}).")
+                RETRIES.inc(model=self.get_model_name(), reason='rate_limit')
+            else:
+                delay = self.retry_policy.get_delay(attempt)
+                if delay is None:
+                    LOG.error(f"Another non-200-range status code was received: {status}")
+                    return "", False
+                LOG.warning(f"Status code {status} received. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='status')
+            attempt += 1
+            time.sleep(delay)
+
+    def simulate(self, prompt: str) -> Tuple[int, object]:
+        """模拟服务端处理一次请求，返回 (OK, 译文)、(RATE_LIMITED, Retry-After 秒数) 或 (SERVER_ERROR, None)。"""
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        with self._lock:
+            attempt = self._attempts[digest]
+            self._attempts[digest] += 1
+        rng = random.Random(f"{self.seed}:{digest}:{attempt}")
+
+        time.sleep(max(0.0, self.latency + rng.uniform(-self.latency_jitter, self.latency_jitter)))
+        retry_after = self._throttle()
+        if retry_after is not None:
+            return RATE_LIMITED, retry_after
+        if rng.random() < self.error_rate:
+            return SERVER_ERROR, None
+        return OK, self.echo(prompt)
+
+    def _throttle(self) -> Optional[float]:
+        """超过 rate_limit_rpm 时返回需要等待的秒数。"""
+        if not self.rate_limit_rpm:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            while self._recent_requests and now - self._recent_requests[0] >= 60:
+                self._recent_requests.popleft()
+            if len(self._recent_requests) >= self.rate_limit_rpm:
+                return 60 - (now - self._recent_requests[0])
+            self._recent_requests.append(now)
+            return None
+
+    def echo(self, prompt: str) -> str:
+        """从 Model 构造的 prompt 中取出原文作为“译文”，文本前加上 prefix。"""
+        match = SEGMENT_MARKER_PATTERN.search(prompt)
+        if match:
+            # 批量请求：原样返回全部分段，split_batch_response 可以按标记拆分
+            return re.sub(f"({SEGMENT_MARKER_PATTERN.pattern}\n)", lambda marker: marker.group(1) + self.prefix, prompt[match.start():])
+        if "表格" in prompt and "\n" in prompt:
+            # 转换为 TableContent.set_translation 能解析的 | 分隔格式。PDFParser 提取的表格每行是一个列表，
+            # get_original_as_str 输出为一行 "[a, b] [c, d]"；其他表格按行、按空格分隔各列
+            table = prompt.split("\n", 1)[1].strip()
+            rows = [row.split(", ") for row in re.findall(r"\[([^\]]*)\]", table)] or [row.split() for row in table.split("\n")]
+            return "\n".join("| " + " | ".join(row) + " |" for row in rows)
+        return self.prefix + prompt.split("呈现:", 1)[-1]
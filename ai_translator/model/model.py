@@ -1,5 +1,11 @@
+import re
+from typing import List, Optional, Tuple
 from book import ContentType
 
+# 批量请求中每段文本前的分段标记
+SEGMENT_MARKER = "<<<SEGMENT {}>>>"
+SEGMENT_MARKER_PATTERN = re.compile(r"<<<SEGMENT (\d+)>>>")
+
 class Model:
     def make_text_prompt(self, text: str, target_language: str) -> str:
         return f"你是一个语言翻译专家，擅长多国语言翻译，你的目标是仔细阅读输入文字，然后把输入的文字全部翻译为{target_language}，记住是全部翻译为{target_language}，并保持文本结构不变。将翻译结果按原文本格式呈现:{text}"
@@ -7,12 +13,36 @@ class Model:
     def make_table_prompt(self, table: str, target_language: str) -> str:
         return f"你是一个语言翻译专家，支持多国语言翻译，你的目标是仔细阅读表格内容，然后把表格内容全部翻译为{target_language}，记住是全部翻译为{target_language}，并保持表格结构不变。将翻译结果按原表格格式呈现:\n{table}"
 
+    def make_batch_prompt(self, texts: List[str], target_language: str) -> str:
+        segments = "\n".join(f"{SEGMENT_MARKER.format(idx)}\n{text}" for idx, text in enumerate(texts, start=1))
+        return f"你是一个语言翻译专家，擅长多国语言翻译，下面有{len(texts)}段文本，每段以 <<<SEGMENT 序号>>> 标记开头。请把每段文字全部翻译为{target_language}，记住是全部翻译为{target_language}，并保持文本结构不变。译文中必须原样保留每个标记并放在对应译文之前，不要合并、拆分或省略任何一段，也不要添加任何说明:\n{segments}"
+
+    def make_reference_context(self, references: List[Tuple[str, str]], target_language: str) -> str:
+        """翻译记忆中相似分段的原文和译文，放在 prompt 之前供模型参考术语和措辞。"""
+        examples = "\n\n".join(f"原文：{source}\n译文：{translation}" for source, translation in references)
+        return f"以下是与待翻译内容相似的原文及其{target_language}译文，仅供参考术语和措辞，请以待翻译内容为准进行完整翻译:\n{examples}\n\n"
+
+    def split_batch_response(self, response: str, segment_count: int) -> Optional[List[str]]:
+        """按分段标记拆分批量请求的译文，标记缺失或数量不符时返回 None。"""
+        parts = SEGMENT_MARKER_PATTERN.split(response)
+        translations = {}
+        # parts 形如 [前缀, '1', 译文1, '2', 译文2, ...]
+        for idx in range(1, len(parts) - 1, 2):
+            translations[int(parts[idx])] = parts[idx + 1].strip()
+        if sorted(translations) != list(range(1, segment_count + 1)):
+            return None
+        return [translations[idx] for idx in range(1, segment_count + 1)]
+
     def translate_prompt(self, content, target_language: str) -> str:
         if content.content_type == ContentType.TEXT:
             return self.make_text_prompt(content.original, target_language)
         elif content.content_type == ContentType.TABLE:
             return self.make_table_prompt(content.get_original_as_str(), target_language)
 
+    def get_model_name(self) -> str:
+        """返回用于区分译文来源的模型名称，例如翻译缓存的键。"""
+        return getattr(self, 'model', None) or self.__class__.__name__
+
     def make_request(self, prompt):
         raise NotImplementedError("子类必须实现 make_request 方法")
 
@@ -1,53 +1,95 @@
-import requests
-import simplejson
+import threading
 import time
 import os
-import openai
 
 from model import Model
-from utils import LOG
-from openai import OpenAI
+from model.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+from utils import LOG, estimate_tokens
+from utils.metrics import RETRIES, TOKENS
+
+# 这些状态码通常是暂时性的，值得退避后重试
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
 
 class OpenAIModel(Model):
-   def __init__(self, model: str, api_key: str):
+    def __init__(self, model: str, api_key: str, max_tokens: int = 2048,
+                 requests_per_minute: int = None, tokens_per_minute: int = None, max_retries: int = 5):
         self.model = model
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-   def make_request(self, prompt):
-       attempts = 0
-       while attempts < 3:
-           try:
-               if self.model == "gpt-3.5-turbo":
-                   response = self.client.chat.completions.create(
-                       model=self.model,
-                       messages=[
-                           {"role": "user", "content": prompt}
-                       ]
-                   )
-                   translation = response.choices[0].message.content.strip()
-               else:
-                   response = self.client.completions.create(
-                       model=self.model,
-                       prompt=prompt,
-                       max_tokens=150,
-                       temperature=0
-                   )
-                   translation = response.choices[0].text.strip()
+        self.api_key = api_key
+        # completions 接口的输出上限，过小会截断批量请求或长页面的译文
+        self.max_tokens = max_tokens
+        # openai SDK 导入较慢（约 0.4 秒），客户端延迟到第一次真正发送请求时创建，全部命中缓存的运行不需要导入
+        self.client = None
+        self._client_lock = threading.Lock()
+        # 同一进程内使用同一模型的所有 worker 共享限流器
+        self.rate_limiter = RateLimiter.shared(model, requests_per_minute, tokens_per_minute)
+        self.retry_policy = RetryPolicy(max_attempts=max_retries)
+
+    def _get_client(self):
+        with self._client_lock:
+            if self.client is None:
+                from openai import OpenAI
+                # 重试由 retry_policy 统一调度，关闭 SDK 内置的重试
+                self.client = OpenAI(api_key=self.api_key or os.getenv("OPENAI_API_KEY"), max_retries=0)
+            return self.client
+
+    def make_request(self, prompt):
+        import openai
+        # 预估本次请求消耗的 token（输入 + 大致等长的输出），完成后按 usage 修正
+        estimated_tokens = estimate_tokens(prompt) * 2
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(estimated_tokens)
+            try:
+                translation, usage = self._create(prompt)
+                if usage is not None:
+                    self.rate_limiter.adjust(usage.total_tokens - estimated_tokens)
+                    TOKENS.inc(usage.prompt_tokens, model=self.get_model_name(), direction='prompt')
+                    TOKENS.inc(usage.completion_tokens, model=self.get_model_name(), direction='completion')
+                return translation, True
+            except openai.RateLimitError as e:
+                delay = self.retry_policy.get_delay(attempt, parse_retry_after(e.response.headers))
+                if delay is None:
+                    raise Exception("Rate limit reached. Maximum attempts exceeded.")
+                # 配额耗尽时所有共享限流器的 worker 一起暂停
+                self.rate_limiter.pause(delay)
+                LOG.warning(f"Rate limit reached. Retrying in {delay:.1f} seconds (attempt {attempt + 1}/{self.retry_policy.max_attempts}).")
+                RETRIES.inc(model=self.get_model_name(), reason='rate_limit')
+            except openai.APIConnectionError as e:
+                delay = self.retry_policy.get_delay(attempt)
+                if delay is None:
+                    LOG.error(f"The server could not be reached: {e.__cause__}")
+                    return "", False
+                LOG.warning(f"The server could not be reached: {e.__cause__}. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='connection')
+            except openai.APIStatusError as e:
+                delay = None
+                if e.status_code in RETRYABLE_STATUS_CODES:
+                    delay = self.retry_policy.get_delay(attempt, parse_retry_after(e.response.headers))
+                if delay is None:
+                    LOG.error(f"Another non-200-range status code was received: {e.status_code} {e.response}")
+                    return "", False
+                LOG.warning(f"Status code {e.status_code} received. Retrying in {delay:.1f} seconds.")
+                RETRIES.inc(model=self.get_model_name(), reason='status')
+            except Exception as e:
+                raise Exception(f"发生了未知错误：{e}")
+            attempt += 1
+            time.sleep(delay)
 
-               return translation, True
-           except openai.RateLimitError as e:
-               attempts += 1
-               if attempts < 3:
-                   LOG.warning("Rate limit reached. Waiting for 60 seconds before retrying.")
-                   time.sleep(60)
-               else:
-                   raise Exception("Rate limit reached. Maximum attempts exceeded.")
-           except openai.APIConnectionError as e:
-               print("The server could not be reached")
-               print(e.__cause__)  # an underlying Exception, likely raised within httpx.            except requests.exceptions.Timeout as e:
-           except openai.APIStatusError as e:
-               print("Another non-200-range status code was received")
-               print(e.status_code)
-               print(e.response)
-           except Exception as e:
-             raise Exception(f"发生了未知错误：{e}")
-       return "", False
+    def _create(self, prompt):
+        if self.model == "gpt-3.5-turbo":
+            response = self._get_client().chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "user", "content": prompt}
+                ]
+            )
+            translation = response.choices[0].message.content.strip()
+        else:
+            response = self._get_client().completions.create(
+                model=self.model,
+                prompt=prompt,
+                max_tokens=self.max_tokens,
+                temperature=0
+            )
+            translation = response.choices[0].text.strip()
+        return translation, response.usage
@@ -0,0 +1,133 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from utils import LOG
+from utils.metrics import RATE_LIMIT_WAIT_SECONDS
+
+
+class _TokenBucket:
+    """令牌桶：容量为每分钟的配额，按配额/60 的速率持续补充。"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated_at = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """预占 amount 个令牌（允许透支），返回需要等待的秒数。"""
+        self.available = min(self.capacity, self.available + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        self.available -= amount
+        return 0.0 if self.available >= 0 else -self.available / self.rate
+
+
+class RateLimiter:
+    """客户端限流器，同时限制每分钟请求数（RPM）和每分钟 token 数（TPM）。
+
+    同一进程内的所有并发 worker 共享同一个实例（见 RateLimiter.shared），
+    收到 429 时调用 pause 让所有 worker 一起暂停，而不是各自盲目重试。
+    """
+
+    _shared: Dict[Tuple, "RateLimiter"] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None, name: str = "default"):
+        # 用于区分指标中不同限流器的名称，共享限流器为其 key
+        self.name = name
+        self._requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self._tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls, key: str, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None) -> "RateLimiter":
+        """返回进程内按 key（如模型名称）共享的限流器。"""
+        with cls._shared_lock:
+            limiter_key = (key, requests_per_minute, tokens_per_minute)
+            if limiter_key not in cls._shared:
+                cls._shared[limiter_key] = cls(requests_per_minute, tokens_per_minute, name=key)
+            return cls._shared[limiter_key]
+
+    def reserve(self, tokens: int = 0) -> float:
+        """为一次请求预占配额，返回发送前需要等待的秒数。"""
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0.0, self._paused_until - now)
+            if self._requests is not None:
+                wait = max(wait, self._requests.reserve(1, now))
+            if self._tokens is not None and tokens:
+                wait = max(wait, self._tokens.reserve(tokens, now))
+            return wait
+
+    def acquire(self, tokens: int = 0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            LOG.debug(f"Rate limiter waiting {wait:.2f}s")
+            RATE_LIMIT_WAIT_SECONDS.inc(wait, limiter=self.name)
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int = 0):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            LOG.debug(f"Rate limiter waiting {wait:.2f}s")
+            RATE_LIMIT_WAIT_SECONDS.inc(wait, limiter=self.name)
+            await asyncio.sleep(wait)
+
+    def adjust(self, tokens: int):
+        """请求完成后按实际用量修正预占的 token 数，tokens 为实际值减去预估值。"""
+        if self._tokens is None or not tokens:
+            return
+        with self._lock:
+            self._tokens.available -= tokens
+
+    def pause(self, seconds: float):
+        """让所有共享该限流器的 worker 至少暂停 seconds 秒。"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class RetryPolicy:
+    """带抖动的指数退避，优先使用服务端返回的 Retry-After。"""
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def get_delay(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """返回第 attempt 次（从 0 开始）失败后的等待秒数，重试次数用尽时返回 None。"""
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        # full jitter：在 [0, base * 2^attempt] 内随机取值，避免并发 worker 同时重试
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """从响应头解析 retry-after-ms / retry-after（秒数或 HTTP 日期），无法解析时返回 None。"""
+    if headers is None:
+        return None
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        retry_date = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_date.timestamp() - time.time())
@@ -0,0 +1,74 @@
+from typing import Callable, Dict, List
+
+# 模型后端名称 -> 工厂函数 factory(options, args, use_async)：
+# options 为配置文件中与后端同名的配置段，args 为命令行参数（可以为 None），命令行参数优先
+MODEL_BACKENDS: Dict[str, Callable] = {}
+
+DEFAULT_MODEL_TYPE = 'OpenAIModel'
+
+
+def register_model(name: str):
+    """注册模型后端的装饰器，注册后即可通过 model_type（命令行、配置文件或环境变量）选择。"""
+    def decorator(factory: Callable) -> Callable:
+        MODEL_BACKENDS[name] = factory
+        return factory
+    return decorator
+
+
+def available_models() -> List[str]:
+    return sorted(MODEL_BACKENDS)
+
+
+def resolve_model_type(config: dict, args=None, section: str = None) -> str:
+    """按 --model_type、配置段中的 model_type（如 API 服务的 api.model_type）、顶层 model_type 的顺序确定模型后端。"""
+    return (getattr(args, 'model_type', None)
+            or ((config.get(section) or {}).get('model_type') if section else None)
+            or config.get('model_type')
+            or DEFAULT_MODEL_TYPE)
+
+
+def create_model(model_type: str, config: dict, args=None, use_async: bool = False):
+    """创建模型。use_async 为 True 时优先返回 AsyncModel 实现，没有异步实现的后端返回同步模型
+    （PDFTranslator.translate_pdf_async 会在线程中调用同步模型）。"""
+    if model_type not in MODEL_BACKENDS:
+        raise ValueError(f"Unknown model type: {model_type}. Available: {', '.join(available_models())}")
+    return MODEL_BACKENDS[model_type](config.get(model_type) or {}, args, use_async)
+
+
+def _pick(options: dict, keys) -> dict:
+    return {key: options[key] for key in keys if options.get(key) is not None}
+
+
+# 具体模型类在工厂函数中导入，只加载实际用到的后端的依赖
+@register_model('OpenAIModel')
+def _create_openai_model(options: dict, args=None, use_async: bool = False):
+    model = getattr(args, 'openai_model', None) or options['model']
+    api_key = getattr(args, 'openai_api_key', None) or options.get('api_key')
+    # 限流与重试参数，同步和异步模型共用
+    kwargs = _pick(options, ('max_tokens', 'requests_per_minute', 'tokens_per_minute', 'max_retries'))
+    if use_async:
+        from model.async_openai_model import AsyncOpenAIModel
+        return AsyncOpenAIModel(model=model, api_key=api_key, **kwargs)
+    from model.openai_model import OpenAIModel
+    return OpenAIModel(model=model, api_key=api_key, **kwargs)
+
+
+@register_model('GLMModel')
+def _create_glm_model(options: dict, args=None, use_async: bool = False):
+    model_url = getattr(args, 'glm_model_url', None) or options['model_url']
+    timeout = getattr(args, 'timeout', None) or options.get('timeout', 300)
+    kwargs = _pick(options, ('requests_per_minute', 'max_retries'))
+    if use_async:
+        from model.async_glm_model import AsyncGLMModel
+        return AsyncGLMModel(model_url=model_url, timeout=timeout, **kwargs)
+    from model.glm_model import GLMModel
+    return GLMModel(model_url=model_url, timeout=timeout, **kwargs)
+
+
+@register_model('MockModel')
+def _create_mock_model(options: dict, args=None, use_async: bool = False):
+    from model.mock_model import MockModel
+    return MockModel(**_pick(options, (
+        'model', 'latency', 'latency_jitter', 'error_rate', 'rate_limit_rpm', 'seed', 'prefix',
+        'requests_per_minute', 'tokens_per_minute', 'max_retries', 'retry_delay',
+    )))
@@ -1 +1,25 @@
-from .pdf_translator import PDFTranslator
\ No newline at end of file
+from .translation_cache import TranslationCache, load_translation_cache
+
+# PDFTranslator 依赖 pdfplumber 等较重的库，首次使用时才导入
+_LAZY_ATTRS = {
+    'PDFTranslator': '.pdf_translator',
+    'TranslationCancelled': '.pdf_translator',
+    'MultiLanguageTranslationError': '.pdf_translator',
+    'BatchTranslator': '.batch_translator',
+    'collect_pdf_files': '.batch_translator',
+    'ParseCache': '.parse_cache',
+    'load_parse_cache': '.parse_cache',
+    'TranslationMemory': '.translation_memory',
+    'load_translation_memory': '.translation_memory',
+}
+
+__all__ = ['TranslationCache', 'load_translation_cache', *_LAZY_ATTRS]
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+    globals()[name] = value
+    return value
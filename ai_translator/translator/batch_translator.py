@@ -0,0 +1,181 @@
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from model import Model
+from translator.parse_cache import ParseCache
+from translator.translation_memory import TranslationMemory
+from translator.pdf_translator import PDFTranslator
+from translator.translation_cache import TranslationCache
+from utils import LOG
+
+# 批量翻译中每个文件的结果状态
+TRANSLATED = "translated"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+def collect_pdf_files(specs: List[str]) -> List[str]:
+    """把目录、glob 模式、PDF 路径或清单文件展开为去重后的 PDF 路径列表。
+
+    目录递归查找 *.pdf；清单文件每行一个路径，空行和 # 开头的行被忽略，相对路径相对于清单文件所在目录。
+    """
+    pdf_files = []
+    for spec in specs:
+        if os.path.isdir(spec):
+            for root, dirs, files in os.walk(spec):
+                dirs.sort()
+                pdf_files.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith('.pdf'))
+        elif any(char in spec for char in '*?['):
+            pdf_files.extend(path for path in sorted(glob.glob(spec, recursive=True)) if os.path.isfile(path))
+        elif spec.lower().endswith('.pdf'):
+            if not os.path.isfile(spec):
+                raise FileNotFoundError(f"PDF file not found: {spec}")
+            pdf_files.append(spec)
+        elif os.path.isfile(spec):
+            manifest_dir = os.path.dirname(os.path.abspath(spec))
+            with open(spec, 'r', encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        pdf_files.append(line if os.path.isabs(line) else os.path.join(manifest_dir, line))
+        else:
+            raise FileNotFoundError(f"No such directory, glob match or manifest file: {spec}")
+
+    unique_files = []
+    seen = set()
+    for path in pdf_files:
+        key = os.path.abspath(path)
+        if key not in seen:
+            seen.add(key)
+            unique_files.append(path)
+    return unique_files
+
+
+class BatchTranslator:
+    """批量翻译多个 PDF。
+
+    最多 max_files 个文件同时解析和翻译，所有文件的请求提交到同一个 max_workers 大小的线程池，
+    并使用同一个模型实例（因此共用同一个进程级限流器）。输出文件比输入文件新时跳过该文件，
+    中断的文件下次运行时从检查点继续。
+    """
+
+    def __init__(self, model: Model, max_workers: int = 4, max_files: int = 2, cache: Optional[TranslationCache] = None,
+                 token_budget: Optional[int] = None, parse_workers: int = 1, image_resolution: Optional[int] = None,
+                 parse_cache: Optional[ParseCache] = None, incremental: bool = False, memory: Optional[TranslationMemory] = None,
+                 detect_headers_footers: bool = False):
+        self.model = model
+        self.max_workers = max(1, max_workers or 1)
+        self.max_files = max(1, max_files or 1)
+        self.cache = cache
+        self.token_budget = token_budget
+        self.parse_workers = parse_workers
+        self.image_resolution = image_resolution
+        self.parse_cache = parse_cache
+        self.incremental = incremental
+        self.memory = memory
+        self.detect_headers_footers = detect_headers_footers
+
+    def translate_files(self, pdf_file_paths: List[str], target_language: str, file_format: str = 'PDF',
+                        output_dir: Optional[str] = None, force: bool = False, report_path: Optional[str] = None) -> dict:
+        """翻译所有文件，返回汇总报告（同时写入 report_path）。单个文件失败不影响其他文件。"""
+        started = time.perf_counter()
+        # 输出目录中保留输入文件之间的相对目录结构，避免不同目录下的同名文件互相覆盖
+        input_root = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in pdf_file_paths]) if pdf_file_paths else None
+
+        request_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='translator')
+        file_executor = ThreadPoolExecutor(max_workers=self.max_files, thread_name_prefix='batch-file')
+        try:
+            futures = []
+            for pdf_file_path in pdf_file_paths:
+                output_file_path = self.output_path_for(pdf_file_path, file_format, output_dir, input_root)
+                futures.append(file_executor.submit(
+                    self._translate_file, pdf_file_path, output_file_path, target_language, file_format, force, request_executor
+                ))
+            results = [future.result() for future in futures]
+        finally:
+            file_executor.shutdown(wait=True, cancel_futures=True)
+            request_executor.shutdown(wait=True, cancel_futures=True)
+
+        report = self._make_report(results, target_language, file_format, time.perf_counter() - started)
+        if report_path:
+            report_dir = os.path.dirname(report_path)
+            if report_dir and not os.path.isdir(report_dir):
+                os.makedirs(report_dir)
+            with open(report_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            LOG.info(f"Batch report written to {report_path}")
+        return report
+
+    @staticmethod
+    def output_path_for(pdf_file_path: str, file_format: str, output_dir: Optional[str] = None, input_root: Optional[str] = None) -> str:
+        extension = '.pdf' if file_format.lower() == 'pdf' else '.md'
+        stem = os.path.splitext(os.path.basename(pdf_file_path))[0]
+        directory = os.path.dirname(pdf_file_path)
+        if output_dir is not None:
+            relative_dir = os.path.relpath(os.path.dirname(os.path.abspath(pdf_file_path)), input_root) if input_root else '.'
+            directory = os.path.normpath(os.path.join(output_dir, relative_dir))
+        return os.path.join(directory, f"{stem}_translated{extension}")
+
+    @staticmethod
+    def is_up_to_date(pdf_file_path: str, output_file_path: str) -> bool:
+        return os.path.exists(output_file_path) and os.path.getmtime(output_file_path) >= os.path.getmtime(pdf_file_path)
+
+    def _translate_file(self, pdf_file_path: str, output_file_path: str, target_language: str, file_format: str,
+                        force: bool, request_executor: ThreadPoolExecutor) -> dict:
+        result = {'input': pdf_file_path, 'output': output_file_path, 'status': None, 'seconds': 0.0, 'pages': None, 'error': None}
+        if not force and self.is_up_to_date(pdf_file_path, output_file_path):
+            LOG.info(f"Skipping up-to-date output: {output_file_path}")
+            result['status'] = SKIPPED
+            return result
+
+        started = time.perf_counter()
+        translator = PDFTranslator(
+            self.model,
+            max_workers=self.max_workers,
+            cache=self.cache,
+            token_budget=self.token_budget,
+            parse_workers=self.parse_workers,
+            image_resolution=self.image_resolution,
+            executor=request_executor,
+            parse_cache=self.parse_cache,
+            incremental=self.incremental,
+            memory=self.memory,
+            detect_headers_footers=self.detect_headers_footers,
+        )
+        try:
+            output_dir = os.path.dirname(output_file_path)
+            if output_dir and not os.path.isdir(output_dir):
+                os.makedirs(output_dir, exist_ok=True)
+            # 总是从检查点继续，上次中断的文件不必从头翻译
+            translator.translate_pdf(pdf_file_path, target_language, file_format, output_file_path=output_file_path, resume=True)
+            result['status'] = TRANSLATED
+            LOG.info(f"Translated {pdf_file_path} -> {output_file_path}")
+        except Exception as e:
+            result['status'] = FAILED
+            result['error'] = str(e)
+            LOG.error(f"Failed to translate {pdf_file_path}: {traceback.format_exc()}")
+        result['seconds'] = round(time.perf_counter() - started, 3)
+        book = getattr(translator, 'book', None)
+        result['pages'] = len(book.pages) if book is not None else None
+        result.update(translator.stats)
+        return result
+
+    @staticmethod
+    def _make_report(results: List[dict], target_language: str, file_format: str, seconds: float) -> dict:
+        summary = {
+            'files': len(results),
+            TRANSLATED: sum(1 for result in results if result['status'] == TRANSLATED),
+            SKIPPED: sum(1 for result in results if result['status'] == SKIPPED),
+            FAILED: sum(1 for result in results if result['status'] == FAILED),
+            'seconds': round(seconds, 3),
+        }
+        for key in ('requests', 'failed_requests', 'cached_requests', 'prompt_tokens', 'completion_tokens'):
+            summary[key] = sum(result.get(key, 0) for result in results)
+        LOG.info(f"Batch finished: {summary}")
+        # token 数为按 estimate_tokens 估算的值
+        return {'target_language': target_language, 'file_format': file_format, 'summary': summary, 'files': results}
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, Tuple
+
+from utils import LOG
+
+
+class TranslationCheckpoint:
+    """以 JSONL 追加写入的翻译检查点，每行记录一个已完成内容块的译文。
+
+    第一行为文件头，记录 PDF 路径和目标语言；之后每行以 (page_idx, content_idx) 为键，
+    并带有原文指纹，原文发生变化的记录在恢复时会被忽略。
+    """
+
+    def __init__(self, checkpoint_path: str, pdf_file_path: str, target_language: str):
+        self.checkpoint_path = checkpoint_path
+        self.header = {"pdf_file_path": os.path.abspath(pdf_file_path), "target_language": target_language}
+        self._lock = threading.Lock()
+        self._file = None
+
+    @staticmethod
+    def default_path(pdf_file_path: str, target_language: str) -> str:
+        language_tag = hashlib.sha1(target_language.encode('utf-8')).hexdigest()[:8]
+        return f"{os.path.splitext(pdf_file_path)[0]}_translated.{language_tag}.checkpoint.jsonl"
+
+    @staticmethod
+    def fingerprint(content) -> str:
+        original = content.get_original_as_str() if hasattr(content, 'get_original_as_str') else content.original
+        return hashlib.sha1(original.encode('utf-8')).hexdigest()
+
+    def load(self) -> Dict[Tuple[int, int], dict]:
+        """读取已完成的记录，文件不存在或文件头不匹配时返回空字典。"""
+        records = {}
+        if not os.path.isfile(self.checkpoint_path):
+            return records
+
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 进程中断时最后一行可能只写了一半
+                    LOG.warning(f"Ignoring truncated checkpoint line {line_no + 1} in {self.checkpoint_path}")
+                    continue
+                if line_no == 0:
+                    if record != self.header:
+                        LOG.warning(f"Checkpoint {self.checkpoint_path} belongs to another job, ignoring it")
+                        return {}
+                    continue
+                records[(record["page"], record["content"])] = record
+        return records
+
+    def open(self, resume: bool):
+        """打开检查点文件；resume 为 False 时丢弃已有记录。"""
+        keep_existing = resume and bool(self.load())
+        truncated = keep_existing and not self._ends_with_newline()
+        self._file = open(self.checkpoint_path, 'a' if keep_existing else 'w', encoding='utf-8')
+        if truncated:
+            # 结束写了一半的最后一行，否则新记录会接在它后面一起被忽略
+            self._file.write('\n')
+        if not keep_existing:
+            self._write(self.header)
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.checkpoint_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def append(self, page_idx: int, content_idx: int, content, translation: str):
+        self._write({
+            "page": page_idx,
+            "content": content_idx,
+            "fingerprint": self.fingerprint(content),
+            "translation": translation,
+        })
+
+    def _write(self, record: dict):
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+            # 每条记录立即落盘，进程崩溃时最多丢失正在写入的一行
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        if os.path.isfile(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
@@ -0,0 +1,75 @@
+import re
+from collections import Counter, defaultdict
+from typing import List, Optional
+
+from book import Book, Content, ContentType
+from translator.translation_memory import normalize
+from utils import LOG
+
+_LETTER_PATTERN = re.compile(r"[^\W\d_]")
+
+
+class HeaderFooterDetector:
+    """跨页检测页眉、页脚和页码。
+
+    PDFParser 把页眉、页脚留在每页的文本内容块中，每页的请求都要为同样的几行付出 token。
+    在每页文本的前、后 max_lines 行中，同一位置上模板（见 translation_memory.normalize，只差数字的行视为相同）
+    重复出现在至少 min_pages 页、且不少于 min_ratio 比例的页面时，视为页眉或页脚：
+    从文本中移出，作为独立的文本内容块放在该页内容的开头或末尾，写入时仍出现在页面的顶部和底部。
+    """
+
+    def __init__(self, max_lines: int = 2, min_pages: int = 3, min_ratio: float = 0.3):
+        self.max_lines = max_lines
+        self.min_pages = min_pages
+        self.min_ratio = min_ratio
+
+    def _position(self, idx: int, line_count: int) -> Optional[str]:
+        if idx < min(self.max_lines, line_count):
+            return f"top:{idx}"
+        if idx >= max(self.max_lines, line_count - self.max_lines):
+            return f"bottom:{idx - line_count}"
+        return None
+
+    def extract(self, book: Book) -> List[List[Content]]:
+        """移出 book 中重复的页眉、页脚，返回按模板分组的新内容块，每组的第一个作为代表。"""
+        page_texts = []
+        for page in book.pages:
+            text_content = next((content for content in page.contents if content.content_type == ContentType.TEXT), None)
+            lines = text_content.original.split("\n") if text_content is not None else []
+            page_texts.append((page, text_content, lines))
+
+        counts = Counter()
+        for _, _, lines in page_texts:
+            counts.update({(self._position(idx, len(lines)), normalize(line)) for idx, line in enumerate(lines) if self._position(idx, len(lines))})
+        text_pages = sum(1 for _, text_content, _ in page_texts if text_content is not None)
+        threshold = max(self.min_pages, self.min_ratio * text_pages)
+        repeated = {key for key, count in counts.items() if count >= threshold}
+        if not repeated:
+            return []
+
+        groups = defaultdict(list)
+        for page, text_content, lines in page_texts:
+            headers, footers, body = [], [], []
+            for idx, line in enumerate(lines):
+                position = self._position(idx, len(lines))
+                if position is not None and (position, normalize(line)) in repeated:
+                    (headers if position.startswith("top") else footers).append(Content(content_type=ContentType.TEXT, original=line))
+                else:
+                    body.append(line)
+            if not headers and not footers:
+                continue
+            contents = [content for content in page.contents if content is not text_content]
+            if body:
+                text_content.original = "\n".join(body)
+                contents.insert(0, text_content)
+            page.contents = headers + contents + footers
+            for content in headers + footers:
+                groups[normalize(content.original)].append(content)
+
+        LOG.info(f"Detected {len(groups)} repeated headers/footers on {sum(len(group) for group in groups.values())} lines")
+        return list(groups.values())
+
+
+def has_letters(text: str) -> bool:
+    """页码等不含字母的行不需要翻译。"""
+    return _LETTER_PATTERN.search(text) is not None
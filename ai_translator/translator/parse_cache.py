@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+from book import Content, ContentType, Page, TableContent
+from utils import LOG
+from utils.metrics import CACHE_LOOKUPS
+
+# 序列化格式的版本，格式变化时递增，旧条目自然失效
+FORMAT_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def page_to_plain(page: Page) -> list:
+    """把页面的原文转换为可 JSON 序列化的列表：文本、表格单元格和图片的绝对路径。"""
+    plain = []
+    for content in page.contents:
+        if content.content_type == ContentType.TEXT:
+            plain.append(['text', content.original])
+        elif content.content_type == ContentType.TABLE:
+            plain.append(['table', content.original.values.tolist()])
+        elif content.content_type == ContentType.IMAGE:
+            plain.append(['image', os.path.abspath(content.original)])
+    return plain
+
+
+def plain_to_page(plain: list, pdf_dir: str) -> Optional[Page]:
+    """还原页面。图片链接或复制到当前 PDF 所在目录的 parserimages 中（与重新解析的结果一致），
+    源图片已被删除时返回 None。"""
+    page = Page()
+    for content_type, original in plain:
+        if content_type == 'text':
+            page.add_content(Content(content_type=ContentType.TEXT, original=original))
+        elif content_type == 'table':
+            page.add_content(TableContent(original))
+        elif content_type == 'image':
+            image_path = os.path.join(pdf_dir, 'parserimages', os.path.basename(original)).replace('\\', '/')
+            if not os.path.isfile(image_path):
+                if not os.path.isfile(original):
+                    return None
+                os.makedirs(os.path.dirname(image_path), exist_ok=True)
+                try:
+                    os.link(original, image_path)
+                except OSError:
+                    shutil.copyfile(original, image_path)
+            page.add_content(Content(content_type=ContentType.IMAGE, original=image_path))
+    return page
+
+
+class ParseCache:
+    """基于 SQLite 的解析结果缓存，同一份 PDF 再次翻译（其他语言、格式或任务）时不再调用 pdfplumber。
+
+    键为 PDF 内容的 SHA-256、页数范围、解析器版本和图片分辨率，值为 zlib 压缩的 JSON（只含原文，不含译文），
+    超出条目数或总大小上限时按最近最少使用（LRU）淘汰。图片只保存路径，图片文件仍由 PDFParser 写在 PDF 旁边。
+    """
+
+    def __init__(self, cache_path: str, max_entries: int = 1000, max_size_mb: float = 256):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parsed_documents ("
+            "key TEXT PRIMARY KEY, file_hash TEXT NOT NULL, pages INTEGER NOT NULL, "
+            "data BLOB NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_parsed_documents_last_access ON parsed_documents (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(file_hash: str, pages: Optional[int], parser_version: str, image_resolution: Optional[int]) -> str:
+        digest = hashlib.sha256()
+        for part in (file_hash, str(pages), parser_version, str(image_resolution), str(FORMAT_VERSION)):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str, pdf_dir: str) -> Optional[List[Page]]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM parsed_documents WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE parsed_documents SET last_access = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+
+        pages = None
+        if row is not None:
+            pages = [plain_to_page(plain, pdf_dir) for plain in json.loads(zlib.decompress(row[0]))]
+            if any(page is None for page in pages):
+                LOG.warning("Cached parse result references deleted images, parsing again")
+                pages = None
+
+        with self._lock:
+            if pages is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        CACHE_LOOKUPS.inc(cache='parse', result='miss' if pages is None else 'hit')
+        return pages
+
+    def put(self, key: str, file_hash: str, plain_pages: List[list]):
+        """保存由 page_to_plain 转换得到的全部页面。"""
+        data = zlib.compress(json.dumps(plain_pages, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parsed_documents (key, file_hash, pages, data, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, file_hash, len(plain_pages), data, len(data), time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """删除最久未使用的条目，直到条目数和总大小都不超过上限。调用方需持有 self._lock。"""
+        entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parsed_documents").fetchone()
+        if self.max_entries and entries > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM parsed_documents WHERE key IN "
+                "(SELECT key FROM parsed_documents ORDER BY last_access LIMIT ?)",
+                (entries - self.max_entries,)
+            )
+            total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parsed_documents").fetchone()[0]
+
+        if self.max_bytes and total_bytes > self.max_bytes:
+            excess = total_bytes - self.max_bytes
+            stale_keys = []
+            for key, size in self._conn.execute("SELECT key, size FROM parsed_documents ORDER BY last_access"):
+                stale_keys.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self._conn.executemany("DELETE FROM parsed_documents WHERE key = ?", stale_keys)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM parsed_documents")
+            self._conn.commit()
+        LOG.info(f"Parse cache cleared: {self.cache_path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM parsed_documents").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": total_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_parse_cache(args, config) -> Optional[ParseCache]:
+    """根据命令行参数和 config.yaml 中的 parse_cache 配置创建解析缓存，未启用时返回 None。"""
+    cache_config = config.get('parse_cache') or {}
+    if not cache_config.get('enabled', False) or getattr(args, 'no_parse_cache', False):
+        return None
+    return ParseCache(
+        cache_config.get('path', 'cache/parsed.sqlite3'),
+        max_entries=cache_config.get('max_entries', 1000),
+        max_size_mb=cache_config.get('max_size_mb', 256),
+    )
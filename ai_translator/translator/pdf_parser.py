@@ -1,18 +1,99 @@
+import functools
+import hashlib
+import math
 import pdfplumber
 import os
-from typing import Optional
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
 from book import Book, Page, Content, ContentType, TableContent
 from translator.exceptions import PageOutOfRangeException
+from translator.parse_cache import ParseCache, file_sha256, page_to_plain
 from utils import LOG
+from utils.metrics import PARSE_PAGE_SECONDS
+
+
+def _outside_bboxes(bboxes):
+    """返回 pdfplumber filter 使用的判断函数：保留中心点不在任何 bbox 内的字符及所有非字符对象。"""
+    def test(obj) -> bool:
+        if obj.get("object_type") != "char":
+            return True
+        x = (obj["x0"] + obj["x1"]) / 2
+        y = (obj["top"] + obj["bottom"]) / 2
+        return not any(x0 <= x <= x1 and top <= y <= bottom for x0, top, x1, bottom in bboxes)
+    return test
+
+
+def _parse_page_range(parser: "PDFParser", pdf_file_path: str, start: int, end: int) -> List[Tuple[Page, float]]:
+    """在子进程中独立打开 PDF 并解析 [start, end) 范围内的页面，返回 (页面, 解析耗时)，耗时由父进程记入指标。"""
+    pdf_dir = os.path.dirname(pdf_file_path)
+    results = []
+    with pdfplumber.open(pdf_file_path) as pdf:
+        for pdf_page in pdf.pages[start:end]:
+            started = time.perf_counter()
+            page = parser._parse_page(pdf_page, pdf_dir)
+            results.append((page, time.perf_counter() - started))
+    return results
+
+
+@functools.lru_cache(maxsize=32)
+def _document_sha256(pdf_file_path: str, mtime_ns: int, size: int) -> str:
+    """按路径、修改时间和大小缓存 PDF 的内容哈希，同一文档的多张图片只读取一次文件。"""
+    return file_sha256(pdf_file_path)
+
+
+# 解析结果的版本，修改 _parse_page 的输出（文本清洗、表格或图片提取方式）时递增，使解析缓存中的旧结果失效
+PARSER_VERSION = "2"
 
 
 class PDFParser:
-    def __init__(self):
-        pass
+    def __init__(self, workers: int = 1, image_resolution: Optional[int] = None, cache: Optional["ParseCache"] = None):
+        # 解析使用的进程数，1 表示在当前进程中逐页解析
+        self.workers = max(1, workers or 1)
+        # 图片栅格化的 DPI，None 时使用 pdfplumber 的默认值
+        self.image_resolution = image_resolution
+        # 解析缓存，命中时完全跳过 pdfplumber
+        self.cache = cache
+
+    def __getstate__(self):
+        # 多进程解析时解析器会被传给子进程，缓存中的 SQLite 连接不能也不需要跨进程传递
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
 
     def parse_pdf(self, pdf_file_path: str, pages: Optional[int] = None) -> Book:
         book = Book(pdf_file_path)
-       
+        for page in self.iter_pages(pdf_file_path, pages):
+            book.add_page(page)
+        return book
+
+    def iter_pages(self, pdf_file_path: str, pages: Optional[int] = None) -> Iterator[Page]:
+        """按页码顺序逐页产出解析结果，供流式流水线使用，不在内存中保留整本书。
+
+        启用解析缓存时先按 PDF 内容查找，未命中则边解析边保留每页原文的紧凑形式，全部解析完成后写入缓存。
+        """
+        if self.cache is None:
+            yield from self._parse_pages(pdf_file_path, pages)
+            return
+
+        file_hash = file_sha256(pdf_file_path)
+        cache_key = self.cache.make_key(file_hash, pages, PARSER_VERSION, self.image_resolution)
+        cached_pages = self.cache.get(cache_key, os.path.dirname(pdf_file_path))
+        if cached_pages is not None:
+            LOG.info(f"Using cached parse result for {pdf_file_path} ({len(cached_pages)} pages)")
+            yield from cached_pages
+            return
+
+        plain_pages = []
+        for page in self._parse_pages(pdf_file_path, pages):
+            # 在页面被翻译之前转换，缓存中只有原文
+            plain_pages.append(page_to_plain(page))
+            yield page
+        self.cache.put(cache_key, file_hash, plain_pages)
+
+    def _parse_pages(self, pdf_file_path: str, pages: Optional[int] = None) -> Iterator[Page]:
         # 获取PDF文件所在的目录路径
         pdf_dir = os.path.dirname(pdf_file_path)
 
@@ -21,76 +102,132 @@ class PDFParser:
         if not os.path.isdir(images_dir):
             os.makedirs(images_dir)
 
-        
-
         with pdfplumber.open(pdf_file_path) as pdf:
             if pages is not None and pages > len(pdf.pages):
                 raise PageOutOfRangeException(len(pdf.pages), pages)
 
-            if pages is None:
-                pages_to_parse = pdf.pages
-            else:
-                pages_to_parse = pdf.pages[:pages]
-
-            for pdf_page in pages_to_parse:
-                page = Page()
-
-                # Store the original text content
-                raw_text = pdf_page.extract_text()
-                tables = pdf_page.extract_tables()
-
-
-                # Remove each cell's content from the original text
-                for table_data in tables:
-                    for row in table_data:
-                        for cell in row:
-                            raw_text = raw_text.replace(cell, "", 1)
-
-                # Handling text
-                if raw_text:
-                    # Remove empty lines and leading/trailing whitespaces
-                    raw_text_lines = raw_text.splitlines()
-                    cleaned_raw_text_lines = [line.strip() for line in raw_text_lines if line.strip()]
-                    cleaned_raw_text = "\n".join(cleaned_raw_text_lines)
-
-                    text_content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
-                    page.add_content(text_content)
-                    LOG.debug(f"[raw_text]\n {cleaned_raw_text}")
-
-                # Handling tables
-                if tables:
-                    table = TableContent(tables)
-                    page.add_content(table)
-                    LOG.debug(f"[table]\n{table}")
-
-                # 【新增图片处理过程】Handinging images
-                images = pdf_page.images
-                if images:
-                   for idx, image_details in enumerate(images):
-                       
-                        # 提取图像的矩形边界
-                        x0, top, x1, bottom = image_details["x0"], image_details["top"], image_details["x1"], image_details["bottom"]
-                       
-                        # 确保坐标值在页面实际尺寸之内
-                        x0 = max(0, x0)
-                        top = max(0, top)
-                        x1 = min(pdf_page.width, x1)
-                        bottom = min(pdf_page.height, bottom)
-                        cropped_image = pdf_page.within_bbox((x0, top, x1, bottom)).to_image(antialias=True)
-
-                        # 使用pdfplumber的裁剪、抗锯齿及导出功能
-                        cropped_image = pdf_page.within_bbox((x0, top, x1, bottom)).to_image(antialias=True)
-                        # 构造保存图像的路径，使用PDF文件所在的目录
-                        image_filename = f"parserimages/page_{pdf_page.page_number}_image_{idx}.png"
-                        # 生成图片url地址，windows中默认是反斜杠'\'
-                        image_jionpath = os.path.join(pdf_dir, image_filename)
-                        # 替换反斜杠为正斜杠，以便在 Markdown 中使用
-                        image_path = image_jionpath.replace('\\', '/')
-                        cropped_image.save(image_path, format="PNG")
-                        image_content = Content(content_type=ContentType.IMAGE, original=image_path)
-                        page.add_content(image_content)
-                        LOG.debug(f"[image]\n{image_path}") 
-
-                book.add_page(page)
-
-        return book
+            page_count = len(pdf.pages) if pages is None else pages
+            if self.workers == 1 or page_count < 2:
+                for pdf_page in pdf.pages[:page_count]:
+                    with PARSE_PAGE_SECONDS.time():
+                        page = self._parse_page(pdf_page, pdf_dir)
+                    yield page
+                    # 释放 pdfplumber 缓存的页面对象，保持内存占用与页数无关
+                    pdf_page.flush_cache()
+                return
+
+        yield from self._iter_pages_in_processes(pdf_file_path, page_count)
+
+    def _iter_pages_in_processes(self, pdf_file_path: str, page_count: int) -> Iterator[Page]:
+        """把页码范围切分给多个进程解析，再按页码顺序产出结果。"""
+        workers = min(self.workers, page_count)
+        # 每个进程分到多个较小的范围，避免个别图片密集的范围拖慢整体
+        chunk_size = max(1, math.ceil(page_count / (workers * 4)))
+        ranges = [(start, min(start + chunk_size, page_count)) for start in range(0, page_count, chunk_size)]
+        LOG.info(f"Parsing {page_count} pages with {workers} processes in {len(ranges)} chunks")
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 最多同时提交 2 * workers 个范围，已解析但尚未被消费的页面数量有上限
+            pending = deque()
+            for start, end in ranges:
+                pending.append(executor.submit(_parse_page_range, self, pdf_file_path, start, end))
+                if len(pending) >= workers * 2:
+                    yield from self._observe_parse_times(pending.popleft().result())
+            while pending:
+                yield from self._observe_parse_times(pending.popleft().result())
+
+    @staticmethod
+    def _observe_parse_times(results: List[Tuple[Page, float]]) -> Iterator[Page]:
+        for page, seconds in results:
+            PARSE_PAGE_SECONDS.observe(seconds)
+            yield page
+
+    def _parse_page(self, pdf_page, pdf_dir: str) -> Page:
+        page = Page()
+
+        # 表格区域内的字符属于表格内容，从正文中按版面位置一次性排除
+        found_tables = pdf_page.find_tables()
+        tables = [
+            [[cell if cell is not None else "" for cell in row] for row in table.extract()]
+            for table in found_tables
+        ]
+        text_page = pdf_page.filter(_outside_bboxes([table.bbox for table in found_tables])) if found_tables else pdf_page
+
+        # Store the original text content
+        raw_text = text_page.extract_text()
+
+        # Handling text
+        if raw_text:
+            # Remove empty lines and leading/trailing whitespaces
+            raw_text_lines = raw_text.splitlines()
+            cleaned_raw_text_lines = [line.strip() for line in raw_text_lines if line.strip()]
+            cleaned_raw_text = "\n".join(cleaned_raw_text_lines)
+
+            text_content = Content(content_type=ContentType.TEXT, original=cleaned_raw_text)
+            page.add_content(text_content)
+            LOG.debug(f"[raw_text]\n {cleaned_raw_text}")
+
+        # Handling tables
+        if tables:
+            table = TableContent(tables)
+            page.add_content(table)
+            LOG.debug(f"[table]\n{table}")
+
+        # 【新增图片处理过程】Handinging images
+        images = pdf_page.images
+        if images:
+           for idx, image_details in enumerate(images):
+               
+                # 提取图像的矩形边界
+                x0, top, x1, bottom = image_details["x0"], image_details["top"], image_details["x1"], image_details["bottom"]
+               
+                # 确保坐标值在页面实际尺寸之内
+                x0 = max(0, x0)
+                top = max(0, top)
+                x1 = min(pdf_page.width, x1)
+                bottom = min(pdf_page.height, bottom)
+                image_path = self._extract_image(pdf_page, image_details, (x0, top, x1, bottom), pdf_dir)
+                image_content = Content(content_type=ContentType.IMAGE, original=image_path)
+                page.add_content(image_content)
+                LOG.debug(f"[image]\n{image_path}") 
+
+        return page
+
+    def _extract_image(self, pdf_page, image_details, bbox, pdf_dir: str) -> str:
+        """按内容哈希保存图像，相同图像（例如每页重复的 logo）只栅格化和写入一次，返回图像路径。"""
+        image_hash = self._image_hash(pdf_page, image_details, bbox)
+        # 构造保存图像的路径，使用PDF文件所在的目录
+        image_filename = f"parserimages/image_{image_hash}.png"
+        # 生成图片url地址，windows中默认是反斜杠'\'
+        image_jionpath = os.path.join(pdf_dir, image_filename)
+        # 替换反斜杠为正斜杠，以便在 Markdown 中使用
+        image_path = image_jionpath.replace('\\', '/')
+        if os.path.isfile(image_path):
+            LOG.debug(f"Reusing extracted image {image_path}")
+            return image_path
+
+        # 使用pdfplumber的裁剪、抗锯齿及导出功能
+        cropped_image = pdf_page.within_bbox(bbox).to_image(resolution=self.image_resolution, antialias=True)
+        # 先写临时文件再原子替换，多个解析进程/线程遇到同一图像时不会读到写了一半的文件
+        tmp_path = f"{image_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        cropped_image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, image_path)
+        return image_path
+
+    def _image_hash(self, pdf_page, image_details, bbox) -> str:
+        """由图像数据流、显示尺寸和分辨率计算哈希；无法读取数据流时退化为按文档内容和页面位置区分。
+
+        parserimages/ 由同一目录下的所有 PDF 共用，退化的哈希必须包含文档本身，否则不同 PDF 中
+        同一页、同一位置的图片会得到同一个文件。
+        """
+        digest = hashlib.sha1()
+        width, height = bbox[2] - bbox[0], bbox[3] - bbox[1]
+        digest.update(f"{round(width, 1)}x{round(height, 1)}@{self.image_resolution}".encode('utf-8'))
+        stream = image_details.get("stream")
+        try:
+            digest.update(stream.get_rawdata() or stream.get_data())
+        except Exception:
+            stat = os.stat(pdf_page.pdf.path)
+            document_hash = _document_sha256(os.path.abspath(pdf_page.pdf.path), stat.st_mtime_ns, stat.st_size)
+            digest.update(f"{document_hash}:{pdf_page.page_number}:{bbox}".encode('utf-8'))
+        return digest.hexdigest()[:16]
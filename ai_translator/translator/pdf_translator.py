@@ -1,76 +1,731 @@
-from typing import Optional
-from model import Model
-from book import ContentType
+import asyncio
+import copy
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional
+from model import AsyncModel, Model
+from book import Book, Content, ContentType, Page
+from translator.checkpoint import TranslationCheckpoint
+from translator.header_footer import HeaderFooterDetector, has_letters
+from translator.parse_cache import ParseCache
 from translator.pdf_parser import PDFParser
+from translator.pipeline import prefetch
+from translator.text_chunker import Segment, TextChunker, split_paragraphs
+from translator.translation_cache import TranslationCache
+from translator.translation_memory import TranslationMemory, substitute_numbers
+from translator.translation_record import TranslationRecord
 from translator.writer import Writer
-from utils import LOG
-from PIL import Image as PILImage
+from utils import LOG, estimate_tokens
+from utils.metrics import REQUEST_SECONDS, REQUESTS
 
 
+class TranslationCancelled(Exception):
+    """翻译被 PDFTranslator.cancel() 取消。"""
+
+
+class MultiLanguageTranslationError(Exception):
+    """translate_pdf_languages 中部分目标语言翻译失败。outputs 为成功语言的输出路径，errors 为失败语言的异常。"""
+
+    def __init__(self, outputs: Dict[str, str], errors: Dict[str, Exception]):
+        super().__init__("Translation failed for " + "; ".join(f"{language}: {error}" for language, error in errors.items()))
+        self.outputs = outputs
+        self.errors = errors
+
+
+class _ResultAssembler:
+    """把按请求产出的分段译文拼回内容块，并按 tasks 的顺序放出已完整的内容块。"""
+
+    def __init__(self, tasks, requests: List[List[Segment]]):
+        self.task_count = len(tasks)
+        self.part_counts = Counter(segment.task_idx for segments in requests for segment in segments)
+        self.parts = defaultdict(dict)
+        self.next_task = 0
+
+    def add(self, segments: List[Segment], results):
+        """登记一个请求的结果（可以乱序到达），返回可以按顺序写回的 (task_idx, translation, status) 列表。"""
+        for segment, result in zip(segments, results):
+            self.parts[segment.task_idx][segment.part_idx] = result
+        ready = []
+        while self.next_task < self.task_count and len(self.parts[self.next_task]) == self.part_counts[self.next_task]:
+            task_parts = self.parts.pop(self.next_task)
+            ordered = [task_parts[part_idx] for part_idx in sorted(task_parts)]
+            translation = "\n".join(text for text, _ in ordered)
+            ready.append((self.next_task, translation, all(status for _, status in ordered)))
+            self.next_task += 1
+        return ready
+
+
+def _copy_book(book: Book) -> Book:
+    """浅拷贝书的页面和内容块：原文（包括表格和图片路径）共用，译文各自独立。"""
+    book_copy = Book(book.pdf_file_path)
+    for page in book.pages:
+        page_copy = Page()
+        for content in page.contents:
+            page_copy.add_content(copy.copy(content))
+        book_copy.add_page(page_copy)
+    return book_copy
+
+
+def _original_text(content: Content) -> str:
+    """内容块发送给模型的原文：文本为 original，表格为 get_original_as_str()。"""
+    return content.get_original_as_str() if content.content_type == ContentType.TABLE else content.original
+
 
 class PDFTranslator:
-    def __init__(self, model: Model):
+    def __init__(self, model: Model, max_workers: int = 1, cache: Optional[TranslationCache] = None, token_budget: Optional[int] = None, parse_workers: int = 1, image_resolution: Optional[int] = None,
+                 progress_callback: Optional[Callable[[int, Optional[int]], None]] = None,
+                 content_callback: Optional[Callable[[int, int, Content, str, bool], None]] = None,
+                 executor: Optional[ThreadPoolExecutor] = None, parse_cache: Optional[ParseCache] = None, incremental: bool = False,
+                 memory: Optional[TranslationMemory] = None, detect_headers_footers: bool = False):
         self.model = model
-        self.pdf_parser = PDFParser()
+        # 同时在途的翻译请求上限，1 表示逐个串行请求
+        self.max_workers = max(1, max_workers or 1)
+        self.cache = cache
+        # 翻译记忆：只差数字、日期或空白的分段直接复用译文，相似分段的译文作为参考加入 prompt
+        self.memory = memory
+        # 设置 token_budget 后，文本内容按预算切分/合并为批量请求
+        self.chunker = TextChunker(token_budget) if token_budget else None
+        # 启用解析缓存时，同一份 PDF 再次翻译（其他语言或格式）不再重新解析
+        self.pdf_parser = PDFParser(workers=parse_workers, image_resolution=image_resolution, cache=parse_cache)
+        # 每完成一个内容块调用 progress_callback(done, total)，流式模式下 total 为 None
+        self.progress_callback = progress_callback
+        # 每个文本/表格内容块翻译完成后立即调用 content_callback(page_idx, content_idx, content, translation, status)，
+        # 可能在翻译线程中调用，且不保证按页面顺序
+        self.content_callback = content_callback
+        self._progress_lock = threading.Lock()
+        self._progress_done = 0
+        self._progress_total = None
+        self._cancelled = threading.Event()
+        # 外部传入的请求线程池（例如批量模式中多个文件共用），为 None 时每次翻译自建线程池
+        self.executor = executor
+        # 检测跨页重复的页眉、页脚和页码，每种只翻译一次
+        self.header_footer_detector = HeaderFooterDetector() if detect_headers_footers else None
+        # 增量模式：按段落翻译并保存译文记录，再次翻译（例如文档的修订版）时只请求新增或修改过的段落
+        self.incremental = incremental
+        # 本实例发送的请求数和估算的 token 用量
+        self._stats_lock = threading.Lock()
+        self.stats = {'requests': 0, 'failed_requests': 0, 'cached_requests': 0, 'prompt_tokens': 0, 'completion_tokens': 0}
         self.writer = Writer()
 
-    def translate_pdf(self, pdf_file_path: str, target_language: str, file_format: str = 'PDF',  output_file_path: str = None, pages: Optional[int] = None):
+    def cancel(self):
+        """取消翻译：可在任意线程中调用，之后不再发送新的请求，正在进行的翻译抛出 TranslationCancelled。
+
+        取消后该实例不能再用于翻译，已在途的请求会等待其返回。
+        """
+        self._cancelled.set()
+
+    def _check_cancelled(self):
+        if self._cancelled.is_set():
+            raise TranslationCancelled()
+
+    def translate_pdf(self, pdf_file_path: str, target_language: str, file_format: str = 'PDF',  output_file_path: str = None, pages: Optional[int] = None, resume: bool = False,
+                      previous_record: Optional[str] = None):
+        """翻译 PDF 并保存。每个内容块完成后写入检查点，resume 为 True 时跳过检查点中已完成的内容块。
+
+        增量模式下从 previous_record（默认为同一 PDF 路径上次翻译的记录）复用未修改段落的译文。
+        """
         self.book = self.pdf_parser.parse_pdf(pdf_file_path, pages)  
-        
-        for page_idx, page in enumerate(self.book.pages):
-            for content_idx, content in enumerate(page.contents):
-                
-                #只处理文本和表格
-                if content.content_type in [ContentType.TEXT, ContentType.TABLE]:       
-                   prompt = self.model.translate_prompt(content, target_language)
-                   LOG.debug(prompt)
-                   translation, status = self.model.make_request(prompt)
-                   LOG.info(translation)
-                # 更新self.book.pages中的内容
-                   content.set_translation(translation, status)
-                
-                # 如果内容是图像，则跳过翻译步骤  
-                elif content.content_type == ContentType.IMAGE: 
-                    LOG.info(f"Skipping translation for image content at page {page_idx + 1}, content {content_idx + 1}")
-                    with PILImage.open(content.original) as original_image:
-                       content.set_translation(original_image, status=True)
+        return self._translate_and_save(self.book, pdf_file_path, target_language, file_format, output_file_path, resume, previous_record)
+
+    def _translate_and_save(self, book: Book, pdf_file_path: str, target_language: str, file_format: str, output_file_path: Optional[str], resume: bool,
+                            previous_record: Optional[str] = None) -> str:
+        record = self._load_record(pdf_file_path, target_language, previous_record)
+        checkpoint = self._open_checkpoint(pdf_file_path, target_language, resume)
+        try:
+            self._translate_book(book, target_language, checkpoint, record)
+        finally:
+            checkpoint.close()
                   
         # 保存翻译后的 PDF
-        output_file_path = self.writer.save_translated_book(self.book, output_file_path, file_format)
+        output_file_path = self.writer.save_translated_book(book, output_file_path, file_format)
+        if record is not None:
+            record.save(TranslationRecord.default_path(pdf_file_path, target_language))
+        checkpoint.remove()
         return output_file_path
+
+    def _load_record(self, pdf_file_path: str, target_language: str, previous_record: Optional[str] = None) -> Optional[TranslationRecord]:
+        if not self.incremental:
+            return None
+        return TranslationRecord.load(previous_record or TranslationRecord.default_path(pdf_file_path, target_language), target_language)
+
+    def translate_pdf_languages(self, pdf_file_path: str, target_languages: List[str], file_format: str = 'PDF', output_file_paths: Optional[Dict[str, str]] = None,
+                                pages: Optional[int] = None, resume: bool = False,
+                                language_progress_callback: Optional[Callable[[str, int, Optional[int]], None]] = None) -> Dict[str, str]:
+        """把同一个 PDF 翻译为多种语言：只解析一次，所有语言的请求提交到同一个 max_workers 大小的线程池，
+        每种语言写出一个文件，返回 {目标语言: 输出路径}。
+
+        各语言使用书的浅拷贝（原文和图片文件共用，译文各自独立），并各自写检查点。output_file_paths 缺少某种语言时
+        输出到 PDF 旁的 <文件名>_translated.<语言>.<扩展名>。progress_callback 收到所有语言的合计进度，
+        language_progress_callback(language, done, total) 收到各语言的进度。部分语言失败时，其余语言仍然完成并写出文件，
+        最后抛出 MultiLanguageTranslationError。content_callback 在此模式下不调用。
+        """
+        target_languages = list(dict.fromkeys(target_languages))
+        output_file_paths = output_file_paths or {}
+        self.book = self.pdf_parser.parse_pdf(pdf_file_path, pages)
+        self._check_cancelled()
+
+        progress = {language: (0, None) for language in target_languages}
+        progress_lock = threading.Lock()
+
+        def make_progress_callback(language):
+            def report(done, total):
+                with progress_lock:
+                    progress[language] = (done, total)
+                    totals = [language_total for _, language_total in progress.values()]
+                    overall_done = sum(language_done for language_done, _ in progress.values())
+                    overall_total = sum(totals) if None not in totals else None
+                if language_progress_callback is not None:
+                    language_progress_callback(language, done, total)
+                if self.progress_callback is not None:
+                    self.progress_callback(overall_done, overall_total)
+            return report
+
+        request_executor = self.executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='translator')
+        language_executor = ThreadPoolExecutor(max_workers=len(target_languages), thread_name_prefix='translator-language')
+        translators = {language: self._fork(request_executor, make_progress_callback(language)) for language in target_languages}
+        outputs, errors = {}, {}
+        try:
+            futures = {
+                language: language_executor.submit(
+                    translators[language]._translate_and_save, _copy_book(self.book), pdf_file_path, language, file_format,
+                    output_file_paths.get(language) or self.default_output_path(pdf_file_path, file_format, language), resume,
+                )
+                for language in target_languages
+            }
+            for language, future in futures.items():
+                try:
+                    outputs[language] = future.result()
+                except TranslationCancelled:
+                    raise
+                except Exception as e:
+                    LOG.error(f"Translation to {language} failed: {e}")
+                    errors[language] = e
+        finally:
+            language_executor.shutdown(wait=True, cancel_futures=True)
+            if request_executor is not self.executor:
+                request_executor.shutdown(wait=True, cancel_futures=True)
+            for translator in translators.values():
+                for key, value in translator.stats.items():
+                    self.stats[key] += value
+        if errors:
+            raise MultiLanguageTranslationError(outputs, errors)
+        return outputs
+
+    @staticmethod
+    def default_output_path(pdf_file_path: str, file_format: str, language_tag: str) -> str:
+        """多语言输出的默认路径 <文件名>_translated.<语言>.<扩展名>，language_tag 可以是语言代码或语言名称。"""
+        extension = '.pdf' if file_format.lower() == 'pdf' else '.md'
+        safe_tag = re.sub(r'\W+', '_', language_tag).strip('_') or hashlib.sha1(language_tag.encode('utf-8')).hexdigest()[:8]
+        return f"{os.path.splitext(pdf_file_path)[0]}_translated.{safe_tag}{extension}"
+
+    def _fork(self, executor: ThreadPoolExecutor, progress_callback: Callable[[int, Optional[int]], None]) -> "PDFTranslator":
+        """创建共用模型、缓存、请求线程池和取消状态的 PDFTranslator，用于并行翻译同一本书的另一种语言。"""
+        translator = PDFTranslator(
+            self.model,
+            max_workers=self.max_workers,
+            cache=self.cache,
+            memory=self.memory,
+            token_budget=self.chunker.token_budget if self.chunker else None,
+            progress_callback=progress_callback,
+            executor=executor,
+            incremental=self.incremental,
+            detect_headers_footers=self.header_footer_detector is not None,
+        )
+        translator._cancelled = self._cancelled
+        return translator
     
 
     def translate_pdf_text(self, pdf_file_path: str, target_language: str, file_format: str = 'PDF',  output_file_path: str = None, pages: Optional[int] = None):
         self.book = self.pdf_parser.parse_pdf(pdf_file_path, pages)  
-        translated_text = ''  # 初始化翻译后的文本字符串      
-
-        for page_idx, page in enumerate(self.book.pages):
-            for content_idx, content in enumerate(page.contents):
-                
-                #只处理文本和表格
-                if content.content_type in [ContentType.TEXT, ContentType.TABLE]:       
-                   prompt = self.model.translate_prompt(content, target_language)
-                   LOG.debug(prompt)
-                   translation, status = self.model.make_request(prompt)
-                   LOG.info(translation)
-                # 更新self.book.pages中的内容
-                   content.set_translation(translation, status)
-                # 将翻译后的文本添加到 translated_text
-                   translated_text += translation + '\n'
-                
-                # 如果内容是图像，则跳过翻译步骤  
-                elif content.content_type == ContentType.IMAGE: 
-                    LOG.info(f"Skipping translation for image content at page {page_idx + 1}, content {content_idx + 1}")
-                    with PILImage.open(content.original) as original_image:
-                       content.set_translation(original_image, status=True)
-                       # 对于图像内容，这里不做处理
-                
+        translations = self._translate_book(self.book, target_language)
+
         # 只返回翻译后的文本字符串，为gui.py提供翻译后的文本返回。
-        return translated_text          
+        return ''.join(translation + '\n' for translation in translations)
+
+    async def translate_pdf_async(self, pdf_file_path: str, target_language: str, file_format: str = 'PDF',  output_file_path: str = None, pages: Optional[int] = None, resume: bool = False,
+                                  previous_record: Optional[str] = None):
+        """translate_pdf 的异步版本，配合 AsyncModel 使用时单个事件循环即可维持大量在途请求。"""
+        # 解析和写文件是 CPU/磁盘密集的同步操作，放到线程中执行以免阻塞事件循环
+        self.book = await asyncio.to_thread(self.pdf_parser.parse_pdf, pdf_file_path, pages)
+        record = self._load_record(pdf_file_path, target_language, previous_record)
+        checkpoint = self._open_checkpoint(pdf_file_path, target_language, resume)
+        try:
+            await self._translate_book_async(self.book, target_language, checkpoint, record)
+        finally:
+            checkpoint.close()
+
+        output_file_path = await asyncio.to_thread(self.writer.save_translated_book, self.book, output_file_path, file_format)
+        if record is not None:
+            record.save(TranslationRecord.default_path(pdf_file_path, target_language))
+        checkpoint.remove()
+        return output_file_path
+
+    def _open_checkpoint(self, pdf_file_path: str, target_language: str, resume: bool) -> TranslationCheckpoint:
+        checkpoint_path = TranslationCheckpoint.default_path(pdf_file_path, target_language)
+        checkpoint = TranslationCheckpoint(checkpoint_path, pdf_file_path, target_language)
+        checkpoint.open(resume)
+        return checkpoint
+
+    def translate_pdf_streaming(self, pdf_file_path: str, target_language: str, file_format: str = 'PDF',  output_file_path: str = None, pages: Optional[int] = None, queue_size: int = 4):
+        """以流水线方式翻译：解析、翻译、写入三个阶段同时进行，页面逐页流过。
+
+        各阶段之间的页面数量受 queue_size 和 max_workers 限制，内存占用与书的页数无关；
+        Markdown 输出逐页追加写入，翻译进行中即可查看已完成的页面。
+        """
+        page_writer = self.writer.open_page_writer(pdf_file_path, output_file_path, file_format)
+        try:
+            for page in self.iter_translated_pages(pdf_file_path, target_language, pages, queue_size):
+                page_writer.write_page(page)
+        finally:
+            output_file_path = page_writer.close()
+        return output_file_path
+
+    def iter_translated_pages(self, pdf_file_path: str, target_language: str, pages: Optional[int] = None, queue_size: int = 4) -> Iterator[Page]:
+        """边解析边翻译，按页码顺序产出翻译完成的页面，不写输出文件。页面逐页流过，不检测跨页重复的页眉页脚。"""
+        parsed_pages = prefetch(enumerate(self.pdf_parser.iter_pages(pdf_file_path, pages)), queue_size)
+        self._reset_progress(None)
+        yield from self._translate_pages(parsed_pages, target_language)
+        self._log_cache_stats()
+
+    def _translate_pages(self, pages, target_language: str) -> Iterator[Page]:
+        """并发翻译 (page_idx, page) 流，按页码顺序产出翻译完成的页面。"""
+        # 在途页面的窗口：既让多个页面的请求并发，又限制积压在内存中的页面数量
+        window_size = self.max_workers * 2
+        window = deque()
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='translator')
+        try:
+            for page_idx, page in pages:
+                self._check_cancelled()
+                window.append((page, executor.submit(self._translate_page, page_idx, page, target_language)))
+                if len(window) >= window_size:
+                    page, future = window.popleft()
+                    future.result()
+                    yield page
+            while window:
+                page, future = window.popleft()
+                future.result()
+                yield page
+        finally:
+            if executor is self.executor:
+                # 共用的线程池不能关闭，只取消本次翻译尚未开始的页面
+                for _, future in window:
+                    future.cancel()
+            else:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _translate_page(self, page_idx: int, page: Page, target_language: str):
+        """在当前线程中逐个发送单个页面的请求。"""
+        tasks = self._collect_page_tasks(page_idx, page)
+        requests = self._plan_requests(tasks)
+        assembler = _ResultAssembler(tasks, requests)
+        for segments in requests:
+            results = self._translate_request(tasks, segments, target_language)
+            for task_idx, translation, status in assembler.add(segments, results):
+                self._apply_translation(tasks[task_idx], translation, status, None)
+
+    def _collect_tasks(self, book: Book):
+        """收集需要请求模型的 (page_idx, content_idx, content)，图像内容直接标记为已完成。"""
+        tasks = []
+        for page_idx, page in enumerate(book.pages):
+            tasks.extend(self._collect_page_tasks(page_idx, page))
+        return tasks
+
+    def _collect_page_tasks(self, page_idx: int, page: Page):
+        tasks = []
+        for content_idx, content in enumerate(page.contents):
+
+            #只处理文本和表格
+            if content.content_type in [ContentType.TEXT, ContentType.TABLE]:
+                tasks.append((page_idx, content_idx, content))
+
+            # 如果内容是图像，则跳过翻译步骤  
+            elif content.content_type == ContentType.IMAGE: 
+                LOG.info(f"Skipping translation for image content at page {page_idx + 1}, content {content_idx + 1}")
+                # 只记录图像路径，不在这里解码像素数据
+                content.set_translation(content.original, status=True)
+        return tasks
+
+    def _restore_checkpoint(self, tasks, checkpoint: Optional[TranslationCheckpoint], translation_record: Optional[TranslationRecord] = None):
+        """把检查点中已完成的译文写回内容块，返回仍需翻译的 tasks 和按 task 顺序排列的已恢复译文。
+        恢复的译文同时加入增量模式的译文记录。"""
+        restored = {}
+        if checkpoint is None:
+            return tasks, restored
+        records = checkpoint.load()
+        pending = []
+        for task_idx, (page_idx, content_idx, content) in enumerate(tasks):
+            record = records.get((page_idx, content_idx))
+            if record is not None and record["fingerprint"] == TranslationCheckpoint.fingerprint(content):
+                content.set_translation(record["translation"], True)
+                restored[task_idx] = record["translation"]
+                if translation_record is not None:
+                    translation_record.add(_original_text(content), record["translation"])
+            else:
+                pending.append((page_idx, content_idx, content))
+        if restored:
+            LOG.info(f"Restored {len(restored)} translated contents from checkpoint, {len(pending)} remaining")
+        return pending, restored
+
+    def _apply_translation(self, task, translation: str, status: bool, checkpoint: Optional[TranslationCheckpoint]):
+        page_idx, content_idx, content = task
+        LOG.info(translation)
+        # 更新self.book.pages中的内容
+        content.set_translation(translation, status)
+        if self.content_callback is not None:
+            self.content_callback(page_idx, content_idx, content, translation, status)
+        if checkpoint is not None and status:
+            checkpoint.append(page_idx, content_idx, content, translation)
+        self._report_progress()
+
+    def _reset_progress(self, total: Optional[int], done: int = 0):
+        with self._progress_lock:
+            self._progress_total = total
+            self._progress_done = done
+        if self.progress_callback is not None:
+            self.progress_callback(done, total)
+
+    def _report_progress(self):
+        with self._progress_lock:
+            self._progress_done += 1
+            done, total = self._progress_done, self._progress_total
+        if self.progress_callback is not None:
+            self.progress_callback(done, total)
+
+    def _translate_book(self, book: Book, target_language: str, checkpoint: Optional[TranslationCheckpoint] = None, record: Optional[TranslationRecord] = None) -> List[str]:
+        """翻译 book 中所有文本和表格内容，按页面顺序返回翻译结果。
+
+        max_workers > 1 时各请求并发发送，但结果始终按页面、内容的原始顺序写回。
+        """
+        all_tasks, shared = self._collect_book_tasks(book)
+        tasks, restored = self._restore_checkpoint(all_tasks, checkpoint, record)
+        self._reset_progress(len(all_tasks), len(restored))
+        tasks, followers = self._split_shared(tasks, shared)
+        translations = self._translate_tasks(tasks, target_language, checkpoint, record)
+        # 代表行翻译完成后再处理其余重复行，无法复用译文的行按普通内容块翻译
+        leftovers = self._fill_shared_lines(followers, shared, translations, checkpoint)
+        if leftovers:
+            translations.update(self._translate_tasks(leftovers, target_language, checkpoint, record))
+        self._log_cache_stats()
+        return self._merge_restored(all_tasks, restored, translations)
+
+    def _translate_tasks(self, tasks, target_language: str, checkpoint: Optional[TranslationCheckpoint], record: Optional[TranslationRecord]) -> Dict[int, str]:
+        """翻译 tasks 并写回内容块，返回 id(content) -> 译文。"""
+        requests, reused = self._plan_requests_with_record(tasks, record)
+        assembler = _ResultAssembler(tasks, requests + [[segment] for segment, _ in reused])
+        translations = []
+        for segment, translation in reused:
+            translations.extend(self._assemble(assembler, tasks, [segment], [(translation, True)], checkpoint, record))
+        for segments, results in zip(requests, self._run_requests(tasks, requests, target_language)):
+            translations.extend(self._assemble(assembler, tasks, segments, results, checkpoint, record))
+        return dict(zip((id(content) for _, _, content in tasks), translations))
+
+    def _collect_book_tasks(self, book: Book):
+        """收集需要翻译的内容块，返回 (tasks, shared)。
+
+        检测页眉页脚时，shared 把每组重复行中除代表以外的内容块映射到代表内容块（id(content) -> 代表），
+        不含字母的行（例如页码）代表为 None，保留原文。
+        """
+        shared = {}
+        for group in self.header_footer_detector.extract(book) if self.header_footer_detector is not None else []:
+            representative = group[0] if has_letters(group[0].original) else None
+            for content in group[1:] if representative is not None else group:
+                shared[id(content)] = representative
+        return self._collect_tasks(book), shared
+
+    @staticmethod
+    def _split_shared(tasks, shared):
+        """把待翻译的 tasks 分为需要请求的和复用代表行译文的重复行。"""
+        return [task for task in tasks if id(task[2]) not in shared], [task for task in tasks if id(task[2]) in shared]
+
+    def _fill_shared_lines(self, followers, shared, translations: Dict[int, str], checkpoint: Optional[TranslationCheckpoint]) -> list:
+        """把代表行的译文（其中的数字替换为各行自己的数字）写回其余重复行并登记到 translations，
+        返回无法替换、需要单独翻译的 tasks。"""
+        leftovers = []
+        for task in followers:
+            content = task[2]
+            representative = shared[id(content)]
+            if representative is None:
+                translation = content.original
+            elif representative.status:
+                translation = substitute_numbers(representative.original, representative.translation, content.original)
+            else:
+                translation = None
+            if translation is None:
+                leftovers.append(task)
+            else:
+                self._apply_translation(task, translation, True, checkpoint)
+                translations[id(content)] = translation
+        if leftovers:
+            LOG.info(f"Translating {len(leftovers)} repeated header/footer lines separately")
+        return leftovers
+
+    def _assemble(self, assembler: _ResultAssembler, tasks, segments: List[Segment], results, checkpoint: Optional[TranslationCheckpoint],
+                  record: Optional[TranslationRecord]) -> List[str]:
+        """登记一个请求的分段译文，写回已完整的内容块，返回这些内容块的译文。"""
+        if record is not None:
+            for segment, (translation, status) in zip(segments, results):
+                if status:
+                    record.add(segment.text, translation)
+        translations = []
+        for task_idx, translation, status in assembler.add(segments, results):
+            self._apply_translation(tasks[task_idx], translation, status, checkpoint)
+            if record is not None and status:
+                # 同时记录整个内容块，未修改的页面下次只需一次查找
+                record.add(_original_text(tasks[task_idx][2]), translation)
+            translations.append(translation)
+        return translations
+
+    async def _translate_book_async(self, book: Book, target_language: str, checkpoint: Optional[TranslationCheckpoint] = None, record: Optional[TranslationRecord] = None) -> List[str]:
+        all_tasks, shared = self._collect_book_tasks(book)
+        tasks, restored = self._restore_checkpoint(all_tasks, checkpoint, record)
+        self._reset_progress(len(all_tasks), len(restored))
+        tasks, followers = self._split_shared(tasks, shared)
+        try:
+            translations = await self._translate_tasks_async(tasks, target_language, checkpoint, record)
+            leftovers = self._fill_shared_lines(followers, shared, translations, checkpoint)
+            if leftovers:
+                translations.update(await self._translate_tasks_async(leftovers, target_language, checkpoint, record))
+        finally:
+            if isinstance(self.model, AsyncModel):
+                await self.model.aclose()
+        self._log_cache_stats()
+        return self._merge_restored(all_tasks, restored, translations)
+
+    async def _translate_tasks_async(self, tasks, target_language: str, checkpoint: Optional[TranslationCheckpoint], record: Optional[TranslationRecord]) -> Dict[int, str]:
+        requests, reused = self._plan_requests_with_record(tasks, record)
+        assembler = _ResultAssembler(tasks, requests + [[segment] for segment, _ in reused])
+        translations = []
+        for segment, translation in reused:
+            translations.extend(self._assemble(assembler, tasks, [segment], [(translation, True)], checkpoint, record))
+        # 用信号量限制同时在途的请求数量
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def translate(segments):
+            async with semaphore:
+                return segments, await self._translate_request_async(tasks, segments, target_language)
+
+        # 请求完成一个就处理一个，使已完成的内容块尽早写入检查点
+        for completed in asyncio.as_completed([translate(segments) for segments in requests]):
+            segments, results = await completed
+            translations.extend(self._assemble(assembler, tasks, segments, results, checkpoint, record))
+        return dict(zip((id(content) for _, _, content in tasks), translations))
+
+    def _merge_restored(self, all_tasks, restored, translations: Dict[int, str]) -> List[str]:
+        """把本次翻译的结果（id(content) -> 译文）与检查点恢复的结果按原始顺序合并。"""
+        return [restored[task_idx] if task_idx in restored else translations[id(content)] for task_idx, (_, _, content) in enumerate(all_tasks)]
+
+    def _plan_requests_with_record(self, tasks, record: Optional[TranslationRecord]):
+        """规划请求，返回 (requests, reused)。增量模式下先按整个内容块、再按段落查找上一版的译文，
+        reused 为找到译文的 (Segment, 译文)，只有其余段落打包为请求。"""
+        if record is None:
+            return self._plan_requests(tasks), []
+        tables, texts, reused = [], [], []
+        for task_idx, (_, _, content) in enumerate(tasks):
+            translation = record.lookup(_original_text(content))
+            if translation is not None:
+                reused.append((Segment(task_idx, 0, _original_text(content)), translation))
+                if content.content_type == ContentType.TEXT:
+                    # 保留各段落的译文，该内容块在之后的版本中被修改时仍可按段落复用
+                    for paragraph in split_paragraphs(content.original):
+                        record.keep(paragraph)
+            elif content.content_type == ContentType.TABLE:
+                tables.append([Segment(task_idx, 0, content.get_original_as_str())])
+            else:
+                for part_idx, paragraph in enumerate(split_paragraphs(content.original) or [content.original]):
+                    translation = record.lookup(paragraph)
+                    if translation is not None:
+                        reused.append((Segment(task_idx, part_idx, paragraph), translation))
+                    else:
+                        texts.append(Segment(task_idx, part_idx, paragraph))
+        requests = tables + (self.chunker or TextChunker()).pack(texts)
+        requests.sort(key=lambda segments: segments[0].task_idx)
+        LOG.info(f"Reused {len(reused)} translated segments from the previous record, {len(texts) + len(tables)} segments left in {len(requests)} requests")
+        return requests, reused
+
+    def _plan_requests(self, tasks) -> List[List[Segment]]:
+        """把内容块规划为模型请求，每个请求是一组 Segment；表格始终单独请求。"""
+        requests = []
+        texts = []
+        for task_idx, (_, _, content) in enumerate(tasks):
+            if content.content_type == ContentType.TABLE:
+                requests.append([Segment(task_idx, 0, content.get_original_as_str())])
+            elif self.chunker is None:
+                requests.append([Segment(task_idx, 0, content.original)])
+            else:
+                texts.append((task_idx, content.original))
+        if texts:
+            requests.extend(self.chunker.plan(texts))
+            LOG.info(f"Planned {len(requests)} requests for {len(tasks)} contents (token budget {self.chunker.token_budget})")
+        # 按页面顺序发送请求，尽早得到前面内容块的结果
+        requests.sort(key=lambda segments: segments[0].task_idx)
+        return requests
+
+    def _run_requests(self, tasks, requests, target_language: str):
+        """按 requests 的顺序逐个产出每个请求的分段译文列表。"""
+        if self.executor is None and (self.max_workers == 1 or len(requests) <= 1):
+            for segments in requests:
+                yield self._translate_request(tasks, segments, target_language)
+            return
+
+        LOG.info(f"Translating {len(requests)} requests with {self.max_workers} workers")
+        executor = self.executor or ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='translator')
+        futures = []
+        try:
+            futures = [executor.submit(self._translate_request, tasks, segments, target_language) for segments in requests]
+            for future in futures:
+                yield future.result()
+        finally:
+            # 出错时取消尚未开始的请求，避免继续消耗 token；共用的线程池只取消本次提交的请求
+            if executor is self.executor:
+                for future in futures:
+                    future.cancel()
+            else:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _make_prompt(self, tasks, segments: List[Segment], target_language: str, references=()) -> str:
+        context = self.model.make_reference_context(list(references), target_language) if references else ""
+        if len(segments) > 1:
+            return context + self.model.make_batch_prompt([segment.text for segment in segments], target_language)
+        segment = segments[0]
+        if tasks[segment.task_idx][2].content_type == ContentType.TABLE:
+            return context + self.model.make_table_prompt(segment.text, target_language)
+        return context + self.model.make_text_prompt(segment.text, target_language)
+
+    def _split_response(self, segments: List[Segment], translation: str, status: bool):
+        """拆分请求的译文，批量译文的分段标记不完整时返回 None。"""
+        if len(segments) == 1:
+            return [(translation, status)]
+        if not status:
+            return None
+        translations = self.model.split_batch_response(translation, len(segments))
+        if translations is None:
+            LOG.warning(f"批量译文的分段标记不完整，改为逐段请求 {len(segments)} 个分段")
+            return None
+        return [(text, True) for text in translations]
+
+    def _search_memory(self, segments: List[Segment], target_language: str):
+        """在翻译记忆中查找各分段，返回 ({分段序号: 可直接复用的译文}, 仍需请求的分段序号, 参考译文)。"""
+        if self.memory is None:
+            return {}, list(range(len(segments))), []
+        reused, pending, references = {}, [], []
+        for idx, segment in enumerate(segments):
+            match = self.memory.lookup(segment.text, target_language)
+            if match.translation is not None:
+                reused[idx] = match.translation
+            else:
+                pending.append(idx)
+                references.extend(reference for reference in match.references if reference not in references)
+        # 参考译文会增加 prompt 的长度，每个请求最多带 max_references 条
+        return reused, pending, references[:self.memory.max_references]
+
+    def _merge_memory_results(self, segments: List[Segment], reused, pending, pending_results, target_language: str):
+        """合并复用的和新请求的分段译文，并把成功的新译文加入翻译记忆。"""
+        if self.memory is not None:
+            self.memory.add_many([(segments[idx].text, translation) for idx, (translation, status) in zip(pending, pending_results) if status], target_language)
+        results = {idx: (translation, True) for idx, translation in reused.items()}
+        results.update(zip(pending, pending_results))
+        return [results[idx] for idx in range(len(segments))]
+
+    def _translate_request(self, tasks, segments: List[Segment], target_language: str):
+        """翻译一个请求的各分段：先查翻译记忆，其余分段（带上参考译文）请求模型。"""
+        self._check_cancelled()
+        reused, pending, references = self._search_memory(segments, target_language)
+        pending_results = self._request_model(tasks, [segments[idx] for idx in pending], target_language, references) if pending else []
+        return self._merge_memory_results(segments, reused, pending, pending_results, target_language)
+
+    async def _translate_request_async(self, tasks, segments: List[Segment], target_language: str):
+        self._check_cancelled()
+        reused, pending, references = self._search_memory(segments, target_language)
+        pending_results = await self._request_model_async(tasks, [segments[idx] for idx in pending], target_language, references) if pending else []
+        return self._merge_memory_results(segments, reused, pending, pending_results, target_language)
+
+    def _request_model(self, tasks, segments: List[Segment], target_language: str, references=()):
+        self._check_cancelled()
+        prompt = self._make_prompt(tasks, segments, target_language, references)
+        LOG.debug(prompt)
+        cached = self._lookup_cache(prompt, target_language)
+        cached_results = self._split_response(segments, cached, True) if cached is not None else None
+        if cached_results is not None:
+            self._record_request(prompt, None, True)
+            return cached_results
+        started = time.perf_counter()
+        translation, status = self.model.make_request(prompt)
+        self._record_request(prompt, translation, status, time.perf_counter() - started)
+        results = self._split_response(segments, translation, status)
+        if results is None:
+            return [result for segment in segments for result in self._request_model(tasks, [segment], target_language, references)]
+        self._store_cache(prompt, target_language, translation, status)
+        return results
+
+    async def _request_model_async(self, tasks, segments: List[Segment], target_language: str, references=()):
+        self._check_cancelled()
+        prompt = self._make_prompt(tasks, segments, target_language, references)
+        LOG.debug(prompt)
+        cached = self._lookup_cache(prompt, target_language)
+        cached_results = self._split_response(segments, cached, True) if cached is not None else None
+        if cached_results is not None:
+            self._record_request(prompt, None, True)
+            return cached_results
+        started = time.perf_counter()
+        if isinstance(self.model, AsyncModel):
+            translation, status = await self.model.make_request(prompt)
+        else:
+            # 同步模型在线程中执行，同样受信号量限制
+            translation, status = await asyncio.to_thread(self.model.make_request, prompt)
+        self._record_request(prompt, translation, status, time.perf_counter() - started)
+        results = self._split_response(segments, translation, status)
+        if results is None:
+            results = []
+            for segment in segments:
+                results.extend(await self._request_model_async(tasks, [segment], target_language, references))
+            return results
+        self._store_cache(prompt, target_language, translation, status)
+        return results
+
+    def _record_request(self, prompt: str, translation: Optional[str], status: bool, seconds: float = 0.0):
+        """记录一次请求及其耗时；translation 为 None 表示命中缓存。token 数按 estimate_tokens 估算。"""
+        model_name = self.model.get_model_name()
+        if translation is None:
+            REQUESTS.inc(model=model_name, status='cached')
+        else:
+            REQUESTS.inc(model=model_name, status='ok' if status else 'failed')
+            REQUEST_SECONDS.observe(seconds, model=model_name, status='ok' if status else 'failed')
+        with self._stats_lock:
+            if translation is None:
+                self.stats['cached_requests'] += 1
+                return
+            self.stats['requests'] += 1
+            self.stats['prompt_tokens'] += estimate_tokens(prompt)
+            if status:
+                self.stats['completion_tokens'] += estimate_tokens(translation)
+            else:
+                self.stats['failed_requests'] += 1
+
+    def _lookup_cache(self, prompt: str, target_language: str) -> Optional[str]:
+        if self.cache is None:
+            return None
+        return self.cache.get(prompt, self.model.get_model_name(), target_language)
+
+    def _store_cache(self, prompt: str, target_language: str, translation: str, status: bool):
+        # 只缓存成功的翻译，失败的请求下次运行时重新发送
+        if self.cache is not None and status:
+            self.cache.put(prompt, self.model.get_model_name(), target_language, translation)
+
+    def _log_cache_stats(self):
+        if self.cache is not None:
+            LOG.info(f"Translation cache stats: {self.cache.stats()}")
+        if self.memory is not None:
+            LOG.info(f"Translation memory stats: {self.memory.stats()}")
     
         
 
 
+
 # 以下代码为初期调试时用，后续可删除
 """         # [GUI新增]收集所有页面的翻译内容
         translated_textsforgui = []
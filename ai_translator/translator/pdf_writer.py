@@ -0,0 +1,119 @@
+import os
+from reportlab.platypus import Image #增加Image模块导入
+from reportlab.lib import colors, pagesizes, units
+from reportlab.lib.units import inch #增加inch单位导入
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import (
+    SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
+)
+
+from book import ContentType, Page
+from utils import LOG
+
+
+class PDFPageWriter:
+    """reportlab 需要完整的 story 才能排版，因此逐页只生成 flowable，close 时统一输出。"""
+
+    def __init__(self, pdf_file_path: str, output_file_path: str = None):
+        if output_file_path is None:
+            output_file_path = pdf_file_path.replace('.pdf', f'_translated.pdf')
+        self.output_file_path = output_file_path
+
+        LOG.info(f"pdf_file_path: {pdf_file_path}")
+        LOG.info(f"开始翻译: {output_file_path}")
+
+        # Register Chinese font
+        font_path = "../fonts/simsun.ttc"  # 请将此路径替换为您的字体文件路径
+        pdfmetrics.registerFont(TTFont("SimSun", font_path))
+
+        # Create a new ParagraphStyle with the SimSun font
+        self.simsun_style = ParagraphStyle('SimSun', fontName='SimSun', fontSize=12, leading=14)
+
+        # Create a PDF document
+        self.doc = SimpleDocTemplate(output_file_path, pagesize=pagesizes.A4)
+        self.story = []
+
+        # Define maximum image size based on the document's page size and margins
+        self.max_image_width = self.doc.width
+        self.max_image_height = self.doc.height
+        self.page_count = 0
+
+    def write_page(self, page: Page):
+        # Add a page break between pages
+        if self.page_count > 0:
+            self.story.append(PageBreak())
+        self.page_count += 1
+
+        for content in page.contents:
+            if content.status:
+                if content.content_type == ContentType.TEXT:
+                    # Add translated text to the PDF
+                    text = content.translation
+                    para = Paragraph(text, self.simsun_style)
+                    self.story.append(para)
+
+                elif content.content_type == ContentType.TABLE:
+                    # Add table to the PDF
+                    table = content.translation
+
+                    if table.empty:
+                        # 处理空表格的情况，例如跳过或添加一个占位符
+                        LOG.warning(f"空的表格在PDF中被忽略: {content}")
+                        continue
+                    
+                    # 假设 'table' 是一个DataFrame
+                    table_data = table.values.tolist()
+                    if not table_data or not isinstance(table_data[0], (list, tuple)):
+                       # 如果 'table_data' 是空的或不是二维列表
+                       LOG.error("表格数据不是有效的二维列表格式。")
+                       continue  # 或者其他错误处理
+
+                    table_style = TableStyle([
+                        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                        ('FONTNAME', (0, 0), (-1, 0), 'SimSun'),  # 更改表头字体为 "SimSun"
+                        ('FONTSIZE', (0, 0), (-1, 0), 14),
+                        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                        ('FONTNAME', (0, 1), (-1, -1), 'SimSun'),  # 更改表格中的字体为 "SimSun"
+                        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+                    ])
+                    pdf_table = Table(table.values.tolist())
+                    pdf_table.setStyle(table_style)
+                    self.story.append(pdf_table)
+                
+                # 【新增】图像类型判断     
+                elif content.content_type == ContentType.IMAGE:
+                    image_path = content.original
+                    if os.path.isfile(image_path):
+                        img = Image(image_path)
+
+                        # 获取图片原始大小
+                        img_width, img_height = img.drawWidth, img.drawHeight
+                        aspect_ratio = img_height / img_width
+
+                        # 调整图片大小以适应最大尺寸
+                        if img_width > self.max_image_width or img_height > self.max_image_height:
+                            if (self.max_image_width / img_width) < (self.max_image_height / img_height):
+                                img_width = self.max_image_width
+                                img_height = img_width * aspect_ratio
+                            else:
+                                img_height = self.max_image_height
+                                img_width = img_height / aspect_ratio
+
+                        img.drawWidth = img_width
+                        img.drawHeight = img_height
+
+                        self.story.append(img)
+                        LOG.info(f"Image added to story: {image_path}")
+                    else:
+                        LOG.error(f"Image file not found: {image_path}")
+
+    def close(self):
+        # Save the translated book as a new PDF file
+        self.doc.build(self.story)
+        LOG.info(f"翻译完成: {self.output_file_path}")
+        return self.output_file_path # 为api.py增加返回值
@@ -0,0 +1,52 @@
+import queue
+import threading
+from typing import Iterable, Iterator
+
+_DONE = object()
+
+
+class _Failure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable, maxsize: int) -> Iterator:
+    """在后台线程中迭代 iterable，通过容量为 maxsize 的队列把元素交给调用方。
+
+    生产者最多领先消费者 maxsize 个元素；生产者抛出的异常会在消费端重新抛出，
+    消费端提前退出时生产者线程也会随之停止。
+    """
+    items = queue.Queue(maxsize=max(1, maxsize))
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_Failure(e))
+            return
+        put(_DONE)
+
+    producer = threading.Thread(target=produce, name='pipeline-prefetch', daemon=True)
+    producer.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
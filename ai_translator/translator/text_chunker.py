@@ -0,0 +1,100 @@
+import re
+from collections import namedtuple
+from typing import List, Tuple
+
+from utils import estimate_tokens
+
+# 一个请求中的一段待翻译文本：task_idx 指向 PDFTranslator 收集的内容块，part_idx 为该内容块被切分后的序号
+Segment = namedtuple('Segment', ['task_idx', 'part_idx', 'text'])
+
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?。！？;；])\s+")
+# 以句末标点（可带右引号、右括号）结尾的行视为段落结尾
+_PARAGRAPH_END_PATTERN = re.compile(r"[.!?:。！？：…][\"'”’)）\]]*$")
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """把 PDFParser 提取的按版面折行的文本合并为段落。
+
+    以句末标点结尾的行或明显短于最长行的行（标题、段落最后一行、页码）结束一个段落，段内各行以空格连接。
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return []
+    short_line = 0.7 * max(len(line) for line in lines)
+    paragraphs, current = [], []
+    for line in lines:
+        current.append(line)
+        if _PARAGRAPH_END_PATTERN.search(line) or len(line) < short_line:
+            paragraphs.append(" ".join(current))
+            current = []
+    if current:
+        paragraphs.append(" ".join(current))
+    return paragraphs
+
+
+class TextChunker:
+    """把文本内容块切分或合并为不超过 token_budget 的请求。
+
+    过长的内容块按行（必要时按句子）切分为多段；较短的相邻内容块合并到同一个请求中，
+    由 Model.make_batch_prompt 用分段标记拼接，译文再按标记拆回原来的内容块。
+    """
+
+    def __init__(self, token_budget: int = 1500):
+        self.token_budget = token_budget
+
+    def split(self, text: str) -> List[str]:
+        if estimate_tokens(text) <= self.token_budget:
+            return [text]
+
+        pieces = []
+        current_lines, current_tokens = [], 0
+        for line in self._split_long_units(text.splitlines()):
+            line_tokens = estimate_tokens(line)
+            if current_lines and current_tokens + line_tokens > self.token_budget:
+                pieces.append("\n".join(current_lines))
+                current_lines, current_tokens = [], 0
+            current_lines.append(line)
+            current_tokens += line_tokens
+        if current_lines:
+            pieces.append("\n".join(current_lines))
+        return pieces
+
+    def _split_long_units(self, lines: List[str]) -> List[str]:
+        """把超过预算的单行先按句子、再按字符硬切分。"""
+        units = []
+        for line in lines:
+            if estimate_tokens(line) <= self.token_budget:
+                units.append(line)
+                continue
+            for sentence in _SENTENCE_END_PATTERN.split(line):
+                while estimate_tokens(sentence) > self.token_budget:
+                    # 按估算比例截断，至少保留一个字符以保证循环前进
+                    cut = max(1, len(sentence) * self.token_budget // estimate_tokens(sentence))
+                    units.append(sentence[:cut])
+                    sentence = sentence[cut:]
+                if sentence:
+                    units.append(sentence)
+        return units
+
+    def plan(self, texts: List[Tuple[int, str]]) -> List[List[Segment]]:
+        """把按顺序排列的 (task_idx, text) 切分、打包为请求，每个请求是一组 Segment。"""
+        return self.pack([
+            Segment(task_idx, part_idx, piece)
+            for task_idx, text in texts
+            for part_idx, piece in enumerate(self.split(text))
+        ])
+
+    def pack(self, segments: List[Segment]) -> List[List[Segment]]:
+        """按顺序把已切分好的 Segment 打包为不超过 token_budget 的请求。"""
+        requests = []
+        current, current_tokens = [], 0
+        for segment in segments:
+            segment_tokens = estimate_tokens(segment.text)
+            if current and current_tokens + segment_tokens > self.token_budget:
+                requests.append(current)
+                current, current_tokens = [], 0
+            current.append(segment)
+            current_tokens += segment_tokens
+        if current:
+            requests.append(current)
+        return requests
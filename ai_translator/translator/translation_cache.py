@@ -0,0 +1,140 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from utils import LOG
+from utils.metrics import CACHE_LOOKUPS
+
+
+class TranslationCache:
+    """基于 SQLite 的持久化翻译缓存。
+
+    键为 prompt、模型名称和目标语言的 SHA-256 摘要，超出条目数或总大小上限时按最近最少使用（LRU）淘汰。
+    """
+
+    def __init__(self, cache_path: str, max_entries: int = 100000, max_size_mb: float = 512):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb else None
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir and not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+        # 翻译线程池中的多个线程共享同一个连接，由 self._lock 串行化访问
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            "key TEXT PRIMARY KEY, model TEXT, target_language TEXT, "
+            "translation TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_last_access ON translations (last_access)")
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, target_language: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model_name, target_language, prompt):
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, prompt: str, model_name: str, target_language: str) -> Optional[str]:
+        key = self.make_key(prompt, model_name, target_language)
+        with self._lock:
+            row = self._conn.execute("SELECT translation FROM translations WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                CACHE_LOOKUPS.inc(cache='translation', result='miss')
+                return None
+            self._conn.execute("UPDATE translations SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+            CACHE_LOOKUPS.inc(cache='translation', result='hit')
+            return row[0]
+
+    def put(self, prompt: str, model_name: str, target_language: str, translation: str):
+        key = self.make_key(prompt, model_name, target_language)
+        size = len(translation.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, model, target_language, translation, size, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, target_language, translation, size, time.time())
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """删除最久未使用的条目，直到条目数和总大小都不超过上限。调用方需持有 self._lock。"""
+        entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations").fetchone()
+        if self.max_entries and entries > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY last_access LIMIT ?)",
+                (entries - self.max_entries,)
+            )
+            total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM translations").fetchone()[0]
+
+        if self.max_bytes and total_bytes > self.max_bytes:
+            excess = total_bytes - self.max_bytes
+            stale_keys = []
+            for key, size in self._conn.execute("SELECT key, size FROM translations ORDER BY last_access"):
+                stale_keys.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            self._conn.executemany("DELETE FROM translations WHERE key = ?", stale_keys)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+        LOG.info(f"Translation cache cleared: {self.cache_path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM translations").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": total_bytes,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_translation_cache(args, config) -> Optional[TranslationCache]:
+    """根据命令行参数和 config.yaml 中的 cache 配置创建缓存，未启用时返回 None。"""
+    cache_config = config.get('cache') or {}
+    # args 为 None 时（例如 API 应用工厂）只按配置文件决定
+    cache_flag = getattr(args, 'cache', False)
+    no_cache = getattr(args, 'no_cache', False)
+    clear_cache = getattr(args, 'clear_cache', False)
+    enabled = (cache_flag or cache_config.get('enabled', False)) and not no_cache
+    if not enabled and not clear_cache:
+        return None
+
+    cache = TranslationCache(
+        cache_config.get('path', 'cache/translations.sqlite3'),
+        max_entries=cache_config.get('max_entries', 100000),
+        max_size_mb=cache_config.get('max_size_mb', 512),
+    )
+    if clear_cache:
+        cache.clear()
+    if not enabled:
+        cache.close()
+        return None
+    return cache
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from collections import namedtuple
+from typing import Dict, List, Optional, Tuple
+
+from utils import LOG
+from utils.metrics import CACHE_LOOKUPS
+
+# 数字（含小数点、千分位），日期和版本号由多个数字组成
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+# MinHash 排列参数的固定种子，修改后已有的签名和分桶全部失效
+_MINHASH_SEED = b"ai_translator.translation_memory.v1"
+_MAX_CANDIDATES = 100
+
+# lookup 的结果：translation 为可直接复用的译文（没有时为 None），references 为相似分段的 (原文, 译文)
+MemoryMatch = namedtuple('MemoryMatch', ['translation', 'references'])
+
+
+def normalize(text: str) -> str:
+    """合并空白，并把数字替换为 #：只差数字、日期或空白的分段得到相同的模板。保留大小写，模板相同即直接复用译文。"""
+    return _NUMBER_PATTERN.sub("#", _WHITESPACE_PATTERN.sub(" ", text).strip())
+
+
+def substitute_numbers(source: str, translation: str, text: str) -> Optional[str]:
+    """把 source 的译文改写为 text 的译文：按顺序把 source 中的数字替换为 text 中对应的数字。
+
+    数字个数不同、同一个数字对应多个新值、或需要替换的数字没有原样出现在译文中时返回 None。
+    """
+    old_numbers, new_numbers = _NUMBER_PATTERN.findall(source), _NUMBER_PATTERN.findall(text)
+    if len(old_numbers) != len(new_numbers):
+        return None
+    replacements: Dict[str, str] = {}
+    for old, new in zip(old_numbers, new_numbers):
+        if replacements.setdefault(old, new) != new:
+            return None
+    replacements = {old: new for old, new in replacements.items() if old != new}
+    if not replacements:
+        return translation
+    translated_numbers = set(_NUMBER_PATTERN.findall(translation))
+    if not set(replacements) <= translated_numbers:
+        return None
+    return _NUMBER_PATTERN.sub(lambda match: replacements.get(match.group(0), match.group(0)), translation)
+
+
+def _template_hash(template: str) -> str:
+    return hashlib.sha1(template.encode('utf-8')).hexdigest()
+
+
+class MinHasher:
+    """字符 n-gram 的 MinHash 签名，两个签名相同位置取值相等的比例是 Jaccard 相似度的无偏估计。"""
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5):
+        import numpy as np
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # 乘法-移位哈希 h(x) = (a * x + b) >> 32，a 为奇数
+        seed = hashlib.sha256(_MINHASH_SEED).digest()
+        rng = np.random.default_rng(int.from_bytes(seed[:8], 'little'))
+        self._a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, template: str) -> set:
+        if len(template) <= self.shingle_size:
+            return {template}
+        return {template[idx:idx + self.shingle_size] for idx in range(len(template) - self.shingle_size + 1)}
+
+    def signature(self, shingles: set):
+        import numpy as np
+        hashes = np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        with np.errstate(over='ignore'):
+            permuted = (hashes[:, None] * self._a + self._b) >> np.uint64(32)
+        return permuted.min(axis=0).astype(np.uint32)
+
+
+class TranslationMemory:
+    """基于 MinHash LSH 的翻译记忆，在调用模型前查找以前翻译过的相似分段。
+
+    每个分段按模板（见 normalize）保存一条 原文 -> 译文：
+
+    - 模板相同（只差数字、日期或空白，大小写也相同）且数字可以一一替换（见 substitute_numbers）时直接复用译文；
+    - 否则按 MinHash LSH 查找相似的分段：签名分为 bands 段，每段的哈希作为分桶保存在 SQLite 的索引中，
+      查询只读取与新分段至少有一段签名相同的候选，与记忆的大小基本无关。字符 n-gram（不区分大小写）的 Jaccard 相似度
+      不低于 reference_threshold 的候选作为参考译文加入 prompt，不直接复用：长段落中改动一个词的相似度也很高；
+    - 其余视为未命中。
+    """
+
+    def __init__(self, memory_path: str, reference_threshold: float = 0.6, max_references: int = 2,
+                 num_perm: int = 64, bands: int = 16, shingle_size: int = 5):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+        self.memory_path = memory_path
+        self.reference_threshold = reference_threshold
+        self.max_references = max_references
+        self.bands = bands
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.reused = 0
+        self.referenced = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        memory_dir = os.path.dirname(memory_path)
+        if memory_dir and not os.path.isdir(memory_dir):
+            os.makedirs(memory_dir)
+
+        self._conn = sqlite3.connect(memory_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            "id INTEGER PRIMARY KEY, target_language TEXT NOT NULL, template_hash TEXT NOT NULL, "
+            "source TEXT NOT NULL, translation TEXT NOT NULL, signature BLOB NOT NULL, "
+            "UNIQUE (target_language, template_hash))"
+        )
+        # 分桶键已包含目标语言和段号，查询只需要一个索引
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS lsh_buckets (bucket INTEGER NOT NULL, segment_id INTEGER NOT NULL, "
+            "PRIMARY KEY (bucket, segment_id)) WITHOUT ROWID"
+        )
+        self._conn.commit()
+
+    def _buckets(self, signature, target_language: str) -> List[int]:
+        rows = len(signature) // self.bands
+        buckets = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(signature[band * rows:(band + 1) * rows].tobytes(), digest_size=8, key=f"{target_language}:{band}".encode('utf-8')[:64])
+            buckets.append(int.from_bytes(digest.digest(), 'little', signed=True))
+        return buckets
+
+    def lookup(self, text: str, target_language: str) -> MemoryMatch:
+        import numpy as np
+        template = normalize(text)
+        with self._lock:
+            exact = self._conn.execute(
+                "SELECT source, translation FROM segments WHERE target_language = ? AND template_hash = ?",
+                (target_language, _template_hash(template))
+            ).fetchone()
+        # 旧版本的模板不区分大小写，再核对一次原文的模板
+        if exact is not None and normalize(exact[0]) == template:
+            reused = substitute_numbers(exact[0], exact[1], text)
+            if reused is not None:
+                with self._lock:
+                    self.reused += 1
+                CACHE_LOOKUPS.inc(cache='memory', result='hit')
+                return MemoryMatch(reused, [])
+
+        # 相似度不区分大小写，只用于选择参考译文
+        shingles = self.hasher.shingles(template.lower())
+        signature = self.hasher.signature(shingles)
+        buckets = self._buckets(signature, target_language)
+        with self._lock:
+            # 相同分桶越多的候选越相似，常见措辞的分桶很大时只取共享分桶最多的 _MAX_CANDIDATES 个
+            candidate_ids = [row[0] for row in self._conn.execute(
+                f"SELECT segment_id FROM lsh_buckets WHERE bucket IN ({','.join('?' * len(buckets))}) "
+                f"GROUP BY segment_id ORDER BY COUNT(*) DESC LIMIT {_MAX_CANDIDATES}", buckets
+            )]
+            candidates = self._conn.execute(
+                f"SELECT source, translation, signature FROM segments WHERE id IN ({','.join('?' * len(candidate_ids))})", candidate_ids
+            ).fetchall() if candidate_ids else []
+
+        # 先用签名估计相似度筛选，再对最相近的几个计算准确的 Jaccard 相似度
+        estimated = sorted(
+            ((float(np.mean(np.frombuffer(candidate_signature, dtype=np.uint32) == signature)), source, translation)
+             for source, translation, candidate_signature in candidates),
+            key=lambda item: item[0], reverse=True,
+        )
+        scored = []
+        for estimate, source, translation in estimated[:max(self.max_references, 1) * 4]:
+            if estimate < self.reference_threshold / 2:
+                break
+            candidate_shingles = self.hasher.shingles(normalize(source).lower())
+            similarity = len(shingles & candidate_shingles) / len(shingles | candidate_shingles)
+            scored.append((similarity, source, translation))
+        scored.sort(key=lambda item: item[0], reverse=True)
+
+        references = [(source, translation) for similarity, source, translation in scored if similarity >= self.reference_threshold][:self.max_references]
+        with self._lock:
+            if references:
+                self.referenced += 1
+            else:
+                self.misses += 1
+        CACHE_LOOKUPS.inc(cache='memory', result='reference' if references else 'miss')
+        return MemoryMatch(None, references)
+
+    def add(self, text: str, translation: str, target_language: str):
+        """保存一个分段的译文；模板相同的分段只保留最新的一条。"""
+        self.add_many([(text, translation)], target_language)
+
+    def add_many(self, pairs: List[Tuple[str, str]], target_language: str):
+        rows = []
+        for text, translation in pairs:
+            template = normalize(text)
+            if not template:
+                continue
+            signature = self.hasher.signature(self.hasher.shingles(template.lower()))
+            rows.append((_template_hash(template), text, translation, signature))
+        if not rows:
+            return
+        with self._lock:
+            for template_hash, text, translation, signature in rows:
+                self._conn.execute(
+                    "INSERT INTO segments (target_language, template_hash, source, translation, signature) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (target_language, template_hash) DO UPDATE SET source = excluded.source, translation = excluded.translation",
+                    (target_language, template_hash, text, translation, signature.tobytes())
+                )
+                segment_id = self._conn.execute(
+                    "SELECT id FROM segments WHERE target_language = ? AND template_hash = ?", (target_language, template_hash)
+                ).fetchone()[0]
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO lsh_buckets (bucket, segment_id) VALUES (?, ?)",
+                    [(bucket, segment_id) for bucket in self._buckets(signature, target_language)]
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM segments")
+            self._conn.execute("DELETE FROM lsh_buckets")
+            self._conn.commit()
+        LOG.info(f"Translation memory cleared: {self.memory_path}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+        lookups = self.reused + self.referenced + self.misses
+        return {
+            "reused": self.reused,
+            "referenced": self.referenced,
+            "misses": self.misses,
+            "reuse_rate": self.reused / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_translation_memory(args, config) -> Optional[TranslationMemory]:
+    """根据命令行参数和 config.yaml 中的 translation_memory 配置创建翻译记忆，未启用时返回 None。"""
+    memory_config = config.get('translation_memory') or {}
+    enabled = getattr(args, 'translation_memory', False) or memory_config.get('enabled', False)
+    if not enabled or getattr(args, 'no_translation_memory', False):
+        return None
+    return TranslationMemory(
+        memory_config.get('path', 'cache/memory.sqlite3'),
+        reference_threshold=memory_config.get('reference_threshold', 0.6),
+        max_references=memory_config.get('max_references', 2),
+    )
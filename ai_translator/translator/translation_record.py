@@ -0,0 +1,87 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from utils import LOG
+
+# 记录格式的版本，格式变化时递增，旧记录自然失效
+FORMAT_VERSION = 1
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+class TranslationRecord:
+    """段落级的译文记录，用于增量翻译文档的修订版。
+
+    增量模式下文本按段落（表格按整表）翻译，每次成功翻译后把 段落指纹 -> 译文 写入 JSONL 记录。
+    翻译新版本时先从上一版的记录中查找，只有新增或修改过的段落才发送给模型。
+    指纹忽略空白的差异，与段落所在的页码、位置无关，插入内容导致的重新分页不影响复用。
+    """
+
+    def __init__(self, target_language: str, translations: Optional[Dict[str, str]] = None):
+        self.target_language = target_language
+        # 上一版记录中的译文，只读
+        self.previous = translations or {}
+        # 本次翻译用到的全部译文（复用的和新翻译的），保存为新记录，上一版中已删除的段落不再保留
+        self.current: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def default_path(pdf_file_path: str, target_language: str) -> str:
+        language_tag = hashlib.sha1(target_language.encode('utf-8')).hexdigest()[:8]
+        return f"{os.path.splitext(pdf_file_path)[0]}_translated.{language_tag}.record.jsonl"
+
+    @staticmethod
+    def fingerprint(text: str) -> str:
+        return hashlib.sha1(_WHITESPACE_PATTERN.sub(" ", text).strip().encode('utf-8')).hexdigest()
+
+    @classmethod
+    def load(cls, record_path: Optional[str], target_language: str) -> "TranslationRecord":
+        """读取记录，文件不存在、格式版本或目标语言不匹配时返回空记录。"""
+        translations = {}
+        if record_path and os.path.isfile(record_path):
+            with open(record_path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline() or 'null')
+                if header != {"format": FORMAT_VERSION, "target_language": target_language}:
+                    LOG.warning(f"Translation record {record_path} was written for another target language or format, ignoring it")
+                else:
+                    for line in f:
+                        entry = json.loads(line)
+                        translations[entry["fingerprint"]] = entry["translation"]
+            LOG.info(f"Loaded {len(translations)} translated segments from {record_path}")
+        elif record_path:
+            LOG.info(f"No previous translation record at {record_path}, translating everything")
+        return cls(target_language, translations)
+
+    def lookup(self, text: str) -> Optional[str]:
+        fingerprint = self.fingerprint(text)
+        translation = self.previous.get(fingerprint)
+        if translation is not None:
+            with self._lock:
+                self.current[fingerprint] = translation
+        return translation
+
+    def keep(self, text: str):
+        """把上一版中 text 的译文（如果有）保留到新记录中。"""
+        self.lookup(text)
+
+    def add(self, text: str, translation: str):
+        with self._lock:
+            self.current[self.fingerprint(text)] = translation
+
+    def save(self, record_path: str):
+        """先写临时文件再替换，写入中断时保留原有记录。"""
+        record_dir = os.path.dirname(record_path)
+        if record_dir and not os.path.isdir(record_dir):
+            os.makedirs(record_dir)
+        tmp_path = f"{record_path}.tmp"
+        with self._lock:
+            entries = sorted(self.current.items())
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({"format": FORMAT_VERSION, "target_language": self.target_language}, ensure_ascii=False) + '\n')
+            for fingerprint, translation in entries:
+                f.write(json.dumps({"fingerprint": fingerprint, "translation": translation}, ensure_ascii=False) + '\n')
+        os.replace(tmp_path, record_path)
+        LOG.info(f"Translation record with {len(entries)} segments written to {record_path}")
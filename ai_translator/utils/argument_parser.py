@@ -10,16 +10,53 @@ class ArgumentParser:
         self.parser.add_argument('--api', action='store_true', help='启动 API 服务')
 
         self.parser.add_argument('--config', type=str, default='config.yaml', help='Configuration file with model and API settings.')
-        self.parser.add_argument('--model_type', type=str, required=True, choices=['GLMModel', 'OpenAIModel'], help='The type of translation model to use. Choose between "GLMModel" and "OpenAIModel".')        
+        self.parser.add_argument('--model_type', type=str, help='The translation model backend: "OpenAIModel", "GLMModel" or "MockModel" (offline, see the "MockModel" section of the config file). Defaults to model_type in the config file.')
         self.parser.add_argument('--glm_model_url', type=str, help='The URL of the ChatGLM model URL.')
         self.parser.add_argument('--timeout', type=int, help='Timeout for the API request in seconds.')
         self.parser.add_argument('--openai_model', type=str, help='The model name of OpenAI Model. Required if model_type is "OpenAIModel".')
         self.parser.add_argument('--openai_api_key', type=str, help='The API key for OpenAIModel. Required if model_type is "OpenAIModel".')
         self.parser.add_argument('--book', type=str, help='PDF file to translate.')
         self.parser.add_argument('--file_format', type=str, help='The file format of translated book. Now supporting PDF and Markdown')
+        self.parser.add_argument('--use_async', action='store_true', help='Use the asyncio model backend and translate_pdf_async.')
+        self.parser.add_argument('--cache', action='store_true', help='Enable the persistent translation cache (see the "cache" section of the config file).')
+        self.parser.add_argument('--no_cache', action='store_true', help='Bypass the translation cache even if it is enabled in the config file.')
+        self.parser.add_argument('--no_parse_cache', action='store_true', help='Parse the PDF again even if the parse cache (see the "parse_cache" section of the config file) is enabled.')
+        self.parser.add_argument('--translation_memory', action='store_true', help='Enable the fuzzy translation memory (see the "translation_memory" section of the config file): reuse translations of segments that differ only by numbers or whitespace, and pass similar earlier translations to the model as reference.')
+        self.parser.add_argument('--no_translation_memory', action='store_true', help='Bypass the translation memory even if it is enabled in the config file.')
+        self.parser.add_argument('--clear_cache', action='store_true', help='Remove all entries from the translation cache before translating.')
+        self.parser.add_argument('--token_budget', type=int, help='Split or merge text contents into requests of at most this many (estimated) tokens. Disabled by default.')
+        self.parser.add_argument('--resume', action='store_true', help='Resume an interrupted translation from its checkpoint, only translating unfinished contents.')
+        self.parser.add_argument('--incremental', action='store_true', help='Translate paragraph by paragraph and keep a record of the translations; translating a revised version of the PDF then only sends new or edited paragraphs to the model.')
+        self.parser.add_argument('--previous_record', type=str, help='Incremental mode: translation record of the previous version (*.record.jsonl). Defaults to the record of the same PDF path. Implies --incremental.')
+        self.parser.add_argument('--detect_headers_footers', action='store_true', help='Detect headers, footers and page numbers repeated across pages and translate each of them once instead of on every page.')
+        self.parser.add_argument('--parse_workers', type=int, help='Number of processes used to parse the PDF. Defaults to 1.')
+        self.parser.add_argument('--streaming', action='store_true', help='Parse, translate and write page by page in a pipeline instead of materializing the whole book.')
+        self.parser.add_argument('--max_workers', type=int, help='Maximum number of concurrent translation requests. Defaults to 1 (serial).')
+        self.parser.add_argument('--target_language', type=str, help='Target language code (e.g. zh). Skips the interactive language prompt.')
+        self.parser.add_argument('--target_languages', type=str, nargs='+', help='Translate into several languages (codes, e.g. zh ja fr) from a single parse, writing <name>_translated.<code>.<ext> for each.')
+        self.parser.add_argument('--batch', type=str, nargs='+', help='Translate many PDFs: directories (searched recursively), glob patterns or manifest files with one path per line.')
+        self.parser.add_argument('--output_dir', type=str, help='Batch mode: directory for translated files. Defaults to next to each input.')
+        self.parser.add_argument('--batch_files', type=int, help='Batch mode: number of files parsed and translated at the same time.')
+        self.parser.add_argument('--force', action='store_true', help='Batch mode: translate files even if their output is newer than the input.')
+        self.parser.add_argument('--report', type=str, help='Batch mode: path of the JSON summary report. Defaults to batch_report.json in the output directory.')
+        self.parser.add_argument('--metrics', type=str, help='Write a JSON summary of the run metrics (request latency, tokens, retries, cache hits, parse and write times) to this file.')
 
     def parse_arguments(self):
         args = self.parser.parse_args()
+        if args.model_type:
+            from model import available_models
+            if args.model_type not in available_models():
+                self.parser.error(f"--model_type must be one of: {', '.join(available_models())}")
+        if args.target_languages and (args.target_language or args.batch or args.streaming or args.use_async):
+            self.parser.error("--target_languages cannot be combined with --target_language, --batch, --streaming or --use_async")
+        if args.previous_record:
+            args.incremental = True
+            if args.target_languages or args.batch:
+                self.parser.error("--previous_record applies to a single PDF and target language; --target_languages and --batch use the record next to each PDF")
+        if args.incremental and args.streaming:
+            self.parser.error("--incremental cannot be combined with --streaming")
+        if args.detect_headers_footers and args.streaming:
+            self.parser.error("--detect_headers_footers needs the whole book and cannot be combined with --streaming")
         if args.model_type == 'OpenAIModel' and not args.openai_model and not args.openai_api_key:
             self.parser.error("--openai_model and --openai_api_key is required when using OpenAIModel")
         return args
@@ -1,5 +1,20 @@
+import os
 import yaml
 
+# 可以用环境变量覆盖的配置项：环境变量名 -> (配置段, 配置项)，配置段为 None 表示顶层配置项
+ENV_OVERRIDES = {
+    'OPENAI_API_KEY': ('OpenAIModel', 'api_key'),
+    'AI_TRANSLATOR_OPENAI_MODEL': ('OpenAIModel', 'model'),
+    'AI_TRANSLATOR_GLM_MODEL_URL': ('GLMModel', 'model_url'),
+    'AI_TRANSLATOR_MODEL_TYPE': (None, 'model_type'),
+    'AI_TRANSLATOR_MAX_WORKERS': ('common', 'max_workers'),
+    'AI_TRANSLATOR_MAX_CONCURRENT_JOBS': ('api', 'max_concurrent_jobs'),
+    'AI_TRANSLATOR_JOBS_DIR': ('api', 'jobs_dir'),
+    'AI_TRANSLATOR_JOB_STORE': ('api', 'job_store'),
+    'AI_TRANSLATOR_CACHE_ENABLED': ('cache', 'enabled'),
+    'AI_TRANSLATOR_CACHE_PATH': ('cache', 'path'),
+}
+
 class ConfigLoader:
     def __init__(self, config_path):
         self.config_path = config_path
@@ -7,4 +22,18 @@ class ConfigLoader:
     def load_config(self):
         with open(self.config_path, "r") as f:
             config = yaml.safe_load(f)
-        return config
\ No newline at end of file
+        return apply_env_overrides(config)
+
+
+def apply_env_overrides(config, environ=None):
+    """用 ENV_OVERRIDES 中的环境变量覆盖配置，值按 YAML 语法解析（"4" 为整数，"true" 为布尔值）。"""
+    environ = os.environ if environ is None else environ
+    for env_name, (section, key) in ENV_OVERRIDES.items():
+        if env_name in environ:
+            if section is None:
+                config[key] = yaml.safe_load(environ[env_name])
+                continue
+            if config.get(section) is None:
+                config[section] = {}
+            config[section][key] = yaml.safe_load(environ[env_name])
+    return config
@@ -0,0 +1,215 @@
+import bisect
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# 默认的耗时分桶（秒），覆盖从本地缓存命中到长时间排队重试的请求
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in labels) + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: dict) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels_key(self, values: Tuple[str, ...]) -> str:
+        return ",".join(f"{name}={value}" for name, value in zip(self.labelnames, values))
+
+
+class Counter(_Metric):
+    """只增不减的计数器，例如请求数、token 数、累计等待秒数。"""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._label_values(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(list(zip(self.labelnames, key)))} {_format_value(value)}" for key, value in values]
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {self._labels_key(key): value for key, value in sorted(self._values.items())}
+
+
+class Histogram(_Metric):
+    """按分桶统计的分布，例如请求耗时；同时记录最小、最大值以便在摘要中给出近似分位数。"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 标签值 -> [各分桶计数（非累积）, 总和, 最小值, 最大值]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._label_values(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, value, value]
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] = min(state[2], value)
+            state[3] = max(state[3], value)
+
+    @contextmanager
+    def time(self, **labels):
+        """with histogram.time(...): 记录代码块的耗时（秒），代码块抛出异常时同样记录。"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(labels + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+    def summary(self) -> dict:
+        with self._lock:
+            values = sorted((key, (list(state[0]),) + tuple(state[1:])) for key, state in self._values.items())
+        result = {}
+        for key, (counts, total, minimum, maximum) in values:
+            count = sum(counts)
+            result[self._labels_key(key)] = {
+                "count": count,
+                "sum": round(total, 6),
+                "mean": round(total / count, 6),
+                "min": round(minimum, 6),
+                "p50": self._quantile(counts, count, 0.5, minimum, maximum),
+                "p95": self._quantile(counts, count, 0.95, minimum, maximum),
+                "max": round(maximum, 6),
+            }
+        return result
+
+    def _quantile(self, counts: List[int], count: int, q: float, minimum: float, maximum: float) -> float:
+        """由分桶线性插值得到的近似分位数，限制在实际的最小、最大值之间。"""
+        rank = q * count
+        cumulative = 0
+        for idx, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = self.buckets[idx - 1] if idx > 0 else minimum
+                upper = self.buckets[idx] if self.buckets[idx] != math.inf else maximum
+                value = lower + (upper - lower) * (rank - cumulative) / bucket_count
+                return round(min(max(value, minimum), maximum), 6)
+            cumulative += bucket_count
+        return round(maximum, 6)
+
+
+class MetricsRegistry:
+    """进程内的指标注册表，导出 Prometheus 文本格式（API 的 /metrics）和 JSON 摘要（命令行运行结束时）。
+
+    每个进程独立计数：gunicorn 多 worker 部署时 /metrics 只反映处理该次抓取的 worker。
+    """
+
+    def __init__(self, prefix: str = "ai_translator"):
+        self.prefix = prefix
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.prefix}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.prefix}_{name}", documentation, labelnames, buckets))
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict:
+        """各指标的 JSON 摘要，省略没有任何数据的指标。"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        result = {}
+        for metric in metrics:
+            values = metric.summary()
+            if values:
+                # 没有标签的指标直接给出其唯一的值
+                result[metric.name[len(self.prefix) + 1:]] = values if metric.labelnames else values[""]
+        return result
+
+    def write_summary(self, path: Optional[str] = None) -> dict:
+        """把摘要写入 path（为 None 时不写文件），并返回摘要。"""
+        summary = self.summary()
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
+
+
+METRICS = MetricsRegistry()
+
+# 翻译请求（不含命中缓存的请求），model 为 Model.get_model_name()，status 为 ok 或 failed
+REQUEST_SECONDS = METRICS.histogram("request_seconds", "Latency of translation requests sent to the model, including retries.", ("model", "status"))
+REQUESTS = METRICS.counter("requests_total", "Translation requests by result: ok, failed or cached.", ("model", "status"))
+# 来自 OpenAI 的 usage 字段（MockModel 为估算值），direction 为 prompt 或 completion
+TOKENS = METRICS.counter("tokens_total", "Tokens reported by the model API.", ("model", "direction"))
+RETRIES = METRICS.counter("retries_total", "Retried model requests by reason: rate_limit, status or connection.", ("model", "reason"))
+RATE_LIMIT_WAIT_SECONDS = METRICS.counter("rate_limit_wait_seconds_total", "Seconds spent waiting for the client-side rate limiter.", ("limiter",))
+CACHE_LOOKUPS = METRICS.counter("cache_lookups_total", "Cache lookups by cache (translation, parse or memory) and result (hit or miss; reference for similar translation memory matches).", ("cache", "result"))
+PARSE_PAGE_SECONDS = METRICS.histogram("parse_page_seconds", "Time to parse one PDF page.")
+WRITE_PAGE_SECONDS = METRICS.histogram("write_page_seconds", "Time to write one translated page; step=close covers the final layout and flush.", ("format", "step"))
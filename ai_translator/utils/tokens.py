@@ -0,0 +1,32 @@
+import re
+
+from utils.logger import LOG
+
+_CJK_PATTERN = re.compile(r"[　-ヿ㐀-䶿一-鿿가-힯＀-￯]")
+
+# tiktoken 编码器，第一次估算时才导入；False 表示 tiktoken 不可用
+_encoding = None
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except ImportError:  # tiktoken 是可选依赖，缺失时使用字符数估算
+            _encoding = False
+        except Exception as e:
+            # 首次使用时 tiktoken 需要下载编码表，离线或代理环境下失败时同样退回字符数估算，且不再重试
+            LOG.warning(f"tiktoken encoding unavailable ({e!r}), estimating tokens by character count")
+            _encoding = False
+    return _encoding
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的 token 数：安装了 tiktoken 时精确计算，否则按 CJK 字符 1 个 token、其他字符 4 个 1 个 token 估算。"""
+    encoding = _get_encoding()
+    if encoding:
+        return len(encoding.encode(text))
+    cjk_chars = len(_CJK_PATTERN.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
@@ -0,0 +1,11 @@
+# WSGI 入口，供 gunicorn 等应用服务器加载：在 ai_translator 目录下运行
+#   gunicorn -c gunicorn.conf.py wsgi:app
+# 配置文件由环境变量 AI_TRANSLATOR_CONFIG 指定，默认查找当前目录和项目根目录下的 config.yaml
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api import create_app
+
+app = create_app()
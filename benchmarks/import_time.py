@@ -0,0 +1,94 @@
+"""测量各运行模式的导入耗时。
+
+每个模式在独立的子进程中运行（避免模块缓存影响结果），重复 --repeat 次取中位数，
+同时用 `python -X importtime` 列出累计耗时最高的模块，便于定位新引入的重量级依赖。
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --repeat 10 --json import_time.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai_translator')
+
+# 与 main.py 各分支实际导入的模块保持一致
+MODES = {
+    'main': 'import main',
+    'cli': 'import main; from model import OpenAIModel; from translator import PDFTranslator',
+    'cli-markdown': 'import main; from model import OpenAIModel; from translator import PDFTranslator; from translator.writer import MarkdownPageWriter',
+    'cli-pdf': 'import main; from model import OpenAIModel; from translator import PDFTranslator; from translator.pdf_writer import PDFPageWriter',
+    'gui': 'import main; from model import OpenAIModel; from gui import GuiApp',
+    'api': 'import main; from model import OpenAIModel; from api import create_app',
+}
+
+TIMER = 'import time; _start = time.perf_counter(); {statement}; print(time.perf_counter() - _start)'
+
+
+def run_python(args, work_dir):
+    env = dict(os.environ, PYTHONPATH=PACKAGE_DIR, PYTHONDONTWRITEBYTECODE='')
+    # 在临时目录中运行，utils.logger 创建的 logs/ 目录不会落在仓库中
+    return subprocess.run([sys.executable, *args], cwd=work_dir, env=env, capture_output=True, text=True, check=True)
+
+
+def measure(statement, repeat, work_dir):
+    timings = []
+    for _ in range(repeat):
+        result = run_python(['-c', TIMER.format(statement=statement)], work_dir)
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def top_modules(statement, work_dir, limit):
+    """解析 -X importtime 的输出，返回累计耗时最高的顶层模块 [(模块, 毫秒)]。"""
+    result = run_python(['-X', 'importtime', '-c', statement], work_dir)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative_us, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        if not cumulative_us.isdigit():
+            continue
+        top_level = name.split('.')[0]
+        cumulative[top_level] = max(cumulative.get(top_level, 0), int(cumulative_us))
+    ranked = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)
+    return [(name, round(us / 1000, 1)) for name, us in ranked[:limit]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure import time of each ai_translator entry mode.')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES), help='Modes to measure.')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreter runs per mode.')
+    parser.add_argument('--top', type=int, default=8, help='Number of most expensive top-level modules to list.')
+    parser.add_argument('--json', type=str, help='Write the results to this JSON file.')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        # 先运行一次，生成 .pyc 缓存，避免第一次测量包含编译时间
+        run_python(['-c', MODES['api'] + '; ' + MODES['cli-pdf']], work_dir)
+        for mode in args.modes:
+            timings = measure(MODES[mode], args.repeat, work_dir)
+            results[mode] = {
+                'median_ms': round(statistics.median(timings) * 1000, 1),
+                'min_ms': round(min(timings) * 1000, 1),
+                'max_ms': round(max(timings) * 1000, 1),
+                'top_modules_ms': top_modules(MODES[mode], work_dir, args.top),
+            }
+
+    print(f"{'mode':<14}{'median ms':>11}{'min ms':>9}{'max ms':>9}  top modules (cumulative ms)")
+    for mode, result in results.items():
+        top = ', '.join(f"{name} {ms}" for name, ms in result['top_modules_ms'])
+        print(f"{mode:<14}{result['median_ms']:>11}{result['min_ms']:>9}{result['max_ms']:>9}  {top}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'modes': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
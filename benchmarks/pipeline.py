@@ -0,0 +1,315 @@
+"""端到端基准：在合成 PDF 上分别测量 解析 → 翻译 → 写入 各阶段的耗时、吞吐量和内存峰值。
+
+生成三类逐渐增大的合成 PDF（text：纯文本段落，table：每页一个表格，image：每页两张不同的图片），
+解析使用 PDFParser.parse_pdf，翻译使用模拟延迟的 MockModel（不访问网络），写入分别输出 Markdown 和 PDF。
+每个用例在独立的子进程中运行，内存峰值互不影响。结果写入 JSON，可以与之前版本的结果比较：
+
+    python benchmarks/pipeline.py --json pipeline.json
+    python benchmarks/pipeline.py --kinds text --sizes 10 50 --latency 0.02 --max_workers 16
+    python benchmarks/pipeline.py --json new.json --compare pipeline.json --threshold 0.2
+
+PDFPageWriter 从 ../fonts/simsun.ttc 加载中文字体，用 --font 指定字体文件后才测量 PDF 写入，否则该阶段记为 skipped。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai_translator')
+
+KINDS = ('text', 'table', 'image')
+STAGES = ('parse', 'translate', 'write_markdown', 'write_pdf')
+
+WORDS = (
+    'the old man was thin and gaunt with deep wrinkles in the back of his neck sea fish boy boat line '
+    'water sun morning current hand skiff harbour sail bait hook shark wind night stars village coffee'
+).split()
+
+
+# ---------------------------------------------------------------- 合成 PDF
+
+def make_sentence(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def make_paragraph(rng, sentences=6):
+    return ' '.join(make_sentence(rng, rng.randint(8, 16)) for _ in range(sentences))
+
+
+def generate_pdf(kind, pages, path, seed=0):
+    """生成 pages 页的合成 PDF，相同的参数总是得到相同的内容。"""
+    from reportlab.lib import colors, pagesizes
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Image, PageBreak, Paragraph, SimpleDocTemplate, Table, TableStyle
+
+    rng = random.Random(f"{kind}:{pages}:{seed}")
+    style = getSampleStyleSheet()['BodyText']
+    story = []
+    for page_idx in range(pages):
+        if kind == 'text':
+            story.extend(Paragraph(make_paragraph(rng), style) for _ in range(5))
+        elif kind == 'table':
+            story.append(Paragraph(make_sentence(rng), style))
+            rows = [['Item', 'Colour', 'Count', 'Price (USD)']]
+            rows += [[rng.choice(WORDS).capitalize(), rng.choice(WORDS), str(rng.randint(1, 99)), f"{rng.uniform(0.1, 9.9):.2f}"] for _ in range(15)]
+            table = Table(rows)
+            table.setStyle(TableStyle([('GRID', (0, 0), (-1, -1), 0.5, colors.black)]))
+            story.append(table)
+        elif kind == 'image':
+            story.append(Paragraph(make_paragraph(rng, 2), style))
+            for image_idx in range(2):
+                image_path = os.path.join(os.path.dirname(path), f"{kind}_{pages}_{page_idx}_{image_idx}.png")
+                make_image(rng, image_path)
+                story.append(Image(image_path, width=240, height=160))
+        else:
+            raise ValueError(f"Unknown kind: {kind}")
+        if page_idx < pages - 1:
+            story.append(PageBreak())
+    SimpleDocTemplate(path, pagesize=pagesizes.A4).build(story)
+
+
+def make_image(rng, path, size=(240, 160)):
+    """每张图片内容不同，避免 PDFParser 按图片哈希复用已提取的图片。"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', size, tuple(rng.randint(0, 255) for _ in range(3)))
+    draw = ImageDraw.Draw(image)
+    for _ in range(20):
+        x0, y0 = rng.randint(0, size[0]), rng.randint(0, size[1])
+        draw.rectangle([x0, y0, x0 + rng.randint(5, 60), y0 + rng.randint(5, 40)], fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    image.save(path)
+
+
+# ---------------------------------------------------------------- 内存
+
+def current_rss_mb():
+    """当前进程的常驻内存（MB），只在有 /proc 的系统上可用。"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError):
+        return None
+
+
+def max_rss_mb():
+    """进程启动以来的常驻内存峰值（MB）。"""
+    import resource
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+class RssSampler:
+    """后台线程定期采样常驻内存，记录每个阶段内的峰值。"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        rss = current_rss_mb()
+        if rss is not None:
+            self.peak = max(self.peak, rss)
+
+    def reset(self):
+        self.peak = 0.0
+        self.sample()
+
+    def start(self):
+        if current_rss_mb() is not None:
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+# ---------------------------------------------------------------- 单个用例（子进程中运行）
+
+def run_case(kind, pages, work_dir, settings):
+    sys.path.insert(0, PACKAGE_DIR)
+    from utils import LOG
+    # 日志输出会主导小文件的耗时，基准中只保留警告
+    LOG.remove()
+    LOG.add(sys.stderr, level='WARNING')
+    from model import MockModel
+    from translator import PDFTranslator
+    from translator.writer import Writer
+
+    pdf_path = os.path.join(work_dir, f"{kind}_{pages}.pdf")
+    sampler = RssSampler()
+    sampler.start()
+    stages = {}
+
+    def measure(stage, func, page_count, block_count):
+        sampler.reset()
+        started = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - started
+        sampler.sample()
+        stages[stage] = {
+            'status': 'ok',
+            'seconds': round(seconds, 4),
+            'pages_per_s': round(page_count / seconds, 2) if seconds else None,
+            'blocks_per_s': round(block_count / seconds, 2) if seconds else None,
+            'peak_rss_mb': round(sampler.peak, 1) if sampler.peak else None,
+        }
+        return result
+
+    translator = PDFTranslator(
+        MockModel(latency=settings['latency'], latency_jitter=settings['latency_jitter'], seed=settings['seed']),
+        max_workers=settings['max_workers'],
+        token_budget=settings['token_budget'],
+        image_resolution=settings['image_resolution'],
+    )
+    book = measure('parse', lambda: translator.pdf_parser.parse_pdf(pdf_path), pages, 0)
+    blocks = sum(len(page.contents) for page in book.pages)
+    # 解析阶段的 blocks/s 需要解析完成后才知道块数
+    stages['parse']['blocks_per_s'] = round(blocks / stages['parse']['seconds'], 2) if stages['parse']['seconds'] else None
+
+    measure('translate', lambda: translator._translate_book(book, 'Chinese'), pages, blocks)
+    stages['translate']['requests'] = translator.stats['requests']
+    stages['translate']['failed_requests'] = translator.stats['failed_requests']
+
+    writer = Writer()
+    measure('write_markdown', lambda: writer.save_translated_book(book, os.path.join(work_dir, f"{kind}_{pages}.md"), 'markdown'), pages, blocks)
+    # 与 PDFPageWriter 相同，相对于当前工作目录查找字体
+    if os.path.isfile(os.path.join('..', 'fonts', 'simsun.ttc')):
+        measure('write_pdf', lambda: writer.save_translated_book(book, os.path.join(work_dir, f"{kind}_{pages}_translated.pdf"), 'PDF'), pages, blocks)
+    else:
+        stages['write_pdf'] = {'status': 'skipped', 'reason': 'no font, pass --font'}
+    sampler.stop()
+
+    peak_rss = max([max_rss_mb()] + [stage['peak_rss_mb'] for stage in stages.values() if stage.get('peak_rss_mb')])
+    return {'kind': kind, 'pages': pages, 'blocks': blocks, 'peak_rss_mb': round(peak_rss, 1), 'stages': stages}
+
+
+# ---------------------------------------------------------------- 汇总与比较
+
+def print_results(cases):
+    print(f"{'case':<12}{'blocks':>7}  {'stage':<15}{'seconds':>9}{'pages/s':>10}{'blocks/s':>10}{'peak MB':>9}")
+    for case in cases:
+        name = f"{case['kind']}-{case['pages']}"
+        for stage in STAGES:
+            result = case['stages'].get(stage, {})
+            if result.get('status') != 'ok':
+                print(f"{name:<12}{case['blocks']:>7}  {stage:<15}{result.get('status', '-'):>9}")
+                continue
+            print(f"{name:<12}{case['blocks']:>7}  {stage:<15}{result['seconds']:>9}{result['pages_per_s']:>10}"
+                  f"{result['blocks_per_s']:>10}{result['peak_rss_mb'] or '-':>9}")
+        print(f"{name:<12}{'':>7}  {'process peak':<15}{'':>9}{'':>10}{'':>10}{case['peak_rss_mb']:>9}")
+
+
+def compare_results(cases, baseline, threshold):
+    """与基线结果比较各阶段耗时，返回超过 threshold（相对变慢比例）的 (用例, 阶段, 比值) 列表。"""
+    baseline_cases = {(case['kind'], case['pages']): case for case in baseline['cases']}
+    regressions = []
+    print(f"\n{'case':<12}{'stage':<15}{'baseline s':>11}{'current s':>11}{'ratio':>8}")
+    for case in cases:
+        old_case = baseline_cases.get((case['kind'], case['pages']))
+        if old_case is None:
+            continue
+        for stage in STAGES:
+            new, old = case['stages'].get(stage, {}), old_case['stages'].get(stage, {})
+            if new.get('status') != 'ok' or old.get('status') != 'ok' or not old['seconds']:
+                continue
+            ratio = new['seconds'] / old['seconds']
+            flag = '  REGRESSION' if ratio > 1 + threshold else ''
+            name = f"{case['kind']}-{case['pages']}"
+            print(f"{name:<12}{stage:<15}{old['seconds']:>11}{new['seconds']:>11}{ratio:>8.2f}{flag}")
+            if flag:
+                regressions.append((name, stage, round(ratio, 2)))
+    return regressions
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PACKAGE_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the parse, translate and write stages on synthetic PDFs.')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS), help='Kinds of synthetic PDF.')
+    parser.add_argument('--sizes', nargs='+', type=int, default=[5, 20, 80], help='Page counts of the synthetic PDFs.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Mean simulated seconds per translation request.')
+    parser.add_argument('--latency_jitter', type=float, default=0.01, help='Simulated latency varies by up to this many seconds.')
+    parser.add_argument('--max_workers', type=int, default=8, help='Concurrent translation requests.')
+    parser.add_argument('--token_budget', type=int, help='Batch text contents into requests of at most this many tokens.')
+    parser.add_argument('--image_resolution', type=int, help='DPI used to rasterize images while parsing.')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic content and simulated latency.')
+    parser.add_argument('--font', type=str, help='Font file for PDFPageWriter (simsun.ttc). The write_pdf stage is skipped without it.')
+    parser.add_argument('--json', type=str, help='Write the results to this JSON file.')
+    parser.add_argument('--compare', type=str, help='Baseline JSON file from an earlier run to compare stage times against.')
+    parser.add_argument('--threshold', type=float, default=0.2, help='With --compare: exit with status 1 if a stage is this much slower (0.2 = 20%%).')
+    parser.add_argument('--run_case', nargs=3, metavar=('KIND', 'PAGES', 'WORK_DIR'), help=argparse.SUPPRESS)
+    parser.add_argument('--result', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    settings = {key: getattr(args, key) for key in ('latency', 'latency_jitter', 'max_workers', 'token_budget', 'image_resolution', 'seed')}
+    if args.run_case:
+        kind, pages, work_dir = args.run_case
+        result = run_case(kind, int(pages), work_dir, settings)
+        with open(args.result, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        return
+
+    cases = []
+    with tempfile.TemporaryDirectory() as root:
+        # PDFPageWriter 按相对路径 ../fonts/simsun.ttc 查找字体，子进程的工作目录为 root/work
+        if args.font:
+            os.makedirs(os.path.join(root, 'fonts'))
+            os.symlink(os.path.abspath(args.font), os.path.join(root, 'fonts', 'simsun.ttc'))
+        for kind in args.kinds:
+            for pages in args.sizes:
+                work_dir = os.path.join(root, 'work', f"{kind}_{pages}")
+                os.makedirs(work_dir)
+                generate_pdf(kind, pages, os.path.join(work_dir, f"{kind}_{pages}.pdf"), args.seed)
+                result_path = os.path.join(work_dir, 'result.json')
+                command = [sys.executable, os.path.abspath(__file__), '--run_case', kind, str(pages), work_dir, '--result', result_path]
+                for key, value in settings.items():
+                    if value is not None:
+                        command += [f"--{key}", str(value)]
+                subprocess.run(command, cwd=os.path.join(root, 'work'), check=True)
+                with open(result_path, encoding='utf-8') as f:
+                    cases.append(json.load(f))
+                print(f"finished {kind}-{pages}", file=sys.stderr)
+
+    print_results(cases)
+    results = {
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': settings,
+        'cases': cases,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('settings') != settings:
+            print(f"\nWarning: baseline settings {baseline.get('settings')} differ from the current settings {settings}")
+        regressions = compare_results(cases, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} stage(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""翻译记忆基准：向 TranslationMemory 写入大量合成分段，测量写入吞吐量和查询延迟。
+
+查询分三类：只差数字的分段（应直接复用）、改动一个词的分段（应作为参考译文）和全新的分段（应未命中），
+分别统计延迟的 p50、p95 和各类结果的比例。已有的记忆文件可以重复使用，只补足缺少的分段：
+
+    python benchmarks/translation_memory.py --segments 100000
+    python benchmarks/translation_memory.py --segments 2000000 --memory /tmp/memory.sqlite3 --json memory.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+PACKAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai_translator')
+
+WORDS = (
+    'pump valve bolt gauge pressure filter hose seal motor bearing shaft housing cover panel switch relay fuse cable '
+    'inspect tighten replace check clean remove install adjust lubricate measure verify record drain fill start stop '
+    'daily weekly monthly before after during every each the a an of to with and or by for in on at from'
+).split()
+TARGET_LANGUAGE = '中文'
+
+
+def make_segment(rng, idx):
+    """每个分段的措辞不同（由 idx 决定），并带有几个数字。"""
+    words = [rng.choice(WORDS) for _ in range(rng.randint(12, 24))]
+    words.insert(rng.randint(0, len(words)), f"step {idx}")
+    words.insert(rng.randint(0, len(words)), f"{rng.randint(1, 500)} Nm")
+    return ' '.join(words).capitalize() + '.'
+
+
+def fill(memory, segments, batch_size=1000, seed=0):
+    rng = random.Random(seed)
+    existing = memory.stats()['entries']
+    started = time.perf_counter()
+    batch = []
+    for idx in range(segments):
+        segment = make_segment(rng, idx)
+        if idx < existing:
+            continue
+        batch.append((segment, f"译文 {segment}"))
+        if len(batch) >= batch_size:
+            memory.add_many(batch, TARGET_LANGUAGE)
+            batch = []
+    if batch:
+        memory.add_many(batch, TARGET_LANGUAGE)
+    added = max(0, segments - existing)
+    seconds = time.perf_counter() - started
+    return {'added': added, 'seconds': round(seconds, 3), 'segments_per_second': round(added / seconds, 1) if added and seconds else None}
+
+
+def make_queries(segments, queries, seed=0):
+    """从已写入的分段中抽样构造查询，附带期望的结果。"""
+    rng = random.Random(seed)
+    stored = {}
+    sample = set(rng.sample(range(segments), min(segments, queries * 2)))
+    regenerate = random.Random(seed)
+    for idx in range(segments):
+        segment = make_segment(regenerate, idx)
+        if idx in sample:
+            stored[idx] = segment
+        if len(stored) == len(sample):
+            break
+    picked = list(stored.values())
+    result = []
+    for number, segment in enumerate(picked[:queries]):
+        kind = ('numbers', 'edited', 'new')[number % 3]
+        if kind == 'numbers':
+            query = ' '.join(str(int(word) + 1) if word.isdigit() else word for word in segment.split())
+        elif kind == 'edited':
+            words = segment.split()
+            position = rng.randrange(len(words))
+            words[position] = 'replaced'
+            query = ' '.join(words)
+        else:
+            query = ' '.join(rng.choice(WORDS) for _ in range(20)) + ' unseen paragraph.'
+        result.append((kind, query))
+    return result
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--segments', type=int, default=100000, help='Number of segments in the memory.')
+    parser.add_argument('--queries', type=int, default=3000, help='Number of lookups to time.')
+    parser.add_argument('--memory', type=str, help='Memory file to create or reuse. Defaults to a temporary file.')
+    parser.add_argument('--json', type=str, help='Write the results to this JSON file.')
+    args = parser.parse_args()
+
+    sys.path.insert(0, PACKAGE_DIR)
+    from utils import LOG
+    LOG.remove()
+    from translator.translation_memory import TranslationMemory
+
+    memory_path = args.memory or os.path.join(tempfile.mkdtemp(prefix='memory-bench-'), 'memory.sqlite3')
+    memory = TranslationMemory(memory_path)
+    fill_result = fill(memory, args.segments)
+    print(f"filled {memory.stats()['entries']} segments ({fill_result['added']} added in {fill_result['seconds']}s)")
+
+    latencies = {'numbers': [], 'edited': [], 'new': []}
+    outcomes = {kind: {'reused': 0, 'referenced': 0, 'missed': 0} for kind in latencies}
+    for kind, query in make_queries(args.segments, args.queries):
+        started = time.perf_counter()
+        match = memory.lookup(query, TARGET_LANGUAGE)
+        latencies[kind].append((time.perf_counter() - started) * 1000)
+        outcome = 'reused' if match.translation is not None else 'referenced' if match.references else 'missed'
+        outcomes[kind][outcome] += 1
+
+    results = {
+        'segments': memory.stats()['entries'],
+        'size_mb': round(os.path.getsize(memory_path) / 1024 / 1024, 1),
+        'fill': fill_result,
+        'lookups': {
+            kind: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 0.5), 3),
+                'p95_ms': round(percentile(values, 0.95), 3),
+                **outcomes[kind],
+            }
+            for kind, values in latencies.items() if values
+        },
+    }
+    memory.close()
+    print(f"{'query':<10}{'p50 ms':>10}{'p95 ms':>10}{'reused':>10}{'referenced':>12}{'missed':>10}")
+    for kind, stats in results['lookups'].items():
+        print(f"{kind:<10}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['reused']:>10}{stats['referenced']:>12}{stats['missed']:>10}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
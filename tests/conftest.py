@@ -0,0 +1,9 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'ai_translator'))
+
+from utils import LOG  # noqa: E402
+
+# 测试不写 logs/translation.log
+LOG.remove()
@@ -0,0 +1,32 @@
+import pytest
+
+flask = pytest.importorskip("flask")
+
+from api import create_app  # noqa: E402
+from model import MockModel  # noqa: E402
+
+TEST_PDF = __file__.rsplit("/", 1)[0] + "/test.pdf"
+
+
+@pytest.fixture
+def client(tmp_path):
+    config = {
+        "common": {"file_format": "markdown"},
+        "api": {"jobs_dir": str(tmp_path / "jobs"), "job_store": str(tmp_path / "jobs.sqlite3"), "resume_unfinished": False},
+    }
+    app = create_app(config=config, model=MockModel(latency=0), cache=None)
+    yield app.test_client()
+    app.extensions["translation_service"].shutdown()
+
+
+def test_translate_pdf_uses_configured_file_format(client):
+    with open(TEST_PDF, "rb") as f:
+        response = client.post("/translate_pdf", data={"file": (f, "test.pdf"), "target_language": "zh"})
+    assert response.status_code == 200
+    assert response.mimetype == "text/markdown"
+
+
+def test_translate_pdf_rejects_unknown_file_format(client):
+    with open(TEST_PDF, "rb") as f:
+        response = client.post("/translate_pdf", data={"file": (f, "test.pdf"), "target_language": "zh", "file_format": "docx"})
+    assert response.status_code == 400
@@ -0,0 +1,62 @@
+from book import Book, Content, ContentType, Page
+from model import Model
+from translator import PDFTranslator
+from translator.checkpoint import TranslationCheckpoint
+
+
+class RecordingModel(Model):
+    def __init__(self):
+        self.texts = []
+
+    def make_request(self, prompt):
+        text = prompt.split("呈现:", 1)[-1]
+        self.texts.append(text)
+        return "译:" + text, True
+
+
+def make_book(originals):
+    book = Book("sample.pdf")
+    for page_originals in originals:
+        page = Page()
+        for original in page_originals:
+            page.add_content(Content(content_type=ContentType.TEXT, original=original))
+        book.add_page(page)
+    return book
+
+
+def test_resume_skips_completed_contents(tmp_path):
+    path = str(tmp_path / "sample.checkpoint.jsonl")
+    checkpoint = TranslationCheckpoint(path, "sample.pdf", "中文")
+    checkpoint.open(resume=False)
+    PDFTranslator(RecordingModel())._translate_book(make_book([["One.", "Two."], ["Three."]]), "中文", checkpoint)
+    checkpoint.close()
+    # 模拟进程在写入最后一条记录时中断
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"page": 1, "content"')
+
+    # 第二页的原文已修改，指纹不匹配的记录需要重新翻译
+    model = RecordingModel()
+    checkpoint = TranslationCheckpoint(path, "sample.pdf", "中文")
+    checkpoint.open(resume=True)
+    translations = PDFTranslator(model)._translate_book(make_book([["One.", "Two."], ["Three, revised."]]), "中文", checkpoint)
+    checkpoint.close()
+
+    assert model.texts == ["Three, revised."]
+    assert translations == ["译:One.", "译:Two.", "译:Three, revised."]
+    assert TranslationCheckpoint(path, "sample.pdf", "中文").load()[(1, 0)]["translation"] == "译:Three, revised."
+
+
+def test_checkpoint_of_another_language_is_ignored(tmp_path):
+    path = str(tmp_path / "sample.checkpoint.jsonl")
+    checkpoint = TranslationCheckpoint(path, "sample.pdf", "中文")
+    checkpoint.open(resume=False)
+    PDFTranslator(RecordingModel())._translate_book(make_book([["One."]]), "中文", checkpoint)
+    checkpoint.close()
+
+    model = RecordingModel()
+    checkpoint = TranslationCheckpoint(path, "sample.pdf", "日本語")
+    checkpoint.open(resume=True)
+    PDFTranslator(model)._translate_book(make_book([["One."]]), "日本語", checkpoint)
+    checkpoint.close()
+
+    assert model.texts == ["One."]
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+
+import pytest
+
+from model.async_glm_model import AsyncGLMModel
+from model.glm_model import GLMModel
+from model.glm_stub_server import make_server
+from model.mock_model import MockModel
+from model.rate_limiter import RetryPolicy
+
+PROMPT = "翻译为中文，将翻译结果按原文本格式呈现:The old man was thin and gaunt."
+
+
+@pytest.fixture
+def stub_url():
+    def start(**options):
+        server = make_server("127.0.0.1", 0, MockModel(model="glm-stub", latency=0, **options))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    servers = []
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def fast_retries(model, max_attempts=10):
+    # 限流时 Retry-After 为整秒，测试中把等待时间压缩到几毫秒
+    model.retry_policy = RetryPolicy(max_attempts=max_attempts, base_delay=0.001, max_delay=0.01)
+    return model
+
+
+def test_retries_server_errors(stub_url):
+    model = fast_retries(GLMModel(stub_url(error_rate=0.5, seed=1), timeout=5))
+    assert [model.make_request(f"{PROMPT} {idx}") for idx in range(10)] == [(f"The old man was thin and gaunt. {idx}", True) for idx in range(10)]
+
+
+def test_retries_rate_limited_requests(stub_url):
+    url = stub_url(rate_limit_rpm=2)
+    model = fast_retries(GLMModel(url, timeout=5), max_attempts=3)
+    assert model.make_request(PROMPT)[1] and model.make_request(PROMPT)[1]
+    with pytest.raises(Exception, match="Rate limit reached"):
+        model.make_request(PROMPT)
+
+
+def test_gives_up_after_max_retries(stub_url):
+    model = fast_retries(GLMModel(stub_url(error_rate=1.0), timeout=5), max_attempts=3)
+    assert model.make_request(PROMPT) == ("", False)
+
+
+def test_async_model_retries_server_errors(stub_url):
+    model = fast_retries(AsyncGLMModel(stub_url(error_rate=0.5, seed=1), timeout=5))
+
+    async def translate():
+        try:
+            return await asyncio.gather(*(model.make_request(f"{PROMPT} {idx}") for idx in range(10)))
+        finally:
+            await model.aclose()
+
+    assert asyncio.run(translate()) == [(f"The old man was thin and gaunt. {idx}", True) for idx in range(10)]
@@ -0,0 +1,73 @@
+import re
+
+from book import Book, Content, ContentType, Page
+from model import Model
+from translator import PDFTranslator
+from translator.checkpoint import TranslationCheckpoint
+
+WORDS = ["apple", "river", "stone", "cloud", "forest"]
+
+
+class DigitDroppingModel(Model):
+    """译文去掉数字，页眉中的页码无法替换，这些行需要单独翻译。"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def make_request(self, prompt):
+        self.calls += 1
+        return "译:" + re.sub(r"\d", "", prompt.rsplit(":", 1)[-1]), True
+
+
+def make_book():
+    book = Book("report.pdf")
+    for page_number, word in enumerate(WORDS, start=1):
+        page = Page()
+        page.add_content(Content(content_type=ContentType.TEXT, original="\n".join([
+            f"Annual Report page {page_number}",
+            f"The {word} is described here.",
+            f"More about the {word} follows.",
+            f"Another line on the {word}.",
+            "Confidential",
+        ])))
+        book.add_page(page)
+    return book
+
+
+def text_contents(book):
+    return [(page_idx, content_idx, content) for page_idx, page in enumerate(book.pages)
+            for content_idx, content in enumerate(page.contents) if content.content_type == ContentType.TEXT]
+
+
+def test_shared_lines_go_through_callback_and_progress():
+    events, progress = [], []
+    model = DigitDroppingModel()
+    translator = PDFTranslator(model, detect_headers_footers=True,
+                               content_callback=lambda page_idx, content_idx, content, translation, status: events.append((page_idx, content_idx, translation)),
+                               progress_callback=lambda done, total: progress.append((done, total)))
+    book = make_book()
+    translations = translator._translate_book(book, "中文")
+
+    contents = text_contents(book)
+    assert len(contents) == 15
+    assert sorted((page_idx, content_idx) for page_idx, content_idx, _ in events) == [(page_idx, content_idx) for page_idx, content_idx, _ in contents]
+    assert progress[-1] == (15, 15)
+    assert translations == [content.translation for _, _, content in contents]
+    assert [page.contents[-1].translation for page in book.pages] == ["译:Confidential"] * 5
+    # 5 页正文、页脚和页眉各一次，另外 4 个页眉的页码无法替换
+    assert model.calls == 11
+
+
+def test_resume_restores_shared_lines(tmp_path):
+    checkpoint_path = str(tmp_path / "report.checkpoint.jsonl")
+    checkpoint = TranslationCheckpoint(checkpoint_path, "report.pdf", "中文")
+    checkpoint.open(False)
+    translations = PDFTranslator(DigitDroppingModel(), detect_headers_footers=True)._translate_book(make_book(), "中文", checkpoint)
+    checkpoint.close()
+
+    model = DigitDroppingModel()
+    checkpoint = TranslationCheckpoint(checkpoint_path, "report.pdf", "中文")
+    checkpoint.open(True)
+    assert PDFTranslator(model, detect_headers_footers=True)._translate_book(make_book(), "中文", checkpoint) == translations
+    checkpoint.close()
+    assert model.calls == 0
@@ -0,0 +1,53 @@
+import io
+import os
+import threading
+import time
+
+from jobs.job_manager import JobManager
+from jobs.job_store import SUCCEEDED, JobStore
+
+
+class SlowTranslator:
+    """记录翻译次数，翻译期间保持任务为运行中，使并发的相同提交有机会复用它。"""
+
+    calls = 0
+    lock = threading.Lock()
+
+    def __init__(self, progress_callback=None):
+        pass
+
+    def translate_pdf(self, pdf_file_path, target_language, file_format, resume=False):
+        with SlowTranslator.lock:
+            SlowTranslator.calls += 1
+        time.sleep(0.2)
+        output_file_path = os.path.splitext(pdf_file_path)[0] + "_translated.md"
+        with open(output_file_path, "w", encoding="utf-8") as f:
+            f.write(target_language)
+        return output_file_path
+
+
+def test_concurrent_identical_submissions_share_one_job_across_managers(tmp_path):
+    # 两个 JobManager 各自连接同一个任务表，模拟 gunicorn 的两个 worker 进程
+    db_path = str(tmp_path / "jobs.sqlite3")
+    managers = [JobManager(SlowTranslator, JobStore(db_path), str(tmp_path / "jobs"), model_name="mock") for _ in range(2)]
+    SlowTranslator.calls = 0
+    barrier = threading.Barrier(4)
+    results = []
+
+    def submit(manager):
+        barrier.wait()
+        results.append(manager.submit(io.BytesIO(b"%PDF-1.4 same upload"), "report.pdf", "中文", "markdown"))
+
+    threads = [threading.Thread(target=submit, args=(managers[idx % 2],)) for idx in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    job_ids = {job_id for job_id, _ in results}
+    assert len(job_ids) == 1
+    assert sorted(reused for _, reused in results) == [False, True, True, True]
+    assert managers[0].wait(job_ids.pop(), timeout=10)["status"] == SUCCEEDED
+    assert SlowTranslator.calls == 1
+    for manager in managers:
+        manager.executor.shutdown(wait=True)
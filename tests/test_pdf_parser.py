@@ -0,0 +1,21 @@
+import os
+
+import pdfplumber
+
+from translator.pdf_parser import PDFParser
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BBOX = (10, 10, 110, 60)
+
+
+def fallback_hash(pdf_file_path):
+    # 没有可读取的数据流时 _image_hash 退化为按文档和位置计算
+    with pdfplumber.open(pdf_file_path) as pdf:
+        return PDFParser()._image_hash(pdf.pages[0], {"stream": None}, BBOX)
+
+
+def test_image_hash_fallback_distinguishes_documents():
+    test_pdf = os.path.join(TESTS_DIR, "test.pdf")
+    other_pdf = os.path.join(TESTS_DIR, "The_Old_Man_of_the_Sea.pdf")
+    assert fallback_hash(test_pdf) == fallback_hash(test_pdf)
+    assert fallback_hash(test_pdf) != fallback_hash(other_pdf)
@@ -0,0 +1,36 @@
+from book import Book, Content, ContentType, Page
+from model import MockModel
+from translator import PDFTranslator
+from translator.pdf_translator import _ResultAssembler
+from translator.text_chunker import Segment
+
+
+def make_book(pages=4, contents=5):
+    book = Book("sample.pdf")
+    for page_idx in range(pages):
+        page = Page()
+        for content_idx in range(contents):
+            page.add_content(Content(content_type=ContentType.TEXT, original=f"Paragraph {content_idx} on page {page_idx}."))
+        book.add_page(page)
+    return book
+
+
+def test_result_assembler_releases_tasks_in_order():
+    # 任务 0 被切分为两段，任务 1 和 2 合并在一个请求中
+    requests = [[Segment(0, 0, "a")], [Segment(0, 1, "b")], [Segment(1, 0, "c"), Segment(2, 0, "d")]]
+    assembler = _ResultAssembler([None] * 3, requests)
+
+    assert assembler.add(requests[2], [("C", True), ("D", True)]) == []
+    assert assembler.add(requests[1], [("B", False)]) == []
+    assert assembler.add(requests[0], [("A", True)]) == [(0, "A\nB", False), (1, "C", True), (2, "D", True)]
+
+
+def test_concurrent_translation_matches_serial_order():
+    # 随机延迟让并发请求乱序完成
+    serial_book, concurrent_book = make_book(), make_book()
+    serial = PDFTranslator(MockModel(latency=0, prefix="译:"))._translate_book(serial_book, "中文")
+    concurrent = PDFTranslator(MockModel(latency=0.02, latency_jitter=0.02, prefix="译:"), max_workers=8)._translate_book(concurrent_book, "中文")
+
+    assert concurrent == serial
+    assert serial[0] == "译:Paragraph 0 on page 0."
+    assert [content.translation for page in concurrent_book.pages for content in page.contents] == serial
@@ -0,0 +1,68 @@
+import email.utils
+
+import pytest
+
+from model import rate_limiter
+from model.rate_limiter import RateLimiter, RetryPolicy, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", clock)
+    return clock
+
+
+def test_reserve_waits_for_request_quota(clock):
+    limiter = RateLimiter(requests_per_minute=60)
+    assert [limiter.reserve() for _ in range(60)] == [0.0] * 60
+    # 配额用尽后每个请求依次多等 1 秒
+    assert limiter.reserve() == pytest.approx(1.0)
+    assert limiter.reserve() == pytest.approx(2.0)
+    clock.now += 2
+    assert limiter.reserve() == pytest.approx(1.0)
+
+
+def test_reserve_waits_for_token_quota_and_pause(clock):
+    limiter = RateLimiter(tokens_per_minute=600)
+    assert limiter.reserve(500) == 0.0
+    # 透支 400 个 token，按每秒 10 个补充
+    assert limiter.reserve(500) == pytest.approx(40.0)
+    clock.now += 40
+    limiter.adjust(-200)
+    assert limiter.reserve(100) == 0.0
+    limiter.pause(5)
+    assert limiter.reserve() == pytest.approx(5.0)
+
+
+def test_retry_policy_caps_retry_after_and_exhausts():
+    policy = RetryPolicy(max_attempts=3, base_delay=1.0, max_delay=10.0)
+    assert policy.get_delay(0, retry_after=2.5) == 2.5
+    assert policy.get_delay(1, retry_after=120) == 10.0
+    assert 0 <= policy.get_delay(1) <= 2.0
+    assert policy.get_delay(2) is None
+    assert policy.get_delay(2, retry_after=1) is None
+
+
+def test_retry_policy_backoff_is_capped():
+    policy = RetryPolicy(max_attempts=20, base_delay=1.0, max_delay=8.0)
+    assert all(0 <= policy.get_delay(attempt) <= min(8.0, 2 ** attempt) for attempt in range(19) for _ in range(20))
+
+
+def test_parse_retry_after(monkeypatch):
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "7"}) == 1.5
+    assert parse_retry_after({"retry-after": "7"}) == 7.0
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: 1_700_000_000.0)
+    assert parse_retry_after({"retry-after": email.utils.formatdate(1_700_000_030, usegmt=True)}) == pytest.approx(30.0)
+    assert parse_retry_after({"retry-after": email.utils.formatdate(1_699_999_000, usegmt=True)}) == 0.0
+    assert parse_retry_after({"retry-after": "soon"}) is None
+    assert parse_retry_after({}) is None
+    assert parse_retry_after(None) is None
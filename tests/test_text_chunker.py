@@ -0,0 +1,73 @@
+from book import Book, Content, ContentType, Page
+from model import Model
+from model.model import SEGMENT_MARKER_PATTERN
+from translator import PDFTranslator
+from translator.text_chunker import Segment, TextChunker
+from utils import estimate_tokens
+
+
+class MarkerDroppingModel(Model):
+    """批量请求的译文只保留第一个分段标记，单段请求正常返回。"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def make_request(self, prompt):
+        self.prompts.append(prompt)
+        if SEGMENT_MARKER_PATTERN.search(prompt):
+            return "<<<SEGMENT 1>>>\n只有第一段", True
+        return "译:" + prompt.split("呈现:", 1)[-1], True
+
+
+def test_split_keeps_every_piece_within_budget():
+    chunker = TextChunker(token_budget=20)
+    text = "\n".join(f"Line {idx} of a paragraph that is long enough to matter." for idx in range(10))
+
+    pieces = chunker.split(text)
+    assert len(pieces) > 1
+    assert all(estimate_tokens(piece) <= 20 for piece in pieces)
+    assert "\n".join(pieces) == text
+
+
+def test_split_breaks_overlong_lines_by_sentence():
+    chunker = TextChunker(token_budget=20)
+    line = " ".join(f"Sentence number {idx} has a few words." for idx in range(8))
+
+    pieces = chunker.split(line)
+    assert all(estimate_tokens(piece) <= 20 for piece in pieces)
+    assert len(pieces) > 1
+    # 句子之间的空格变为换行
+    assert "\n".join(pieces).replace("\n", " ") == line
+
+
+def test_plan_packs_short_texts_and_keeps_order():
+    chunker = TextChunker(token_budget=20)
+    requests = chunker.plan([(0, "Short one."), (1, "Short two."), (2, "Short three."), (3, "x" * 100)])
+
+    assert requests[0] == [Segment(0, 0, "Short one."), Segment(1, 0, "Short two."), Segment(2, 0, "Short three.")]
+    assert [segment.part_idx for segments in requests[1:] for segment in segments] == list(range(len(requests) - 1))
+    assert all(segment.task_idx == 3 for segments in requests[1:] for segment in segments)
+    assert all(sum(estimate_tokens(segment.text) for segment in segments) <= 20 for segments in requests)
+
+
+def test_split_batch_response_rejects_marker_mismatch():
+    model = MarkerDroppingModel()
+    assert model.split_batch_response("<<<SEGMENT 1>>>\n一\n<<<SEGMENT 2>>>\n二", 2) == ["一", "二"]
+    assert model.split_batch_response("<<<SEGMENT 1>>>\n一", 2) is None
+    assert model.split_batch_response("<<<SEGMENT 1>>>\n一\n<<<SEGMENT 3>>>\n三", 2) is None
+    assert model.split_batch_response("一\n二", 2) is None
+
+
+def test_marker_mismatch_falls_back_to_single_segment_requests():
+    book = Book("sample.pdf")
+    page = Page()
+    for idx in range(3):
+        page.add_content(Content(content_type=ContentType.TEXT, original=f"Paragraph {idx}."))
+    book.add_page(page)
+    model = MarkerDroppingModel()
+
+    translations = PDFTranslator(model, token_budget=100)._translate_book(book, "中文")
+
+    assert translations == ["译:Paragraph 0.", "译:Paragraph 1.", "译:Paragraph 2."]
+    # 一个批量请求，标记不完整后逐段重新请求
+    assert len(model.prompts) == 4
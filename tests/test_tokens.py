@@ -0,0 +1,27 @@
+import sys
+import types
+
+import pytest
+
+from utils import tokens
+
+
+@pytest.fixture
+def offline_tiktoken(monkeypatch):
+    """模拟已安装 tiktoken、但无法下载编码表的环境。"""
+    calls = []
+
+    def get_encoding(name):
+        calls.append(name)
+        raise ConnectionError("cannot download cl100k_base")
+
+    monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=get_encoding))
+    monkeypatch.setattr(tokens, "_encoding", None)
+    return calls
+
+
+def test_falls_back_to_character_estimate_when_encoding_cannot_be_loaded(offline_tiktoken):
+    assert tokens.estimate_tokens("abcdefgh") == 2
+    assert tokens.estimate_tokens("中文abcd") == 3
+    # 只尝试加载一次
+    assert offline_tiktoken == ["cl100k_base"]
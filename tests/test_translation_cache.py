@@ -0,0 +1,37 @@
+import itertools
+
+from translator import translation_cache
+from translator.translation_cache import TranslationCache
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path, monkeypatch):
+    # 用递增的时钟保证 last_access 各不相同
+    clock = itertools.count(1)
+    monkeypatch.setattr(translation_cache.time, "time", lambda: next(clock))
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+
+    cache.put("prompt a", "mock", "中文", "译文 a")
+    cache.put("prompt b", "mock", "中文", "译文 b")
+    assert cache.get("prompt a", "mock", "中文") == "译文 a"
+    cache.put("prompt c", "mock", "中文", "译文 c")
+
+    assert cache.get("prompt b", "mock", "中文") is None
+    assert cache.get("prompt a", "mock", "中文") == "译文 a"
+    assert cache.get("prompt c", "mock", "中文") == "译文 c"
+    assert cache.stats()["entries"] == 2
+    cache.close()
+
+
+def test_size_limit_evicts_oldest_entries(tmp_path, monkeypatch):
+    clock = itertools.count(1)
+    monkeypatch.setattr(translation_cache.time, "time", lambda: next(clock))
+    cache = TranslationCache(str(tmp_path / "cache.sqlite3"), max_entries=100, max_size_mb=1 / 1024)
+
+    for idx in range(3):
+        cache.put(f"prompt {idx}", "mock", "中文", str(idx) * 400)
+
+    assert cache.get("prompt 0", "mock", "中文") is None
+    assert cache.get("prompt 1", "mock", "中文") == "1" * 400
+    assert cache.get("prompt 2", "mock", "中文") == "2" * 400
+    assert cache.stats()["size_bytes"] == 800
+    cache.close()
@@ -0,0 +1,45 @@
+from translator.translation_memory import TranslationMemory
+
+PARAGRAPH = (
+    "Before servicing the unit, make sure the main power switch is turned off and the capacitor bank has been "
+    "discharged for at least 5 minutes. Remove the front cover by loosening the 4 captive screws, then lift the "
+    "panel away from the housing. Inspect the cooling fan, the air filter and the cable harness for dust, wear "
+    "or loose connectors, and replace any damaged parts with genuine spares. Tighten the terminal bolts to 12 Nm "
+    "and record the inspection date, the operator name and the measured insulation resistance in the service log. "
+    "Reinstall the front cover before restoring power."
+)
+
+
+TRANSLATION = "维修前确认主电源开关已关闭，电容放电至少 5 分钟。"
+
+
+def make_memory(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "memory.sqlite3"))
+    memory.add(PARAGRAPH, TRANSLATION, "中文")
+    return memory
+
+
+def test_reuses_translation_when_only_numbers_differ(tmp_path):
+    memory = make_memory(tmp_path)
+    match = memory.lookup(PARAGRAPH.replace("5 minutes", "10 minutes"), "中文")
+    assert match.translation == "维修前确认主电源开关已关闭，电容放电至少 10 分钟。"
+    memory.close()
+
+
+def test_one_word_edit_in_long_paragraph_is_only_a_reference(tmp_path):
+    memory = make_memory(tmp_path)
+    edited = PARAGRAPH.replace("is turned off", "is turned on")
+    match = memory.lookup(edited, "中文")
+    assert match.translation is None
+    assert match.references == [(PARAGRAPH, TRANSLATION)]
+    memory.close()
+
+
+def test_case_only_difference_is_not_reused(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "memory.sqlite3"))
+    memory.add("Contact US support", "联系美国支持", "中文")
+    assert memory.lookup("Contact US support", "中文").translation == "联系美国支持"
+    match = memory.lookup("contact us support", "中文")
+    assert match.translation is None
+    assert match.references == [("Contact US support", "联系美国支持")]
+    memory.close()